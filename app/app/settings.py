@@ -42,8 +42,21 @@ INSTALLED_APPS = [
     'user',
     'rider',
     'driver',
+    'notification',
+    'sos',
+    'ride',
+    'taskqueue',
 ]
 
+# Lean API workers leave out the admin and the docs apps; those are served by
+# a separate full deployment, and the schema by its prebuilt static file.
+LEAN_WORKER = os.environ.get('LEAN_WORKER') == '1'
+if LEAN_WORKER:
+    INSTALLED_APPS = [
+        app for app in INSTALLED_APPS
+        if app not in ('django.contrib.admin', 'drf_spectacular')
+    ]
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -88,6 +101,17 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -127,6 +151,17 @@ MEDIA_URL = '/static/media/'
 MEDIA_ROOT = '/vol/web/media'
 STATIC_ROOT = '/vol/web/static'
 
+# Uploads are stored once per distinct content, named after their hash.
+STORAGES = {
+    'default': {'BACKEND': 'app.utils.storage.ContentAddressedStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+# Uploaded files are streamed to temporary files, never held in memory;
+# UPLOAD_MAX_REQUEST_SIZE matches nginx's client_max_body_size.
+FILE_UPLOAD_HANDLERS = ['app.utils.uploads.SpoolingUploadHandler']
+UPLOAD_MAX_REQUEST_SIZE = 10 * 1024 * 1024
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
 
@@ -140,8 +175,26 @@ REST_FRAMEWORK = {
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_PARSER_CLASSES': (
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'app.utils.uploads.SpoolingMultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'app.utils.custom_pagination.CustomPagination',
     'PAGE_SIZE': 10,
+    # nginx passes the client address as REMOTE_ADDR; X-Forwarded-For is only
+    # trusted for proxies in front of it, or throttles could be dodged.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+    # '<throttle_scope>.<ip|email|route>' for app.utils.throttling; every
+    # public endpoint that hashes a password has a scope.
+    'DEFAULT_THROTTLE_RATES': {
+        'register.ip': '20/hour',
+        'register.email': '5/hour',
+        'register.route': '50/second',
+        'token.ip': '30/min',
+        'token.email': '10/min',
+        'token.route': '100/second',
+    },
 }
 
 SIMPLE_JWT = {
@@ -149,9 +202,110 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
 }
 
+# Push notifications are queued in core.NotificationOutbox and sent by the
+# dispatch_notifications worker.
+NOTIFICATION_PROVIDERS = {
+    'fcm': 'notification.providers.FCMProvider',
+    'onesignal': 'notification.providers.OneSignalProvider',
+    'sms': 'notification.providers.TwilioSMSProvider',
+}
+NOTIFICATION_MAX_ATTEMPTS = 5
+NOTIFICATION_RETRY_BASE_DELAY = 30
+NOTIFICATION_RETRY_MAX_DELAY = 60 * 30
+# Claimed rows are skipped by other workers for this many seconds while
+# they are sent; long enough for a batch of serial SMS calls.
+NOTIFICATION_CLAIM_TIMEOUT = 60 * 15
+
+# Background tasks are queued in core.Task and run by the run_tasks worker.
+# The worker refreshes a running task's lock every TASK_HEARTBEAT_INTERVAL
+# seconds; a lock older than TASK_LOCK_TIMEOUT seconds is assumed lost with
+# its worker and the task queued again. Tasks therefore run at least once,
+# not exactly once, and must be safe to repeat.
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_BASE_DELAY = 10
+TASK_RETRY_MAX_DELAY = 60 * 60
+TASK_LOCK_TIMEOUT = 60 * 10
+TASK_HEARTBEAT_INTERVAL = 60
+TASK_RETENTION_DAYS = 7
+# Recurring tasks queued by run_tasks: task name -> interval in seconds.
+TASK_SCHEDULE = {
+    'taskqueue.purge_finished': 60 * 60,
+    'core.purge_idempotency_keys': 60 * 60,
+}
+TASK_SCHEDULER_INTERVAL = 60
+
+# Responses to writes sent with an Idempotency-Key are replayed to retries
+# for IDEMPOTENCY_KEY_TTL seconds. A request still running after
+# IDEMPOTENCY_LOCK_TIMEOUT seconds is assumed dead and its key freed.
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+IDEMPOTENCY_LOCK_TIMEOUT = 60
+FCM_SERVER_KEY = os.environ.get('FCM_SERVER_KEY', '')
+ONESIGNAL_APP_ID = os.environ.get('ONESIGNAL_APP_ID', '')
+ONESIGNAL_API_KEY = os.environ.get('ONESIGNAL_API_KEY', '')
+TWILIO_ACCOUNT_SID = os.environ.get('TWILIO_ACCOUNT_SID', '')
+TWILIO_AUTH_TOKEN = os.environ.get('TWILIO_AUTH_TOKEN', '')
+TWILIO_FROM_NUMBER = os.environ.get('TWILIO_FROM_NUMBER', '')
+
+# Upper bound for the database work of one SOS trigger, in milliseconds.
+SOS_STATEMENT_TIMEOUT_MS = 500
+# Seconds a worker may serve its in-memory SOS contacts without reloading,
+# however the cache is shared.
+SOS_CONTACTS_LOCAL_TTL = 30
+
+# Driver dispatch: search radii tried in order, how many candidates are
+# scored per radius, and when a driver's last position is too old to trust.
+DISPATCH_SEARCH_RADII_KM = (2, 5, 10)
+DISPATCH_MAX_CANDIDATES = 20
+DISPATCH_MAX_LOCATION_AGE = 120
+DISPATCH_STALENESS_WEIGHT = 0.5
+
+# Driver breadcrumbs are stored in one chunk per driver and window; track
+# queries may span at most TRACK_MAX_QUERY_SECONDS.
+TRACK_WINDOW_SECONDS = 60 * 60
+TRACK_MAX_QUERY_SECONDS = 60 * 60 * 24
+
+# Online drivers without a location report for this long are marked offline
+# by the sweep_presence worker.
+PRESENCE_TIMEOUT_SECONDS = 60 * 5
+
+# Heatmap tiles are served from a per-process snapshot of the cell counts,
+# reloaded after HEATMAP_SNAPSHOT_TTL seconds; a region's tile spans
+# HEATMAP_REGION_RADIUS_KM around its centre.
+HEATMAP_SNAPSHOT_TTL = 5
+HEATMAP_REGION_RADIUS_KM = 30
+
+# Rides are partitioned by month: partitions created ahead of time, months
+# kept before archiving, where archives go and the default history window
+# of ride listings, in days. Expired partitions are only archived by the
+# daily ride.archive_partitions task, scheduled once RIDE_ARCHIVE_DIR is set.
+# Detaching an archived month locks the ride table, so it waits at most
+# RIDE_PARTITION_LOCK_TIMEOUT_MS for that lock before trying again next run.
+RIDE_PARTITIONS_AHEAD = 3
+RIDE_RETENTION_MONTHS = int(os.environ.get('RIDE_RETENTION_MONTHS', 24))
+RIDE_ARCHIVE_DIR = os.environ.get('RIDE_ARCHIVE_DIR')
+RIDE_PARTITION_LOCK_TIMEOUT_MS = 5000
+RIDE_LIST_DEFAULT_DAYS = 90
+if RIDE_ARCHIVE_DIR:
+    TASK_SCHEDULE['ride.archive_partitions'] = 60 * 60 * 24
+
+# Fare estimates: straight-line to road distance ratio, assumed average
+# speed for durations, and the most routes quoted in one request.
+FARE_ROAD_FACTOR = 1.3
+FARE_AVERAGE_SPEED_KMH = 30
+FARE_MAX_ROUTES = 100
+# Seconds a worker may quote from its in-memory tariffs without reloading.
+FARE_TARIFFS_LOCAL_TTL = 60
+
+# Code version of the running build, used to key the prebuilt OpenAPI schema.
+APP_VERSION = os.environ.get('APP_VERSION')
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'DriverMete Api',
     'DESCRIPTION': 'DriverMete',
     'VERSION': '1.0',
     'COMPONENT_SPLIT_REQUEST': True,
+    'ENUM_NAME_OVERRIDES': {
+        'StatusEnum': 'core.models.User.StatusUnitChoices',
+        'RideStatusEnum': 'core.models.Ride.StatusChoices',
+    },
 }
\ No newline at end of file
@@ -1,30 +1,45 @@
-from django.contrib import admin
 from django.conf import settings
 from django.urls import path, include
 from django.conf.urls.static import static
 
 from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
     TokenRefreshView
 )
 
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularSwaggerView
-)
+from user.views import TokenObtainView
 
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
-    path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('api/token/', TokenObtainView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
-    path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
-    path('api/docs/', SpectacularSwaggerView.as_view(url_name='api-schema'), name='api-docs'),
     path('api/v1/user/', include(('user.urls', 'user'), namespace='user')),
     path('api/v1/rider/', include(('rider.urls', 'rider'), namespace='rider')),
     path('api/v1/driver/', include(('driver.urls', 'driver'), namespace='driver')),
+    path('api/v1/notification/', include(('notification.urls', 'notification'), namespace='notification')),
+    path('api/v1/sos/', include(('sos.urls', 'sos'), namespace='sos')),
+    path('api/v1/ride/', include(('ride.urls', 'ride'), namespace='ride')),
+    path('api/v1/tasks/', include(('taskqueue.urls', 'taskqueue'), namespace='taskqueue')),
 ]
 
+# Lean workers (settings.LEAN_WORKER) never import the admin or the docs.
+if 'django.contrib.admin' in settings.INSTALLED_APPS:
+    from django.contrib import admin
+
+    urlpatterns += [
+        path('admin/', admin.site.urls),
+    ]
+
+if 'drf_spectacular' in settings.INSTALLED_APPS:
+    from app.utils.schema import (
+        PrecomputedSchemaView,
+        PrecomputedSwaggerView
+    )
+
+    urlpatterns += [
+        path('api/schema/', PrecomputedSchemaView.as_view(), name='api-schema'),
+        path('api/docs/', PrecomputedSwaggerView.as_view(url_name='api-schema'), name='api-docs'),
+    ]
+
 if settings.DEBUG:
     urlpatterns += static(
         settings.MEDIA_URL,
@@ -0,0 +1,52 @@
+"""
+Conditional GET helpers for list endpoints.
+"""
+import hashlib
+from calendar import timegm
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def queryset_validators(queryset, request=None, field='updated_at'):
+    """Return an ``(etag, last_modified)`` pair for a filtered queryset.
+
+    Both values come from a single ``MAX(field)``/``COUNT(*)`` aggregate so
+    no row is fetched or serialized. The count is always exact: deleting a
+    row other than the newest only shows in it, so a cached or estimated
+    count would answer 304 for a list that changed. ``last_modified`` is a
+    unix timestamp, or ``None`` when the queryset is empty.
+    """
+    state = queryset.aggregate(last_modified=Max(field), count=Count('pk'))
+    last_modified = state['last_modified']
+    timestamp = timegm(last_modified.utctimetuple()) if last_modified else None
+
+    parts = [
+        last_modified.isoformat() if last_modified else '',
+        str(state['count']),
+    ]
+    if request is not None:
+        # Pages, filters and the caller all change what the body contains.
+        parts.append(request.get_full_path())
+        parts.append(str(getattr(request.user, 'pk', '')))
+    digest = hashlib.md5(':'.join(parts).encode(), usedforsecurity=False).hexdigest()
+
+    return quote_etag(digest), timestamp
+
+
+def not_modified_response(request, etag, last_modified):
+    """Return a 304 response when the client copy is still fresh, else None."""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    """Attach the validators so clients can revalidate on their next poll."""
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,65 @@
+"""
+Count strategies for paginated querysets.
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+
+
+class ExactCount:
+    """Run ``COUNT(*)`` over the queryset."""
+
+    def count(self, queryset):
+        return queryset.count()
+
+
+class EstimatedCount:
+    """Use the query planner's row estimate instead of counting.
+
+    Estimates are poor for small results, so below ``threshold`` rows the
+    exact count is taken; that count is cheap by definition.
+    """
+
+    def __init__(self, threshold=10000):
+        self.threshold = threshold
+
+    def count(self, queryset):
+        if queryset.query.is_empty():
+            return 0
+        estimate = planner_estimate(queryset)
+        if estimate < self.threshold:
+            return queryset.count()
+        return estimate
+
+
+class CachedCount:
+    """Reuse a count per filter combination for ``timeout`` seconds."""
+
+    def __init__(self, timeout=60, strategy=None):
+        self.timeout = timeout
+        self.strategy = strategy or ExactCount()
+
+    def count(self, queryset):
+        if queryset.query.is_empty():
+            # .none() has no SQL to key on, and nothing to count.
+            return 0
+        key = count_cache_key(queryset)
+        count = cache.get(key)
+        if count is None:
+            count = self.strategy.count(queryset)
+            cache.set(key, count, self.timeout)
+        return count
+
+
+def planner_estimate(queryset):
+    """Return the planner's estimated row count for the queryset."""
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def count_cache_key(queryset):
+    """Build a cache key from the model and the filtered SQL."""
+    query = queryset.order_by().query
+    digest = hashlib.md5(str(query).encode(), usedforsecurity=False).hexdigest()
+    return f'count:{queryset.model._meta.label_lower}:{digest}'
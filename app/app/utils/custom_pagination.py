@@ -1,16 +1,35 @@
 from django.conf import settings
+from django.core.paginator import Paginator as DjangoPaginator
+from django.utils.functional import cached_property
 
 from rest_framework.pagination import PageNumberPagination
 
+from app.utils.counting import EstimatedCount, ExactCount
+
 
 class CustomPagination(PageNumberPagination):
     page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
     page_size_query_param = 'per_page'
     max_page_size = 100
+    count_strategy = ExactCount()
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, count_strategy=None, **kwargs):
         super().__init__(*args, **kwargs)
         self.paginator = None
+        self.count = None
+        if count_strategy is not None:
+            self.count_strategy = count_strategy
+
+    def get_count(self, queryset):
+        """Count the queryset once per request with the configured strategy."""
+        if self.count is None:
+            self.count = self.count_strategy.count(queryset)
+        return self.count
+
+    def django_paginator_class(self, object_list, per_page, *args, **kwargs):
+        paginator = DjangoPaginator(object_list, per_page, *args, **kwargs)
+        paginator.count = self.get_count(object_list)
+        return paginator
 
     def get_paginated_response(self, data):
         self.paginator = self.page.paginator
@@ -22,3 +41,12 @@ class CustomPagination(PageNumberPagination):
             'total_pages': self.paginator.num_pages,
         }
         return response
+
+
+class EstimatedCountPaginator(DjangoPaginator):
+    """Django paginator that trusts the planner's estimate for large results."""
+    count_strategy = EstimatedCount()
+
+    @cached_property
+    def count(self):
+        return self.count_strategy.count(self.object_list)
@@ -0,0 +1,94 @@
+"""
+Fleet isolation for staff requests.
+
+A staff user who is not a superuser only sees the users of their own
+fleet. A staff user without a fleet, such as a manager who registered
+through ``user:register_manager``, sees none until an admin assigns one:
+access is denied by default. Views opt in with ``FleetScopeMixin``; every
+view open to staff must, which ``user.tests.test_fleet_scope`` checks.
+While such a request runs, a context variable holds the caller's fleet,
+and every queryset of a ``FleetScopedManager`` is filtered to it. Lists,
+counts and aggregates therefore only read that fleet's rows, through
+indexes that lead with ``fleet_id``. Related-object access goes through
+the base manager and is not filtered.
+
+Metrics about the workers themselves cannot be split by fleet; their
+views are limited to superusers with ``IsSuperUser``.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import models
+
+from rest_framework.permissions import BasePermission
+
+
+UNSCOPED = object()
+
+_fleet = ContextVar('fleet_scope', default=UNSCOPED)
+
+
+def scope_for(user):
+    """Return the fleet id ``user`` is confined to, ``None`` for no fleet, or ``UNSCOPED``."""
+    if user.is_superuser or not user.is_staff:
+        return UNSCOPED
+    return user.fleet_id
+
+
+def current_scope():
+    return _fleet.get()
+
+
+@contextmanager
+def fleet_scope(fleet_id):
+    """Confine scoped managers to ``fleet_id`` inside the block."""
+    token = _fleet.set(fleet_id)
+    try:
+        yield
+    finally:
+        _fleet.reset(token)
+
+
+def apply_scope(queryset, fleet_id, field='fleet_id'):
+    """Filter ``queryset`` to ``fleet_id`` as returned by ``scope_for()``."""
+    if fleet_id is UNSCOPED:
+        return queryset
+    if fleet_id is None:
+        return queryset.none()
+    return queryset.filter(**{field: fleet_id})
+
+
+class FleetScopedManager(models.Manager):
+    """A manager whose querysets follow the current fleet scope."""
+    fleet_field = 'fleet_id'
+
+    def get_queryset(self):
+        return apply_scope(super().get_queryset(), _fleet.get(), self.fleet_field)
+
+    def unscoped(self):
+        """Return a queryset over every fleet, for system code inside a scope."""
+        return super().get_queryset()
+
+
+class FleetScopeMixin:
+    """Run a view's handler inside the caller's fleet scope."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Entered after authentication, which must see every user.
+        self._fleet_token = _fleet.set(scope_for(request.user))
+
+    def dispatch(self, request, *args, **kwargs):
+        self._fleet_token = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self._fleet_token is not None:
+                _fleet.reset(self._fleet_token)
+
+
+class IsSuperUser(BasePermission):
+    """Allow superusers only, for data that spans every fleet."""
+
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_superuser)
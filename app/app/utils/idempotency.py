@@ -0,0 +1,204 @@
+"""
+Replay of retried writes that carry an ``Idempotency-Key`` header.
+
+The first request with a key claims it by inserting a ``core.IdempotencyKey``
+row, runs, and stores its response there for ``IDEMPOTENCY_KEY_TTL``
+seconds. A retry with the same key and body gets the stored response back
+from ``APIView.initial()``, before the handler validates, hashes or writes
+anything. A retry that arrives while the first request is still running
+gets 409; one that reuses the key for a different body gets 422.
+
+Responses of 500 and above are not stored: the claim is released so the
+client's next retry runs again. A claim left behind by a crashed worker
+expires after ``IDEMPOTENCY_LOCK_TIMEOUT`` seconds. Expired rows are
+deleted by the ``core.purge_idempotency_keys`` task, which run_tasks
+queues through ``TASK_SCHEDULE``.
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from django.core.files.uploadedfile import UploadedFile
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+from app.utils import metrics
+from core.models import IdempotencyKey
+
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+CLAIM_SQL = f"""
+    INSERT INTO {IdempotencyKey._meta.db_table} (scope, key, fingerprint, created_at, expires_at)
+    VALUES (%s, %s, %s, %s, %s)
+    ON CONFLICT (scope, key) DO NOTHING
+    RETURNING id
+"""
+
+
+class IdempotencyConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = _('A request with this idempotency key is still in progress.')
+    default_code = 'idempotency_conflict'
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = _('This idempotency key was used for a different request.')
+    default_code = 'idempotency_key_reused'
+
+
+class _Replay(Exception):
+    """Carries a stored response out of ``initial()``."""
+
+    def __init__(self, response):
+        self.response = response
+
+
+def _encode_file(value):
+    if isinstance(value, UploadedFile):
+        # Name and size alone would replay a different image of the same size.
+        digest = hashlib.sha256()
+        for chunk in value.chunks():
+            digest.update(chunk)
+        value.seek(0)
+        return [value.name, value.size, digest.hexdigest()]
+    return str(value)
+
+
+def fingerprint(request):
+    """Return a digest of the request's method, path and parsed body."""
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+    body = json.dumps(data, sort_keys=True, default=_encode_file)
+    return hashlib.sha256(f'{request.method} {request.get_full_path()} {body}'.encode()).hexdigest()
+
+
+def claim(scope, key, digest):
+    """Claim ``key`` in ``scope`` for a new request, like ``get_or_create()``.
+
+    Return ``(record, claimed)``. When the key is held, ``record`` is the
+    row holding it, or ``None`` if that row was released meanwhile. An
+    expired row is taken over in place.
+    """
+    now = timezone.now()
+    lock_until = now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT)
+    # ON CONFLICT rather than catching IntegrityError: a retry costs no
+    # savepoint and no aborted insert.
+    with connection.cursor() as cursor:
+        cursor.execute(CLAIM_SQL, [scope, key, digest, now, lock_until])
+        row = cursor.fetchone()
+    if row is not None:
+        return IdempotencyKey(
+            pk=row[0], scope=scope, key=key, fingerprint=digest, created_at=now, expires_at=lock_until,
+        ), True
+
+    record = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+    if record is None or record.expires_at > now:
+        return record, False
+    taken = IdempotencyKey.objects.filter(pk=record.pk, expires_at__lte=now).update(
+        fingerprint=digest, response_status=None, response_body=None, created_at=now, expires_at=lock_until,
+    )
+    if not taken:
+        return IdempotencyKey.objects.filter(pk=record.pk).first(), False
+    record.fingerprint, record.response_status, record.response_body = digest, None, None
+    record.created_at, record.expires_at = now, lock_until
+    return record, True
+
+
+def _owned(record):
+    # created_at changes when an expired claim is taken over; never touch
+    # the row of the request that took over.
+    return IdempotencyKey.objects.filter(pk=record.pk, created_at=record.created_at)
+
+
+def release(record):
+    """Give up a claim so the next request with its key runs again."""
+    _owned(record).delete()
+
+
+def complete(record, response):
+    """Store ``response`` for ``record``'s key, or release the key on 5xx."""
+    if response.status_code >= 500:
+        release(record)
+        return
+    _owned(record).update(
+        response_status=response.status_code,
+        response_body=response.data,
+        expires_at=timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+    )
+
+
+def purge_expired():
+    """Delete expired keys and return how many there were."""
+    return IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()[0]
+
+
+class IdempotencyMixin:
+    """Replay the stored response of writes retried with an ``Idempotency-Key``.
+
+    Keys are scoped to the route and the authenticated user, so clients
+    should send a fresh random key (a UUID) per logical write. Requests
+    without the header run as usual.
+    """
+    idempotent_methods = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+    def get_idempotency_scope(self, request):
+        match = request.resolver_match
+        route = match.view_name if match else type(self).__name__
+        user_id = request.user.pk if request.user and request.user.is_authenticated else ''
+        return f'{route}:{user_id}'
+
+    def initial(self, request, *args, **kwargs):
+        self._idempotency_claim = None
+        super().initial(request, *args, **kwargs)
+        key = request.headers.get(HEADER)
+        if key is None or request.method not in self.idempotent_methods:
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise ValidationError({HEADER: [_('Must be 1 to 255 characters.')]})
+
+        digest = fingerprint(request)
+        record, claimed = claim(self.get_idempotency_scope(request), key, digest)
+        if claimed:
+            self._idempotency_claim = record
+            return
+        if record is not None and record.fingerprint != digest:
+            raise IdempotencyKeyReused()
+        if record is None or record.response_status is None:
+            metrics.incr('idempotency.conflict')
+            raise IdempotencyConflict()
+        metrics.incr('idempotency.replayed')
+        raise _Replay(Response(record.response_body, status=record.response_status, headers={'Idempotent-Replayed': 'true'}))
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _Replay):
+            return exc.response
+        try:
+            return super().handle_exception(exc)
+        except Exception:
+            # Unhandled: Django answers 500, so let the client retry.
+            self._release_claim()
+            raise
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        record = getattr(self, '_idempotency_claim', None)
+        if record is not None:
+            self._idempotency_claim = None
+            complete(record, response)
+        return response
+
+    def _release_claim(self):
+        record = getattr(self, '_idempotency_claim', None)
+        if record is not None:
+            self._idempotency_claim = None
+            release(record)
@@ -0,0 +1,58 @@
+"""
+Lightweight counters and timings kept in the shared cache.
+
+Values are visible to every worker when CACHES points at a shared backend;
+with the default LocMemCache they are per process.
+"""
+from django.core.cache import cache
+
+
+KEY_PREFIX = 'metrics'
+TIMEOUT = None
+
+
+def _key(name):
+    return f'{KEY_PREFIX}:{name}'
+
+
+def incr(name, value=1):
+    """Add ``value`` to counter ``name``."""
+    key = _key(name)
+    if not cache.add(key, value, TIMEOUT):
+        try:
+            cache.incr(key, value)
+        except ValueError:
+            # Evicted between add() and incr().
+            cache.set(key, value, TIMEOUT)
+
+
+def observe(name, seconds):
+    """Record one timing for ``name``: count, total and max, in microseconds."""
+    micros = int(seconds * 1e6)
+    incr(f'{name}.count')
+    incr(f'{name}.total_us', micros)
+    max_key = _key(f'{name}.max_us')
+    if micros > (cache.get(max_key) or 0):
+        cache.set(max_key, micros, TIMEOUT)
+
+
+def gauge(name, value):
+    """Set ``name`` to the latest ``value``."""
+    cache.set(_key(name), value, TIMEOUT)
+
+
+def snapshot(*names):
+    """Return the current value of each metric, missing ones as 0."""
+    values = cache.get_many([_key(name) for name in names])
+    return {name: values.get(_key(name), 0) for name in names}
+
+
+def timing_snapshot(name):
+    """Return count, mean and max of a timing in milliseconds."""
+    values = snapshot(f'{name}.count', f'{name}.total_us', f'{name}.max_us')
+    count = values[f'{name}.count']
+    return {
+        'count': count,
+        'mean_ms': round(values[f'{name}.total_us'] / count / 1000, 3) if count else 0,
+        'max_ms': round(values[f'{name}.max_us'] / 1000, 3),
+    }
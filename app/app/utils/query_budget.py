@@ -0,0 +1,142 @@
+"""
+Query budgets for endpoint tests.
+
+An N+1 shows up as a query count that grows with the rows an endpoint
+reads, usually a serializer touching a relation once per row. A single
+``assertNumQueries`` against a small fixture rarely notices, so
+``QueryBudgetMixin.assertQueryBudget()`` runs the endpoint with the data
+seeded at two sizes and fails if the count moves between them, or passes
+the endpoint's budget.
+
+``QueryLog`` records statements through ``connection.execute_wrapper()``
+rather than ``CaptureQueriesContext``: it needs no debug cursor, times
+each statement with ``perf_counter`` and keeps the SQL apart from its
+parameters, so repeated statements, the mark of an N+1, group together
+in failure messages. Set ``QUERY_BUDGET_REPORT=1`` to print each
+endpoint's query count and database time after its test case.
+"""
+import os
+import sys
+import time
+from collections import Counter
+
+from django.db import connection
+from django.core.cache import cache
+
+
+class QueryLog:
+    """Record the statements run on a connection inside a ``with`` block."""
+
+    def __init__(self, using=connection):
+        self.connection = using
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, params, time.perf_counter() - start))
+
+    def __enter__(self):
+        self.queries = []
+        self._wrapper = self.connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+
+    def __len__(self):
+        return len(self.queries)
+
+    @property
+    def time(self):
+        """Seconds spent in the database, driver round trips included."""
+        return sum(duration for _, _, duration in self.queries)
+
+    def repeated(self):
+        """Return ``{sql: count}`` for statements run more than once."""
+        counts = Counter(sql for sql, _, _ in self.queries)
+        return {sql: count for sql, count in counts.items() if count > 1}
+
+    def format(self):
+        repeated = self.repeated()
+        return '\n'.join(
+            f'{number:>4}. {duration * 1000:7.2f} ms{f" [x{repeated[sql]}]" if sql in repeated else ""} '
+            f'{sql} {params!r}'
+            for number, (sql, params, duration) in enumerate(self.queries, 1)
+        )
+
+
+class QueryBudgetMixin:
+    """TestCase assertions that an endpoint's queries do not grow with data."""
+    query_budget_sizes = (2, 20)
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.query_budgets = []
+
+    @classmethod
+    def tearDownClass(cls):
+        if os.environ.get('QUERY_BUDGET_REPORT') and cls.query_budgets:
+            sizes = ' / '.join(map(str, cls.query_budget_sizes))
+            sys.stderr.write(f'\n{cls.__name__}: cold and warm queries (database ms) with {sizes} rows\n')
+            for label, runs in cls.query_budgets:
+                sys.stderr.write(f'  {label:<40}' + ''.join(
+                    f'  {len(cold):>3} ({cold.time * 1000:5.2f}) {len(warm):>3} ({warm.time * 1000:5.2f})'
+                    for cold, warm in runs
+                ) + '\n')
+        super().tearDownClass()
+
+    def measure(self, request, prepare=None):
+        """Return the ``QueryLog`` of ``request()`` with a cold and a warm cache.
+
+        The cache is cleared first, so throttles, cached counts and
+        in-process tables start the same way at every size. ``prepare()``,
+        if given, runs outside the log before each call and its result is
+        passed to ``request``.
+        """
+        cache.clear()
+        logs = []
+        for _ in ('cold', 'warm'):
+            args = prepare() if prepare else ()
+            with QueryLog() as log:
+                self.last_response = request(*args)
+            logs.append(log)
+        return logs
+
+    def assertQueryBudget(self, request, seed, budget, prepare=None, label=None):
+        """Assert ``request`` runs the same queries, at most ``budget``, at every size.
+
+        ``seed(count)`` adds ``count`` rows of whatever the endpoint reads;
+        it is called with the difference between consecutive sizes. Cold
+        and warm requests are compared separately. One request is made
+        before any seeding, so work done once per process is not counted.
+        """
+        label = label or self.id().rsplit('.', 1)[-1]
+        request(*(prepare() if prepare else ()))
+        runs = []
+        seeded = 0
+        for size in self.query_budget_sizes:
+            seed(size - seeded)
+            seeded = size
+            runs.append(self.measure(request, prepare))
+        self.query_budgets.append((label, runs))
+
+        failures = []
+        for phase, logs in zip(('cold', 'warm'), zip(*runs)):
+            counts = [len(log) for log in logs]
+            if len(set(counts)) == 1 and counts[0] <= budget:
+                continue
+            failures.append(f'{label}, {phase} cache: ' + ', '.join(
+                f'{count} queries with {size} rows' for count, size in zip(counts, self.query_budget_sizes)
+            ) + f' (budget {budget}).')
+            failures.extend(
+                f'{size} rows, {log.time * 1000:.2f} ms:\n{log.format()}'
+                for size, log in zip(self.query_budget_sizes, logs)
+            )
+        if failures:
+            self.fail('\n\n'.join(failures))
+        return runs
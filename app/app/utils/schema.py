@@ -0,0 +1,78 @@
+"""
+Serve the OpenAPI schema from a file built ahead of time.
+"""
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse
+from django.templatetags.static import static
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from drf_spectacular.renderers import OpenApiJsonRenderer
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView, SpectacularSwaggerView
+
+
+SCHEMA_DIR = 'schema'
+
+
+def schema_file_name(version=None):
+    """Return the static path of the schema for a code version, if any."""
+    version = version or settings.APP_VERSION
+    if not version:
+        return None
+    return f'{SCHEMA_DIR}/openapi-{version}.json'
+
+
+def schema_file_path(version=None):
+    """Return the location of the schema file under ``STATIC_ROOT``."""
+    name = schema_file_name(version)
+    if name is None:
+        return None
+    return Path(settings.STATIC_ROOT) / name
+
+
+def render_schema():
+    """Generate the schema once and return it as JSON bytes."""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+    return OpenApiJsonRenderer().render(schema, renderer_context={})
+
+
+def built_schema_path():
+    """Return the schema file for the running version if it has been built."""
+    path = schema_file_path()
+    if path is not None and path.is_file():
+        return path
+    return None
+
+
+class PrecomputedSchemaView(SpectacularAPIView):
+    """Serve the prebuilt schema, introspecting views only when it is missing."""
+    cache_max_age = 60 * 60 * 24
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        path = built_schema_path()
+        # Language or version overrides still need a live generation.
+        if path is None or request.GET:
+            return super().get(request, *args, **kwargs)
+
+        etag = quote_etag(settings.APP_VERSION)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = FileResponse(path.open('rb'), content_type='application/vnd.oai.openapi+json')
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=self.cache_max_age)
+        return response
+
+
+class PrecomputedSwaggerView(SpectacularSwaggerView):
+    """Point Swagger UI at the versioned static schema so nginx serves it."""
+
+    def _get_schema_url(self, request):
+        if built_schema_path() is not None:
+            return static(schema_file_name())
+        return super()._get_schema_url(request)
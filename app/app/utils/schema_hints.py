@@ -0,0 +1,24 @@
+"""
+Schema annotations that cost nothing on lean workers.
+
+Views describe themselves with drf-spectacular's ``extend_schema``, but the
+decorator imports ``drf_spectacular.openapi`` to do so. Lean workers
+(``settings.LEAN_WORKER``) never build a schema, so there the decorator
+returns the view unchanged and ``OpenApiTypes`` only answers attribute
+lookups. Views import both names from here, never from drf_spectacular.
+"""
+from django.conf import settings
+
+
+if 'drf_spectacular' in settings.INSTALLED_APPS:
+    from drf_spectacular.types import OpenApiTypes  # noqa: F401
+    from drf_spectacular.utils import extend_schema  # noqa: F401
+else:
+    class _Types:
+        def __getattr__(self, name):
+            return name
+
+    OpenApiTypes = _Types()
+
+    def extend_schema(*args, **kwargs):
+        return lambda view: view
@@ -0,0 +1,172 @@
+"""
+Content-addressed, deduplicated file storage for media uploads.
+
+An upload is hashed while it is streamed to a temporary file and then
+stored as ``<upload_to directory>/<aa>/<bb>/<sha256><ext>``, where ``aa``
+and ``bb`` are the first bytes of the hash. Identical uploads share one
+file, and names never change once written, so the media volume and any
+CDN in front of it can cache them forever.
+
+``core.MediaBlob`` counts the references to each file. Saving increments
+the count and ``delete()`` decrements it; the file is removed with its
+last reference. Both run under the blob's row lock, so a save and a
+delete of the same content cannot interleave. Django never deletes a
+file on its own; the signal receivers below keep the counts in step
+with the model rows that refer to them. A row that stores a file again
+drops its old reference even when the content, and so the name, is
+unchanged: a retried upload must not leave an extra reference behind.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.db import connection, transaction
+from django.core.files.base import File
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db.models import FileField
+
+from core.models import MediaBlob
+
+
+TMP_DIR = 'tmp'
+
+ADD_REFERENCE_SQL = f"""
+    INSERT INTO {MediaBlob._meta.db_table} (name, sha256, size, refcount, created_at)
+    VALUES (%s, %s, %s, 1, now())
+    ON CONFLICT (name) DO UPDATE SET refcount = {MediaBlob._meta.db_table}.refcount + 1
+"""
+
+
+def blob_name(directory, digest, ext):
+    """Return the storage name of content with the given sha256 hex digest."""
+    return os.path.join(directory, digest[:2], digest[2:4], f'{digest}{ext.lower()}').replace('\\', '/')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """A FileSystemStorage that names files after their content."""
+
+    def get_available_name(self, name, max_length=None):
+        # Same content, same name: never add a suffix.
+        return name
+
+    def _save(self, name, content):
+        directory, ext = os.path.dirname(name), os.path.splitext(name)[1]
+        if hasattr(content, 'temporary_file_path'):
+            # Already on disk: hash it in place and move it if it is new.
+            source, spooled = content.temporary_file_path(), False
+        else:
+            tmp_dir = self.path(TMP_DIR)
+            os.makedirs(tmp_dir, exist_ok=True)
+            fd, source = tempfile.mkstemp(dir=tmp_dir)
+            os.close(fd)
+            spooled = True
+
+        try:
+            digest, size = self._hash(content, source if spooled else None)
+            name = blob_name(directory, digest, ext)
+            full_path = self.path(name)
+            with transaction.atomic(), connection.cursor() as cursor:
+                # The upsert holds the row lock until the file is in place.
+                cursor.execute(ADD_REFERENCE_SQL, [name, digest, size])
+                if not os.path.exists(full_path):
+                    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                    file_move_safe(source, full_path, allow_overwrite=True)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(full_path, self.file_permissions_mode)
+        finally:
+            if spooled and os.path.exists(source):
+                os.remove(source)
+        return name
+
+    def _hash(self, content, spool_path=None):
+        """Return the sha256 hex digest and size of ``content``, copying it to ``spool_path``."""
+        digest = hashlib.sha256()
+        size = 0
+        with open(spool_path or os.devnull, 'wb') as spool:
+            for chunk in content.chunks():
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                digest.update(chunk)
+                size += len(chunk)
+                if spool_path:
+                    spool.write(chunk)
+        return digest.hexdigest(), size
+
+    def delete(self, name):
+        """Drop one reference to ``name``; remove the file with the last one."""
+        if not name:
+            raise ValueError('The name must be given to delete().')
+        with transaction.atomic():
+            blob = MediaBlob.objects.select_for_update().filter(name=name).first()
+            if blob is None:
+                # Not tracked, e.g. written before this storage was used.
+                return super().delete(name)
+            if blob.refcount > 1:
+                MediaBlob.objects.filter(pk=blob.pk).update(refcount=blob.refcount - 1)
+                return
+            blob.delete()
+            super().delete(name)
+
+
+_fields = {}
+
+
+def _file_fields(model):
+    if model not in _fields:
+        _fields[model] = [field for field in model._meta.concrete_fields if isinstance(field, FileField)]
+    return _fields[model]
+
+
+def _stored_name(instance, field):
+    # Read from __dict__: a deferred field is not loaded just to release it.
+    value = instance.__dict__.get(field.attname)
+    return getattr(value, 'name', value)
+
+
+def _release(storage, name):
+    if name and isinstance(storage, ContentAddressedStorage):
+        transaction.on_commit(lambda: storage.delete(name))
+
+
+def track_files(sender, instance, **kwargs):
+    """Signal receiver (post_init): remember the stored file names.
+
+    Deferred fields are not seen, so replacing them leaks a reference:
+    the file is kept, never lost.
+    """
+    instance._stored_files = {field.attname: _stored_name(instance, field) for field in _file_fields(sender)}
+
+
+def _is_new_file(value):
+    # A FieldFile loaded from the database is committed; an upload is not.
+    return isinstance(value, File) and not getattr(value, '_committed', False)
+
+
+def mark_new_files(sender, instance, **kwargs):
+    """Signal receiver (pre_save): note the fields whose file is about to be stored."""
+    instance._new_files = {
+        field.attname for field in _file_fields(sender) if _is_new_file(instance.__dict__.get(field.attname))
+    }
+
+
+def release_replaced_files(sender, instance, **kwargs):
+    """Signal receiver (post_save): drop references to replaced files.
+
+    A file stored again under the same name took a new reference, so the
+    old one is dropped as for any other replacement.
+    """
+    stored = getattr(instance, '_stored_files', {})
+    new = getattr(instance, '_new_files', set())
+    for field in _file_fields(sender):
+        old = stored.get(field.attname)
+        if old and (field.attname in new or old != _stored_name(instance, field)):
+            _release(field.storage, old)
+    instance._new_files = set()
+    track_files(sender, instance)
+
+
+def release_files(sender, instance, **kwargs):
+    """Signal receiver (post_delete): drop references held by a deleted row."""
+    for field in _file_fields(sender):
+        _release(field.storage, _stored_name(instance, field))
@@ -0,0 +1,162 @@
+"""
+Sliding-window request throttles kept in the shared cache.
+
+A view opts in with ``throttle_scope`` plus ``throttle_classes`` or
+``PublicThrottleMixin``. Each throttle limits one key (client IP,
+submitted email or the route as a whole) at the rate
+``'<scope>.<kind>'`` in ``DEFAULT_THROTTLE_RATES``.
+Throttles run in ``APIView.initial()``, before the handler validates or
+hashes anything.
+
+Instead of DRF's list of timestamps per key, each key has one counter per
+fixed window. The current count is estimated as the current window's
+count plus the previous window's, weighted by how much of it still
+overlaps the sliding window. A check costs one ``get_many`` and one
+``incr`` or ``add``, both atomic on shared backends.
+
+The limits only hold across processes if the cache is shared. On a
+per-process backend such as LocMem they multiply by the number of
+workers and containers, so ``check_shared_cache`` warns at deploy time
+(``manage.py check --deploy``). docker-compose runs Redis for this.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core import checks
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+PER_PROCESS_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def check_shared_cache(app_configs=None, **kwargs):
+    """System check: throttle rates are configured on a cache every worker shares."""
+    backend = settings.CACHES['default']['BACKEND']
+    if not api_settings.DEFAULT_THROTTLE_RATES or backend not in PER_PROCESS_CACHES:
+        return []
+    return [checks.Warning(
+        f'Request throttles count in {backend}, which is not shared between processes, '
+        'so every worker and container enforces the rates separately.',
+        hint='Set CACHE_BACKEND and CACHE_LOCATION to a shared cache such as '
+             'django.core.cache.backends.redis.RedisCache.',
+        id='throttling.W001',
+    )]
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """Base class; subclasses set ``kind`` and implement ``get_ident_for``."""
+    kind = None
+    # Keys are short: cache backends check every character of every key.
+    cache_format = 'th:%(scope)s:%(ident)s'
+
+    def __init__(self):
+        # The rate depends on the view's scope, resolved in allow_request().
+        pass
+
+    def get_rate(self):
+        # Read per call, not at import time, so overridden settings apply.
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_ident_for(self, request, view):
+        raise NotImplementedError('.get_ident_for() must be overridden')
+
+    def get_cache_key(self, request, view):
+        ident = self.get_ident_for(request, view)
+        if ident is None:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if scope is None:
+            return True
+        self.scope = f'{scope}.{self.kind}'
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+
+        now = self.timer()
+        window, offset = divmod(now, self.duration)
+        current_key, previous_key = f'{key}:{int(window)}', f'{key}:{int(window) - 1}'
+        counts = self.cache.get_many([current_key, previous_key])
+        current, previous = counts.get(current_key, 0), counts.get(previous_key, 0)
+        overlap = 1 - offset / self.duration
+        if current + previous * overlap >= self.num_requests:
+            self.wait_seconds = self._wait(current, previous, offset)
+            return False
+
+        # Kept for two windows, so the count still weighs in the next one.
+        if current:
+            try:
+                self.cache.incr(current_key)
+                return True
+            except ValueError:
+                # Expired since get_many().
+                pass
+        if not self.cache.add(current_key, 1, self.duration * 2):
+            self.cache.incr(current_key)
+        return True
+
+    def _wait(self, current, previous, offset):
+        remaining = self.duration - offset
+        if current >= self.num_requests or not previous:
+            return remaining
+        # Seconds until the previous window's weight has decayed enough.
+        needed = self.duration * (1 - (self.num_requests - current) / previous) - offset
+        return min(max(needed, 1), remaining)
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class IPRateThrottle(SlidingWindowThrottle):
+    """Limit each client address."""
+    kind = 'ip'
+
+    def get_ident_for(self, request, view):
+        return self.get_ident(request)
+
+
+class EmailRateThrottle(SlidingWindowThrottle):
+    """Limit each email address submitted in the request body, from any client."""
+    kind = 'email'
+
+    def get_ident_for(self, request, view):
+        data = request.data
+        email = data.get('email') if hasattr(data, 'get') else None
+        if not email or not isinstance(email, str):
+            return None
+        return hashlib.md5(email.strip().lower().encode(), usedforsecurity=False).hexdigest()[:16]
+
+
+class RouteRateThrottle(SlidingWindowThrottle):
+    """Limit a route across all clients, capping its total hashing work."""
+    kind = 'route'
+
+    def get_ident_for(self, request, view):
+        match = request.resolver_match
+        return match.view_name if match else type(view).__name__
+
+
+class PublicThrottleMixin:
+    """Throttle an unauthenticated view by client, email and route.
+
+    Set ``throttle_scope`` on the view. Throttles are checked in order and
+    the first refusal ends the check, so requests refused for one client
+    or email do not use up the route's budget for everyone else.
+    """
+    throttle_classes = [IPRateThrottle, EmailRateThrottle, RouteRateThrottle]
+
+    def check_throttles(self, request):
+        for throttle in self.get_throttles():
+            if not throttle.allow_request(request, self):
+                self.throttled(request, throttle.wait())
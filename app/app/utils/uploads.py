@@ -0,0 +1,125 @@
+"""
+Streaming upload handling with bounded memory per request.
+
+``SpoolingUploadHandler`` replaces Django's in-memory handler: every file
+part is written to a temporary file as it arrives, so a request holds at
+most one chunk in memory whatever the upload size, and a request larger
+than ``UPLOAD_MAX_REQUEST_SIZE`` is refused from its Content-Length, or
+as soon as its file parts pass the limit. DRF would report that refusal
+as a 400 parse error, so API views parse multipart bodies with
+``SpoolingMultiPartParser``, which answers 413 instead.
+
+``ImageUploadField`` checks an uploaded image from its header alone.
+Pillow's ``Image.open()`` reads the format and size without decoding a
+pixel, which is all the checks need.
+"""
+from collections import namedtuple
+
+from django.conf import settings
+from django.http.multipartparser import MultiPartParserError
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.utils.translation import gettext_lazy as _
+
+from PIL import Image
+
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException, ParseError
+from rest_framework.parsers import MultiPartParser
+
+
+IMAGE_FORMATS = ('JPEG', 'PNG', 'WEBP', 'GIF')
+
+ImageInfo = namedtuple('ImageInfo', ['format', 'content_type', 'width', 'height'])
+
+
+class UploadTooLarge(MultiPartParserError):
+    pass
+
+
+class RequestTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = _('Request body is too large.')
+    default_code = 'request_too_large'
+
+
+class SpoolingUploadHandler(TemporaryFileUploadHandler):
+    """Stream each uploaded file to disk and cap the bytes of a request."""
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.max_size = settings.UPLOAD_MAX_REQUEST_SIZE
+        self.received = 0
+        if content_length and content_length > self.max_size:
+            raise UploadTooLarge(f'Request body exceeds {self.max_size} bytes.')
+
+    def receive_data_chunk(self, raw_data, start):
+        # Content-Length can be absent or lie; count what actually arrives.
+        self.received += len(raw_data)
+        if self.received > self.max_size:
+            self.upload_interrupted()
+            raise UploadTooLarge(f'Uploaded files exceed {self.max_size} bytes.')
+        self.file.write(raw_data)
+
+
+class SpoolingMultiPartParser(MultiPartParser):
+    """A MultiPartParser that reports a refused upload as 413, not 400."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return super().parse(stream, media_type, parser_context)
+        except ParseError as exc:
+            # DRF raises ParseError while handling the MultiPartParserError.
+            if isinstance(exc.__context__, UploadTooLarge):
+                raise RequestTooLarge(str(exc.__context__)) from exc.__context__
+            raise
+
+
+def sniff_image(file):
+    """Return the ``ImageInfo`` of an image file, read from its header.
+
+    Raise ValueError if the file is not an image in ``IMAGE_FORMATS``. The
+    file is rewound before and after.
+    """
+    file.seek(0)
+    try:
+        with Image.open(file, formats=IMAGE_FORMATS) as image:
+            info = ImageInfo(image.format, Image.MIME[image.format], *image.size)
+    except (OSError, SyntaxError, Image.DecompressionBombError) as exc:
+        raise ValueError('Not a supported image.') from exc
+    finally:
+        file.seek(0)
+    return info
+
+
+class ImageUploadField(serializers.FileField):
+    """A FileField that accepts images checked from their header only.
+
+    Unlike DRF's ImageField, the file is never verified or decoded. The
+    sniffed ``ImageInfo`` is set on the file as ``image_info`` and its
+    ``content_type`` is replaced by the sniffed one.
+    """
+    default_error_messages = {
+        'invalid_image': _('File must be an image.'),
+        'too_large': _('Image file size must be under {max_size} MB.'),
+        'too_small': _('Image dimensions must be at least {width}x{height} px.'),
+    }
+
+    def __init__(self, *, max_size=None, min_dimensions=None, **kwargs):
+        self.max_size = max_size
+        self.min_dimensions = min_dimensions
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        file = super().to_internal_value(data)
+        if self.max_size is not None and file.size > self.max_size:
+            self.fail('too_large', max_size=f'{self.max_size / 2 ** 20:g}')
+        try:
+            info = sniff_image(file)
+        except ValueError:
+            self.fail('invalid_image')
+        if self.min_dimensions is not None:
+            width, height = self.min_dimensions
+            if info.width < width or info.height < height:
+                self.fail('too_small', width=width, height=height)
+        file.image_info = info
+        file.content_type = info.content_type
+        return file
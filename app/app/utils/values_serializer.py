@@ -0,0 +1,101 @@
+"""
+Read-only serialization straight from ``values_list()`` rows.
+"""
+from django.db import models
+from django.db.models.constants import LOOKUP_SEP
+
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+
+def _field_converter(model_field):
+    """Return a callable matching DRF's output for a model field, or None."""
+    if isinstance(model_field, models.DateTimeField):
+        return serializers.DateTimeField().to_representation
+    if isinstance(model_field, models.DateField):
+        return serializers.DateField().to_representation
+    if isinstance(model_field, models.DecimalField):
+        return serializers.DecimalField(
+            max_digits=model_field.max_digits,
+            decimal_places=model_field.decimal_places,
+        ).to_representation
+    if isinstance(model_field, models.FileField):
+        if not api_settings.UPLOADED_FILES_USE_URL:
+            return str
+        # DRF's FileField without a request in context: the storage URL.
+        storage = model_field.storage
+        return lambda name: storage.url(name) if name else None
+    if isinstance(model_field, models.UUIDField):
+        return str
+    return None
+
+
+def _resolve_field(model, column):
+    """Return the model field behind a column, following ``__`` relations."""
+    *relations, name = column.split(LOOKUP_SEP)
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    return model._meta.get_field(name)
+
+
+class ValuesSerializer:
+    """Serialize a queryset to dicts without building model instances.
+
+    ``fields`` lists output keys, or ``(key, column)`` pairs when the key
+    differs from the queryset column. Columns may span relations with
+    ``__``. Column order, output keys and value converters are resolved
+    once per subclass, so per row the work is a ``zip`` plus the
+    converters of the few columns that need one.
+    """
+    model = None
+    fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.model is None:
+            return
+
+        keys, columns = [], []
+        for field in cls.fields:
+            key, column = field if isinstance(field, tuple) else (field, field)
+            keys.append(key)
+            columns.append(column)
+
+        cls.keys = tuple(keys)
+        cls.columns = tuple(columns)
+        cls.converters = tuple(
+            (index, converter)
+            for index, converter in (
+                (index, _field_converter(_resolve_field(cls.model, column)))
+                for index, column in enumerate(columns)
+            )
+            if converter is not None
+        )
+        # Rows can be zipped straight into dicts unless something has to run per row.
+        cls.plain_rows = not cls.converters and cls.to_representation is ValuesSerializer.to_representation
+
+    def __init__(self, rows, many=True):
+        self.rows = rows
+        self.many = many
+
+    @classmethod
+    def values(cls, queryset):
+        """Return the queryset restricted to the serialized columns."""
+        return queryset.values_list(*cls.columns)
+
+    def to_representation(self, row):
+        if self.converters:
+            row = list(row)
+            for index, converter in self.converters:
+                if row[index] is not None:
+                    row[index] = converter(row[index])
+        return dict(zip(self.keys, row))
+
+    @property
+    def data(self):
+        if not self.many:
+            return self.to_representation(self.rows)
+        if self.plain_rows:
+            keys = self.keys
+            return [dict(zip(keys, row)) for row in self.rows]
+        return [self.to_representation(row) for row in self.rows]
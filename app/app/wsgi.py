@@ -5,3 +5,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 application = get_wsgi_application()
+
+if os.environ.get('WSGI_PRELOAD', '1') == '1':
+    # Django imports the URLconf, and every view behind it, on the first
+    # request. Doing it here lets a pre-forking server pay for it once in
+    # the master instead of once per worker.
+    from django.urls import get_resolver
+    get_resolver().url_patterns
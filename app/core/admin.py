@@ -1,20 +1,63 @@
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from django.utils.translation import gettext_lazy as _
+from django.contrib.admin.views.main import ChangeList
+from django.db.models.functions import Now
+from django.utils.text import format_lazy
+from django.utils.translation import gettext_lazy as _, ngettext
 from django.contrib import admin
 
+from app.utils.custom_pagination import EstimatedCountPaginator
+from app.utils.fleet_scope import apply_scope, scope_for
 from core import models
+from user.search import filter_users
+
+
+class UserChangeList(ChangeList):
+    """Load only the columns the user changelist displays."""
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).only(*self.model_admin.list_only)
+
+
+def bulk_update_action(name, description, **values):
+    """Build an admin action applying ``values`` to the selection in one UPDATE."""
+    def action(modeladmin, request, queryset):
+        updated = queryset.update(updated_at=Now(), **values)
+        modeladmin.message_user(request, ngettext(
+            '%(count)d user was updated.', '%(count)d users were updated.', updated,
+        ) % {'count': updated})
+    action.__name__ = name
+    return admin.action(description=description)(action)
 
 
 class UserAdmin(BaseUserAdmin):
     """Define the admin pages for users."""
-    ordering = ['id']
-    list_display = ['email', 'username', 'user_type', 'created_at']
+    # Newest first straight from the primary key index.
+    ordering = ['-id']
+    list_display = ['email', 'username', 'user_type', 'status', 'is_online', 'satisfaction_rate', 'created_at']
+    list_select_related = ['driver_profile']
+    list_only = [
+        'email', 'username', 'user_type', 'status', 'is_online', 'created_at',
+        'driver_profile__rating_sum', 'driver_profile__rating_count',
+    ]
     filter_horizontal = ()
     list_filter = ('user_type', 'is_active', 'is_staff')
+    # Estimated counts, and no second COUNT(*) of the unfiltered table.
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # Any search field shows the box; get_search_results uses the search index.
+    search_fields = ['email']
+    search_help_text = _('Partial email, username, phone or name.')
+    actions = [
+        bulk_update_action('activate_users', _('Activate selected users'), is_active=True),
+        bulk_update_action('deactivate_users', _('Deactivate selected users'), is_active=False),
+    ] + [
+        bulk_update_action(f'set_status_{value}', format_lazy(_('Set status to {}'), label), status=value)
+        for value, label in models.User.StatusUnitChoices.choices
+    ]
 
     fieldsets = (
         (None, {'fields': ('email', 'password')}),
-        (_('Personal Info'), {'fields': ('username', 'user_type')}),
+        (_('Personal Info'), {'fields': ('username', 'user_type', 'fleet')}),
         (
             _('Permissions'),
             {
@@ -44,5 +87,23 @@ class UserAdmin(BaseUserAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        # Staff only see their own fleet, as in the API.
+        return apply_scope(super().get_queryset(request), scope_for(request.user))
+
+    def get_changelist(self, request, **kwargs):
+        return UserChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return filter_users(queryset, search_term), False
+
+    @admin.display(description=_('satisfaction'))
+    def satisfaction_rate(self, obj):
+        profile = getattr(obj, 'driver_profile', None)
+        return profile.satisfaction_rate if profile else None
+
 
 admin.site.register(models.User, UserAdmin)
+admin.site.register(models.Fleet)
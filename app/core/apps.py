@@ -4,3 +4,19 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.core import checks
+        from django.db.models.signals import post_delete, post_init, post_save, pre_save
+
+        from core.models import DriverDocument, User
+        from app.utils.storage import mark_new_files, release_files, release_replaced_files, track_files
+        from app.utils.throttling import check_shared_cache
+
+        checks.register(check_shared_cache, checks.Tags.caches, deploy=True)
+
+        for model in (User, DriverDocument):
+            post_init.connect(track_files, sender=model, dispatch_uid=f'storage_track_{model.__name__}')
+            pre_save.connect(mark_new_files, sender=model, dispatch_uid=f'storage_mark_{model.__name__}')
+            post_save.connect(release_replaced_files, sender=model, dispatch_uid=f'storage_replace_{model.__name__}')
+            post_delete.connect(release_files, sender=model, dispatch_uid=f'storage_release_{model.__name__}')
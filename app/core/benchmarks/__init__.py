@@ -0,0 +1,41 @@
+"""
+Benchmarks run through ``python manage.py benchmark <name>``.
+
+Each module in this package exposes ``run(stdout, **options)`` and an
+optional ``help`` string. Data created by a benchmark is rolled back, or
+deleted when worker threads need to see it committed.
+"""
+import time
+from contextlib import contextmanager
+
+from django.db import transaction
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """Run a block inside a transaction that is always rolled back."""
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
+
+
+def best_of(func, repeat=5):
+    """Return the fastest wall time of ``repeat`` calls, in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def format_us(seconds):
+    """Format a duration in microseconds."""
+    return f'{seconds * 1e6:,.2f} us'
@@ -0,0 +1,92 @@
+"""
+Throughput and latency of driver matching under concurrent requests.
+"""
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+
+from driver.matching import match_driver
+
+
+help = 'Match --size concurrent pickups against a seeded driver pool and check nobody is double-booked.'
+
+CENTRE = (48.8566, 2.3522)
+SPREAD = 0.08
+EMAIL_PREFIX = 'bench-dispatch-'
+
+
+def _seed(drivers, rng):
+    User = get_user_model()
+    now = timezone.now()
+    User.objects.bulk_create(
+        User(
+            email=f'{EMAIL_PREFIX}{i}@example.com',
+            username=f'{EMAIL_PREFIX}{i}',
+            user_type='driver',
+            is_online=True,
+            is_available=True,
+            is_verified_driver=True,
+            service_id=1 + i % 3,
+            latitude=round(CENTRE[0] + rng.uniform(-SPREAD, SPREAD), 6),
+            longitude=round(CENTRE[1] + rng.uniform(-SPREAD, SPREAD), 6),
+            last_location_update_at=now,
+        )
+        for i in range(drivers)
+    )
+
+
+def _percentile(values, fraction):
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def run(stdout, size=2000, concurrency=32, **options):
+    rng = random.Random(0)
+    drivers = max(size // 2, 1)
+    pickups = [
+        (CENTRE[0] + rng.uniform(-SPREAD, SPREAD), CENTRE[1] + rng.uniform(-SPREAD, SPREAD), 1 + i % 3)
+        for i in range(size)
+    ]
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(chunk):
+        driver_ids = []
+        try:
+            for pickup in chunk:
+                start = time.perf_counter()
+                match = match_driver(*pickup)
+                with lock:
+                    latencies.append(time.perf_counter() - start)
+                driver_ids.append(match.driver_id if match else None)
+        finally:
+            connection.close()
+        return driver_ids
+
+    # Worker threads use their own connections, so the pool has to be
+    # committed and is deleted afterwards instead of rolled back.
+    _seed(drivers, rng)
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            chunks = executor.map(worker, [pickups[i::concurrency] for i in range(concurrency)])
+            results = [driver_id for chunk in chunks for driver_id in chunk]
+        elapsed = time.perf_counter() - started
+    finally:
+        get_user_model().objects.filter(email__startswith=EMAIL_PREFIX).delete()
+
+    matched = [driver_id for driver_id in results if driver_id is not None]
+    double_booked = [driver_id for driver_id, count in Counter(matched).items() if count > 1]
+    latencies.sort()
+
+    stdout.write(f'{size} requests, {drivers} drivers, {concurrency} workers')
+    stdout.write(f'  throughput          {size / elapsed:,.0f} matches/s')
+    for label, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99)):
+        stdout.write(f'  {label} latency         {_percentile(latencies, fraction) * 1000:.2f} ms')
+    stdout.write(f'  matched             {len(matched)} ({size - len(matched)} unmatched)')
+    stdout.write(f'  double-booked       {len(double_booked)}')
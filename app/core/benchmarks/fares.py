@@ -0,0 +1,69 @@
+"""
+Per-quote cost of fare estimates for growing batches of routes.
+"""
+import numpy as np
+
+from django.conf import settings
+
+from app.utils.geo import haversine_km
+from core.benchmarks import best_of, format_us, rolled_back
+from core.models import Regions, Tariff
+from ride.fares import estimate_fares, tariff_table
+
+
+help = 'Compare a per-route Python loop with the vectorized fare engine across batch sizes.'
+
+SERVICES = 4
+
+
+def _seed():
+    region = Regions.objects.create(name='Bench', coordinates='48.8566,2.3522')
+    Tariff.objects.bulk_create(
+        Tariff(region=region, service_id=service_id, base_fare=2 + service_id, per_distance=1.2, per_minute=0.3, minimum_fare=7)
+        for service_id in range(1, SERVICES + 1)
+    )
+    return region.id
+
+
+def _loop_estimates(region_id, pickups, dropoffs):
+    """The straightforward version: one Python pass per route and tariff."""
+    table = tariff_table(region_id)
+    tariffs = list(zip(table.base_fare.tolist(), table.per_distance.tolist(), table.per_minute.tolist(), table.minimum_fare.tolist()))
+    quotes = []
+    for (pickup_lat, pickup_lng), (dropoff_lat, dropoff_lng) in zip(pickups, dropoffs):
+        distance = haversine_km(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng) * settings.FARE_ROAD_FACTOR
+        minutes = distance * 60 / settings.FARE_AVERAGE_SPEED_KMH
+        quotes.append([
+            round(max(base + per_distance * distance / table.km_per_unit + per_minute * minutes, minimum), 2)
+            for base, per_distance, per_minute, minimum in tariffs
+        ])
+    return quotes
+
+
+def run(stdout, size=10000, repeat=5, **options):
+    rng = np.random.default_rng(0)
+    with rolled_back():
+        region_id = _seed()
+        tariff_table(region_id)
+
+        stdout.write(f'{SERVICES} services per route, best of {repeat}, time per quote')
+        stdout.write(f'  {"routes":>8}  {"python loop":>14}  {"vectorized":>14}  speedup')
+        batch = 1
+        while batch <= size:
+            pickups = rng.uniform([48.80, 2.25], [48.90, 2.42], size=(batch, 2))
+            dropoffs = rng.uniform([48.80, 2.25], [48.90, 2.42], size=(batch, 2))
+            pickup_list, dropoff_list = pickups.tolist(), dropoffs.tolist()
+
+            np.testing.assert_allclose(
+                estimate_fares(region_id, pickups, dropoffs).fares,
+                _loop_estimates(region_id, pickup_list, dropoff_list),
+                atol=0.01,
+            )
+            loop = best_of(lambda: _loop_estimates(region_id, pickup_list, dropoff_list), repeat)
+            vectorized = best_of(lambda: estimate_fares(region_id, pickups, dropoffs), repeat)
+
+            quotes = batch * SERVICES
+            stdout.write(
+                f'  {batch:>8}  {format_us(loop / quotes):>14}  {format_us(vectorized / quotes):>14}  {loop / vectorized:6.1f}x'
+            )
+            batch *= 10
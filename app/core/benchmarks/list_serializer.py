@@ -0,0 +1,57 @@
+"""
+Per-row cost of the user list serializers.
+"""
+from django.contrib.auth import get_user_model
+
+from core.benchmarks import best_of, format_us, rolled_back
+from core.models import Fleet
+from user.serializers import UserListAllSerializer, UserListAllValuesSerializer
+
+
+help = 'Compare UserListAllSerializer with the values() fast path on one page.'
+
+
+def _seed(size):
+    User = get_user_model()
+    fleets = Fleet.objects.bulk_create(Fleet(name=f'Bench fleet {i}') for i in range(7))
+    User.objects.bulk_create(
+        User(
+            email=f'bench{i}@example.com',
+            username=f'bench{i}',
+            first_name='Bench',
+            last_name=f'User{i}',
+            user_type='staff',
+            status='active',
+            fleet=fleets[i % 7],
+        )
+        for i in range(size)
+    )
+    return User.objects.filter(email__startswith='bench').order_by('-id')
+
+
+def run(stdout, size=100, repeat=5, **options):
+    with rolled_back():
+        queryset = _seed(size)
+
+        instances = list(queryset[:size])
+        rows = list(UserListAllValuesSerializer.values(queryset)[:size])
+        assert UserListAllSerializer(instances, many=True).data == UserListAllValuesSerializer(rows).data
+
+        results = {
+            'model serializer': best_of(
+                lambda: UserListAllSerializer(instances, many=True).data, repeat),
+            'values serializer': best_of(
+                lambda: UserListAllValuesSerializer(rows).data, repeat),
+            'model serializer + fetch': best_of(
+                lambda: UserListAllSerializer(list(queryset[:size]), many=True).data, repeat),
+            'values serializer + fetch': best_of(
+                lambda: UserListAllValuesSerializer(
+                    list(UserListAllValuesSerializer.values(queryset)[:size])
+                ).data, repeat),
+        }
+
+    stdout.write(f'{size} rows, best of {repeat}')
+    for label, seconds in results.items():
+        stdout.write(f'  {label:<28} {format_us(seconds / size)} per row')
+    speedup = results['model serializer'] / results['values serializer']
+    stdout.write(f'  serialization speedup: {speedup:.1f}x')
@@ -0,0 +1,119 @@
+"""
+Storage and range-query cost of delta-encoded driver tracks.
+"""
+import io
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import connection
+from django.contrib.auth import get_user_model
+
+from core.benchmarks import best_of, rolled_back
+from core.models import DriverTrack
+from driver.tracks import chunk_origin, encode_fixes, to_microdegrees, track_points, window_start
+
+
+help = 'Compare bytes per fix and range-query time of track chunks with a row-per-fix table.'
+
+DRIVERS = 20
+INTERVAL = 5
+START = datetime(2024, 5, 1, tzinfo=dt_timezone.utc)
+
+NAIVE_TABLE_SQL = """
+CREATE TEMPORARY TABLE bench_naive_fix (
+    driver_id bigint NOT NULL,
+    recorded_at timestamp with time zone NOT NULL,
+    latitude numeric(9, 6) NOT NULL,
+    longitude numeric(9, 6) NOT NULL
+) ON COMMIT DROP;
+CREATE INDEX ON bench_naive_fix (driver_id, recorded_at);
+"""
+
+
+def _random_walks(size, rng):
+    """Yield ``(driver_id index, seconds, latitude, longitude)`` every INTERVAL seconds."""
+    per_driver = max(size // DRIVERS, 1)
+    for driver in range(DRIVERS):
+        latitude, longitude = 48.8566 + rng.uniform(-0.05, 0.05), 2.3522 + rng.uniform(-0.05, 0.05)
+        for step in range(per_driver):
+            latitude += rng.uniform(-0.0002, 0.0002)
+            longitude += rng.uniform(-0.0002, 0.0002)
+            yield driver, int(START.timestamp()) + step * INTERVAL, round(latitude, 6), round(longitude, 6)
+
+
+def _size(sql, params=None):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchone()[0]
+
+
+def run(stdout, size=50000, repeat=5, **options):
+    User = get_user_model()
+    rng = random.Random(0)
+    with rolled_back():
+        drivers = User.objects.bulk_create(
+            User(email=f'bench-track-{i}@example.com', username=f'bench-track-{i}', user_type='driver')
+            for i in range(DRIVERS)
+        )
+        fixes = list(_random_walks(size, rng))
+
+        with connection.cursor() as cursor:
+            cursor.execute(NAIVE_TABLE_SQL)
+            rows = io.StringIO(''.join(
+                f'{drivers[driver].id}\t{datetime.fromtimestamp(seconds, dt_timezone.utc).isoformat()}\t{latitude}\t{longitude}\n'
+                for driver, seconds, latitude, longitude in fixes
+            ))
+            cursor.copy_expert('COPY bench_naive_fix FROM STDIN', rows)
+
+        windows = defaultdict(list)
+        for driver, seconds, latitude, longitude in fixes:
+            windows[drivers[driver].id, window_start(seconds)].append(
+                (seconds, to_microdegrees(latitude), to_microdegrees(longitude))
+            )
+        DriverTrack.objects.bulk_create(
+            DriverTrack(
+                driver_id=driver_id,
+                window_start=window,
+                fix_count=len(chunk),
+                data=encode_fixes(chunk, chunk_origin(window)),
+                last_timestamp=chunk[-1][0],
+                last_latitude=chunk[-1][1],
+                last_longitude=chunk[-1][2],
+            )
+            for (driver_id, window), chunk in windows.items()
+        )
+
+        driver_ids = [driver.id for driver in drivers]
+        naive_rows = _size('SELECT SUM(pg_column_size(t.*)) FROM bench_naive_fix t')
+        naive_total = _size("SELECT pg_total_relation_size('bench_naive_fix')")
+        track_rows = _size(
+            f'SELECT SUM(pg_column_size(t.*)) FROM {DriverTrack._meta.db_table} t WHERE driver_id = ANY(%s)',
+            [driver_ids],
+        )
+        track_total = _size('SELECT pg_total_relation_size(%s)', [DriverTrack._meta.db_table])
+
+        start, end = START + timedelta(minutes=30), START + timedelta(minutes=90)
+        naive_sql = (
+            'SELECT recorded_at, latitude, longitude FROM bench_naive_fix '
+            'WHERE driver_id = %s AND recorded_at >= %s AND recorded_at < %s ORDER BY recorded_at'
+        )
+
+        def naive_points():
+            with connection.cursor() as cursor:
+                cursor.execute(naive_sql, [driver_ids[0], start, end])
+                return cursor.fetchall()
+
+        naive_query = best_of(naive_points, repeat)
+        track_query = best_of(lambda: list(track_points(driver_ids[0], start, end)), repeat)
+        points = len(naive_points())
+        assert len(list(track_points(driver_ids[0], start, end))) == points
+
+    count = len(fixes)
+    stdout.write(f'{count} fixes from {DRIVERS} drivers every {INTERVAL}s, {len(windows)} chunks')
+    stdout.write(f'  {"":<18} {"row bytes/fix":>14} {"total bytes/fix":>16}')
+    stdout.write(f'  {"row per fix":<18} {naive_rows / count:>14.1f} {naive_total / count:>16.1f}')
+    stdout.write(f'  {"encoded chunks":<18} {track_rows / count:>14.1f} {track_total / count:>16.1f}')
+    stdout.write(f'One hour of one driver ({points} fixes), best of {repeat}:')
+    stdout.write(f'  row per fix        {naive_query * 1000:.2f} ms')
+    stdout.write(f'  encoded chunks     {track_query * 1000:.2f} ms including decoding')
@@ -0,0 +1,126 @@
+"""
+Peak memory of concurrent image uploads, per upload handler and image check.
+
+Each scenario runs in a forked process that resets its peak RSS (Linux
+``/proc/self/clear_refs``) after the request bodies are built, so only
+parsing and checking the uploads is measured.
+"""
+import io
+import json
+import os
+import threading
+
+import numpy as np
+from PIL import Image
+
+from django.conf import settings
+from django.test import RequestFactory, override_settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from rest_framework import serializers
+
+from app.utils.uploads import ImageUploadField
+
+
+help = 'Peak RSS of --concurrency simultaneous uploads of a --size px wide JPEG, by handler and image check.'
+
+DJANGO_HANDLERS = [
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+SPOOLING_HANDLERS = ['app.utils.uploads.SpoolingUploadHandler']
+
+
+def _jpeg(width):
+    pixels = np.random.default_rng(0).integers(0, 256, (width * 3 // 4, width, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def _drf_image_field(upload):
+    serializers.ImageField().to_internal_value(upload)
+
+
+def _full_decode(upload):
+    with Image.open(upload) as image:
+        image.load()
+
+
+def _header_sniff(upload):
+    ImageUploadField().to_internal_value(upload)
+
+
+SCENARIOS = (
+    ('django handlers + DRF ImageField', DJANGO_HANDLERS, _drf_image_field),
+    ('spooled + full decode', SPOOLING_HANDLERS, _full_decode),
+    ('spooled + header sniff', SPOOLING_HANDLERS, _header_sniff),
+)
+
+
+def _status_kib(field):
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith(field):
+                return int(line.split()[1])
+
+
+def _peak_kib(payload, concurrency, handlers, check):
+    """Return the peak RSS growth, in KiB, of parsing and checking the uploads."""
+    factory = RequestFactory()
+    with override_settings(FILE_UPLOAD_HANDLERS=handlers, UPLOAD_MAX_REQUEST_SIZE=len(payload) * 2):
+        requests = [
+            factory.post('/', {'profile_image': SimpleUploadedFile('me.jpg', payload, content_type='image/jpeg')})
+            for _ in range(concurrency)
+        ]
+        barrier = threading.Barrier(concurrency)
+
+        def upload(request):
+            barrier.wait()
+            check(request.FILES['profile_image'])
+            # Hold the parsed file until every upload is in, as a busy server would.
+            barrier.wait()
+
+        threads = [threading.Thread(target=upload, args=(request,)) for request in requests]
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+        baseline = _status_kib('VmRSS:')
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return _status_kib('VmHWM:') - baseline
+
+
+def _in_child(func, *args):
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        code = 0
+        try:
+            os.write(write_fd, json.dumps(func(*args)).encode())
+        except BaseException:
+            code = 1
+        finally:
+            os._exit(code)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as pipe:
+        result = pipe.read()
+    os.waitpid(pid, 0)
+    return json.loads(result) if result else None
+
+
+def run(stdout, size=1600, concurrency=32, **options):
+    payload = _jpeg(size)
+    stdout.write(
+        f'{concurrency} concurrent uploads of a {size}x{size * 3 // 4} JPEG ({len(payload) / 2 ** 20:.1f} MiB), '
+        f'Django buffers files up to {settings.FILE_UPLOAD_MAX_MEMORY_SIZE / 2 ** 20:.1f} MiB in memory'
+    )
+    stdout.write(f'  {"":<34} {"peak RSS growth":>16} {"per upload":>12}')
+    for label, handlers, check in SCENARIOS:
+        peak = _in_child(_peak_kib, payload, concurrency, handlers, check)
+        if peak is None:
+            stdout.write(f'  {label:<34} {"failed":>16}')
+            continue
+        stdout.write(f'  {label:<34} {peak / 1024:>12.1f} MiB {peak / concurrency:>8.0f} KiB')
@@ -0,0 +1,78 @@
+"""
+First-page latency of the admin user search against a naive icontains scan.
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Q
+
+from core.benchmarks import best_of, rolled_back
+from user.search import search_users, trigram_enabled
+
+
+help = 'Compare icontains over five columns with the indexed, ranked user search.'
+
+User = get_user_model()
+
+PAGE = 20
+FIRST_NAMES = ['john', 'jane', 'amina', 'li', 'pedro', 'sofia', 'yuki', 'omar', 'chloe', 'ivan', 'fatou']
+LAST_NAMES = ['martin', 'bernard', 'dubois', 'nguyen', 'garcia', 'kowalski', 'okafor', 'tanaka', 'haddad', 'larsen', 'moreau', 'silva', 'cohen']
+
+SEED_SQL = """
+INSERT INTO core_user (
+    password, is_superuser, email, username, phone_number, first_name, last_name, gender, user_type, status,
+    timezone, is_online, is_available, is_verified_driver, login_type, is_staff, is_active,
+    created_at, updated_at, completed_rides, cancelled_rides
+)
+SELECT '!', false,
+       first || '.' || last || i || '@mail' || i %% 7 || '.test', 'user' || i, '+1555' || lpad(i::text, 7, '0'),
+       initcap(first), initcap(last), 'male', 'rider', 'active',
+       'UTC', false, false, false, 'email', false, true, now(), now(), 0, 0
+FROM generate_series(1, %(size)s) AS i,
+     LATERAL (SELECT (%(first)s::text[])[1 + i %% %(first_count)s] AS first,
+                     (%(last)s::text[])[1 + i %% %(last_count)s] AS last) AS names
+"""
+
+
+def _seed(size):
+    with connection.cursor() as cursor:
+        cursor.execute(SEED_SQL, {
+            'size': size,
+            'first': FIRST_NAMES, 'first_count': len(FIRST_NAMES),
+            'last': LAST_NAMES, 'last_count': len(LAST_NAMES),
+        })
+        cursor.execute('ANALYZE core_user')
+
+
+def _naive(text):
+    condition = Q()
+    for field in ('email', 'username', 'phone_number', 'first_name', 'last_name'):
+        condition |= Q(**{f'{field}__icontains': text})
+    return list(User.objects.filter(condition).order_by('id').values_list('id', flat=True)[:PAGE])
+
+
+def _indexed(text):
+    return list(search_users(User.objects.all(), text).values_list('id', flat=True)[:PAGE])
+
+
+def run(stdout, size=1_000_000, repeat=5, **options):
+    with rolled_back():
+        stdout.write(f'Seeding {size:,} users...')
+        _seed(size)
+        count = User.objects.count()
+        middle = size // 2
+        queries = [
+            ('exact email', f'{FIRST_NAMES[middle % len(FIRST_NAMES)]}.{LAST_NAMES[middle % len(LAST_NAMES)]}{middle}@'),
+            ('phone prefix', f'+1555{middle:07d}'[:9]),
+            ('rare name', 'nobody'),
+            ('common name', 'tanaka'),
+        ]
+
+        mode = 'trigram' if trigram_enabled() else 'full-text'
+        stdout.write(f'{count:,} users, {mode} search, first page of {PAGE}, best of {repeat}')
+        stdout.write(f'  {"query":<14} {"icontains":>12} {"indexed":>12}  speedup')
+        for label, text in queries:
+            naive = best_of(lambda: _naive(text), repeat)
+            indexed = best_of(lambda: _indexed(text), repeat)
+            stdout.write(
+                f'  {label:<14} {naive * 1000:>9.2f} ms {indexed * 1000:>9.2f} ms  {naive / indexed:6.1f}x'
+            )
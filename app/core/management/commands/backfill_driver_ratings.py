@@ -0,0 +1,66 @@
+"""
+Django command to recompute driver rating totals from all ratings.
+"""
+from django.db import connection, transaction
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from core.models import DriverProfile, Rating
+
+
+User = get_user_model()
+
+PROFILES = DriverProfile._meta.db_table
+RATINGS = Rating._meta.db_table
+USERS = User._meta.db_table
+
+# Each statement also touches users.updated_at of the drivers it changed,
+# like rate_ride(), so user list validators see the new satisfaction rates.
+# clock_timestamp() rather than now(): the transaction may have started
+# before a concurrent write that raised MAX(updated_at).
+TOUCH_CHANGED_SQL = f"""
+UPDATE {USERS} SET updated_at = clock_timestamp()
+FROM changed WHERE {USERS}.id = changed.driver_id
+"""
+
+UPSERT_TOTALS_SQL = f"""
+WITH changed AS (
+    INSERT INTO {PROFILES} (driver_id, rating_sum, rating_count, updated_at)
+    SELECT driver_id, SUM(score), COUNT(*), now()
+    FROM {RATINGS}
+    GROUP BY driver_id
+    ON CONFLICT (driver_id) DO UPDATE SET
+        rating_sum = EXCLUDED.rating_sum,
+        rating_count = EXCLUDED.rating_count,
+        updated_at = EXCLUDED.updated_at
+    WHERE ({PROFILES}.rating_sum, {PROFILES}.rating_count)
+        IS DISTINCT FROM (EXCLUDED.rating_sum, EXCLUDED.rating_count)
+    RETURNING driver_id
+)
+{TOUCH_CHANGED_SQL}"""
+
+RESET_UNRATED_SQL = f"""
+WITH changed AS (
+    UPDATE {PROFILES} SET rating_sum = 0, rating_count = 0, updated_at = now()
+    WHERE rating_count <> 0
+    AND NOT EXISTS (SELECT 1 FROM {RATINGS} WHERE {RATINGS}.driver_id = {PROFILES}.driver_id)
+    RETURNING driver_id
+)
+{TOUCH_CHANGED_SQL}"""
+
+
+class Command(BaseCommand):
+    """Django command to backfill driver ratings."""
+    help = 'Rebuild every DriverProfile rating total from the ratings table in one pass.'
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Blocks concurrent rate_ride() upserts so no rating is counted twice.
+            cursor.execute(f'LOCK TABLE {RATINGS} IN SHARE MODE')
+            cursor.execute(UPSERT_TOTALS_SQL)
+            updated = cursor.rowcount
+            cursor.execute(RESET_UNRATED_SQL)
+            reset = cursor.rowcount
+
+        self.stdout.write(self.style.SUCCESS(f'{updated} profiles updated, {reset} reset.'))
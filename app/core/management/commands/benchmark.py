@@ -0,0 +1,40 @@
+"""
+Django command to run a benchmark from core.benchmarks.
+"""
+import pkgutil
+from importlib import import_module
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmarks
+
+
+def available_benchmarks():
+    return sorted(module.name for module in pkgutil.iter_modules(benchmarks.__path__))
+
+
+class Command(BaseCommand):
+    """Django command to run benchmarks."""
+    help = 'Run a benchmark from core.benchmarks against the configured database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', nargs='?', help='Benchmark to run, omit to list them.')
+        parser.add_argument('--size', type=int, default=None, help='Rows or items per run.')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement, best is kept.')
+        parser.add_argument('--concurrency', type=int, default=None, help='Parallel workers, where supported.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        names = available_benchmarks()
+        name = options.pop('name')
+        if name is None:
+            for benchmark in names:
+                module = import_module(f'core.benchmarks.{benchmark}')
+                self.stdout.write(f'{benchmark}: {getattr(module, "help", "")}')
+            return
+        if name not in names:
+            raise CommandError(f'Unknown benchmark {name!r}, choose from: {", ".join(names)}')
+
+        module = import_module(f'core.benchmarks.{name}')
+        options = {key: value for key, value in options.items() if value is not None}
+        module.run(self.stdout, **options)
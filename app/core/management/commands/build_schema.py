@@ -0,0 +1,47 @@
+"""
+Django command to write the OpenAPI schema to a versioned static file.
+"""
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app.utils.schema import render_schema, schema_file_path
+
+
+class Command(BaseCommand):
+    """Django command to prebuild the API schema."""
+    help = 'Generate the OpenAPI schema for APP_VERSION into STATIC_ROOT.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rebuild the schema even if this version was already built.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        path = schema_file_path()
+        if path is None:
+            self.stdout.write(self.style.WARNING(
+                'APP_VERSION is not set, the schema will be generated per request.'
+            ))
+            return
+
+        if path.exists() and not options['force']:
+            self.stdout.write(f'Schema for {settings.APP_VERSION} already built.')
+            return
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        content = render_schema()
+
+        # Write then rename so a worker never serves a partial file.
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(content)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+
+        self.stdout.write(self.style.SUCCESS(f'Schema written to {path}'))
@@ -0,0 +1,43 @@
+"""
+Django command to send queued push notifications.
+"""
+import time
+import traceback
+
+from django.db import close_old_connections
+from django.core.management.base import BaseCommand
+
+from notification.dispatcher import dispatch_batch
+
+
+class Command(BaseCommand):
+    """Django command to run a notification worker."""
+    help = 'Send due notifications from the outbox in batches; run several for more throughput.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Outbox rows claimed per batch.')
+        parser.add_argument('--interval', type=float, default=1, help='Seconds to sleep when nothing is due.')
+        parser.add_argument('--once', action='store_true', help='Drain due rows once, then exit.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        total = 0
+        while True:
+            close_old_connections()
+            try:
+                handled = dispatch_batch(options['batch_size'])
+            except Exception:
+                # E.g. the database went away; claimed rows are sent again once their lease runs out.
+                self.stderr.write(traceback.format_exc())
+                if options['once']:
+                    raise
+                time.sleep(options['interval'])
+                continue
+            total += handled
+            if handled:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'Handled {total} notifications.'))
@@ -0,0 +1,63 @@
+"""
+Django command to create upcoming ride partitions and archive old ones.
+
+Without ``--archive`` it only creates partitions, so it is safe to run on
+every start. Archiving is the scheduled ``ride.archive_partitions`` task
+and refuses to drop anything it has nowhere to copy.
+"""
+from django.conf import settings
+from django.utils import timezone
+from django.core.management.base import BaseCommand, CommandError
+
+from ride.partitions import (
+    add_months,
+    archive_partition,
+    create_partition,
+    existing_partitions,
+    month_start,
+    partition_name,
+)
+
+
+class Command(BaseCommand):
+    """Django command to maintain ride partitions."""
+    help = 'Create monthly ride partitions ahead of time and archive those past retention.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=settings.RIDE_PARTITIONS_AHEAD, help='Future months to create.')
+        parser.add_argument('--retention-months', type=int, default=settings.RIDE_RETENTION_MONTHS, help='Months of rides to keep, 0 keeps everything.')
+        parser.add_argument('--archive', action='store_true', help='Also archive and drop partitions past retention.')
+        parser.add_argument('--archive-dir', default=settings.RIDE_ARCHIVE_DIR, help='Copy expired partitions here before dropping them.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would change.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if options['archive'] and not options['archive_dir']:
+            raise CommandError('Refusing to drop partitions without an archive directory; set RIDE_ARCHIVE_DIR.')
+
+        current = month_start(timezone.now())
+        partitions = existing_partitions()
+        dry_run = options['dry_run']
+
+        for offset in range(options['ahead'] + 1):
+            month = add_months(current, offset)
+            if month in partitions:
+                continue
+            if dry_run:
+                self.stdout.write(f'Would create {partition_name(month)}')
+                continue
+            moved = create_partition(month)
+            self.stdout.write(f'Created {partition_name(month)} ({moved} rows moved from default)')
+
+        if options['archive'] and options['retention_months'] > 0:
+            cutoff = add_months(current, -options['retention_months'])
+            for month, name in sorted(partitions.items()):
+                if month >= cutoff:
+                    continue
+                if dry_run:
+                    self.stdout.write(f'Would archive {name}')
+                    continue
+                path = archive_partition(name, options['archive_dir'])
+                self.stdout.write(f'Archived {name} to {path}')
+
+        self.stdout.write(self.style.SUCCESS('Ride partitions up to date.'))
@@ -0,0 +1,85 @@
+"""
+Django command to profile worker startup and import cost.
+"""
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Runs in a fresh interpreter so nothing is already imported.
+PROBE = """
+import json, time
+start = time.perf_counter()
+import django
+from django.conf import settings
+settings.INSTALLED_APPS
+phases = {'settings': time.perf_counter() - start}
+django.setup()
+phases['apps ready'] = time.perf_counter() - start
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+phases['wsgi application'] = time.perf_counter() - start
+from django.urls import get_resolver
+get_resolver().url_patterns
+phases['urlconf loaded'] = time.perf_counter() - start
+print(json.dumps(phases))
+"""
+
+
+def parse_importtime(stderr):
+    """Yield ``(module, self_us, cumulative_us)`` from ``-X importtime`` output."""
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        yield module.strip(), int(self_us), int(cumulative_us)
+
+
+class Command(BaseCommand):
+    """Django command to profile startup."""
+    help = 'Report per-module import time and app-ready time of a fresh worker.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15, help='Number of modules and packages to list.')
+        parser.add_argument('--lean', action='store_true', help='Profile a LEAN_WORKER=1 worker.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        env = dict(os.environ)
+        env.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+        if options['lean']:
+            env['LEAN_WORKER'] = '1'
+
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROBE],
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+
+        phases = json.loads(result.stdout.strip().splitlines()[-1])
+        modules = list(parse_importtime(result.stderr))
+        packages = defaultdict(int)
+        for module, self_us, _ in modules:
+            packages[module.split('.')[0]] += self_us
+
+        self.stdout.write('Startup phases (cumulative):')
+        for phase, seconds in phases.items():
+            self.stdout.write(f'  {phase:<20} {seconds * 1000:8.1f} ms')
+
+        self.stdout.write(f'\nTop {options["top"]} packages by import time:')
+        for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:options['top']]:
+            self.stdout.write(f'  {package:<40} {self_us / 1000:8.1f} ms')
+
+        self.stdout.write(f'\nTop {options["top"]} modules by self time:')
+        for module, self_us, cumulative_us in sorted(modules, key=lambda item: -item[1])[:options['top']]:
+            self.stdout.write(f'  {module:<50} {self_us / 1000:8.1f} ms  (cumulative {cumulative_us / 1000:.1f} ms)')
+
+        total = sum(self_us for _, self_us, _ in modules)
+        self.stdout.write(f'\n{len(modules)} modules imported in {total / 1000:.1f} ms')
@@ -0,0 +1,19 @@
+"""
+Django command to recount the driver heatmap from the user table.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from driver import heatmap
+
+
+class Command(BaseCommand):
+    """Django command to rebuild heatmap cells."""
+    help = 'Recount online and available drivers per heatmap cell with one GROUP BY over snapped coordinates.'
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        started = time.perf_counter()
+        cells = heatmap.rebuild()
+        self.stdout.write(f'Rebuilt {cells} heatmap cells in {(time.perf_counter() - started) * 1000:.1f} ms.')
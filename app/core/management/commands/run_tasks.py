@@ -0,0 +1,86 @@
+"""
+Django command to run background tasks from the database queue.
+"""
+import multiprocessing
+import signal
+import sys
+import threading
+import traceback
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from taskqueue.scheduler import schedule_due
+from taskqueue.worker import work
+
+
+def _process_worker(*args):
+    # Ctrl-C reaches the whole process group; let the parent stop workers between tasks.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    work(*args)
+
+
+def _scheduler(stop, interval):
+    """Queue recurring tasks every ``interval`` seconds until ``stop`` is set."""
+    try:
+        while not stop.is_set():
+            close_old_connections()
+            try:
+                schedule_due()
+            except Exception:
+                # E.g. the database went away; try again on the next tick.
+                traceback.print_exc(file=sys.stderr)
+            stop.wait(interval)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    """Django command to run a task worker pool."""
+    help = 'Run queued tasks with a pool of threads or processes; run several for more throughput.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queue', action='append', dest='queues', help='Queue to consume; repeat for several. Defaults to "default".')
+        parser.add_argument('--concurrency', type=int, default=4, help='Workers in the pool.')
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread', help='Threads for I/O-bound tasks, processes for CPU-bound ones.')
+        parser.add_argument('--batch-size', type=int, default=1, help='Tasks claimed per worker at a time.')
+        parser.add_argument('--interval', type=float, default=1, help='Seconds to sleep when nothing is due.')
+        parser.add_argument('--once', action='store_true', help='Run due tasks until none are left, then exit.')
+        parser.add_argument('--no-schedule', action='store_true', help='Do not queue the recurring tasks of TASK_SCHEDULE.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        queues = tuple(options['queues'] or ['default'])
+        if options['once'] and not options['no_schedule']:
+            # Due recurring tasks are part of what a drain runs.
+            schedule_due()
+        if options['pool'] == 'process':
+            context = multiprocessing.get_context('fork')
+            stop, worker_class, target = context.Event(), context.Process, _process_worker
+            # Forked workers must not share the parent's database socket.
+            connections.close_all()
+        else:
+            stop, worker_class, target = threading.Event(), threading.Thread, work
+
+        worker_args = (stop, options['batch_size'], queues, options['interval'], options['once'])
+        workers = [worker_class(target=target, args=worker_args) for _ in range(options['concurrency'])]
+        self.stdout.write(f'Running {len(workers)} {options["pool"]} workers on {", ".join(queues)}.')
+        for worker in workers:
+            worker.start()
+        scheduler = None
+        if not options['once'] and not options['no_schedule']:
+            scheduler = threading.Thread(target=_scheduler, args=(stop, settings.TASK_SCHEDULER_INTERVAL), daemon=True)
+            scheduler.start()
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping after the running tasks.')
+            stop.set()
+            for worker in workers:
+                worker.join()
+        stop.set()
+        if scheduler is not None:
+            scheduler.join()
+        self.stdout.write(self.style.SUCCESS('Workers stopped.'))
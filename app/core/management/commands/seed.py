@@ -0,0 +1,82 @@
+"""
+Django command to fill the database with synthetic data for scale testing.
+"""
+import multiprocessing
+import os
+import time
+from functools import partial
+
+from django.db import connections
+from django.core.management.base import BaseCommand, CommandError
+
+from core import seeding
+
+
+def _load_chunk_process(plan, number):
+    try:
+        return seeding.load_chunk(plan, number)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    """Django command to seed synthetic data."""
+    help = 'Generate users, details, wallets, driver documents, regions and SOS contacts deterministically from --seed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000, help='Riders and drivers to create.')
+        parser.add_argument('--seed', type=int, default=0, help='Same seed, same rows.')
+        parser.add_argument('--regions', type=int, default=len(seeding.CITIES), help='Regions to create; cities first, then their districts.')
+        parser.add_argument('--sos-per-region', type=int, default=3, help=f'SOS contacts per region, at most {len(seeding.SOS_LINES)}.')
+        parser.add_argument('--fleets', type=int, default=20, help='Fleets to spread users over.')
+        parser.add_argument('--driver-share', type=float, default=0.2, help='Share of users who are drivers.')
+        parser.add_argument('--online-share', type=float, default=0.3, help='Share of drivers who are online.')
+        parser.add_argument('--chunk-size', type=int, default=20000, help='Users per COPY transaction; part of what --seed reproduces.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Processes loading chunks in parallel.')
+        parser.add_argument('--password', default='password', help='Password of every seeded user.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if options['regions'] < 1:
+            raise CommandError('At least one region is needed to place users.')
+        started = time.perf_counter()
+        regions, fleet_ids, document_ids = seeding.create_reference_data(
+            options['seed'], options['regions'], options['fleets'], options['sos_per_region'],
+        )
+        plan = seeding.build_plan(
+            options['seed'], options['users'], options['chunk_size'], regions, fleet_ids, document_ids,
+            options['password'], driver_share=options['driver_share'], online_share=options['online_share'],
+        )
+        self.stdout.write(
+            f'{len(regions)} regions, {len(fleet_ids)} fleets; loading {plan.users} users from id '
+            f'{plan.user_start} in {plan.chunks} chunks with {options["workers"]} workers.'
+        )
+
+        totals = {}
+        online = []
+        if options['workers'] > 1:
+            # Forked workers must not share the parent's database socket.
+            connections.close_all()
+            with multiprocessing.get_context('fork').Pool(options['workers']) as pool:
+                results = pool.imap_unordered(partial(_load_chunk_process, plan), range(plan.chunks))
+                self._collect(results, plan, totals, online, started)
+        else:
+            results = (seeding.load_chunk(plan, number) for number in range(plan.chunks))
+            self._collect(results, plan, totals, online, started)
+
+        seeding.finish(online)
+        elapsed = time.perf_counter() - started
+        summary = ', '.join(f'{count} {model.__name__}' for model, count in totals.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {summary}; {len(online)} drivers online in {elapsed:.1f} s '
+            f'({plan.users / elapsed:,.0f} users/s).'
+        ))
+
+    def _collect(self, results, plan, totals, online, started):
+        for done, (counts, chunk_online) in enumerate(results, 1):
+            for model, count in counts.items():
+                totals[model] = totals.get(model, 0) + count
+            online.extend(chunk_online)
+            self.stdout.write(
+                f'  chunk {done}/{plan.chunks}: {totals[seeding.User]} users, {time.perf_counter() - started:.1f} s'
+            )
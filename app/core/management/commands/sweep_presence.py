@@ -0,0 +1,29 @@
+"""
+Django command to mark drivers offline when their location reports stop.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from driver.presence import sweep_stale_drivers
+
+
+class Command(BaseCommand):
+    """Django command to sweep stale driver presence."""
+    help = 'Flip online drivers with no recent location report to offline, in indexed bulk updates.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age', type=int, default=settings.PRESENCE_TIMEOUT_SECONDS, help='Seconds without a report before a driver is offline.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Drivers updated per statement.')
+        parser.add_argument('--interval', type=float, default=30, help='Seconds between sweeps.')
+        parser.add_argument('--once', action='store_true', help='Sweep once, then exit.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        while True:
+            swept, elapsed = sweep_stale_drivers(options['max_age'], options['batch_size'])
+            self.stdout.write(f'Swept {swept} drivers in {elapsed * 1000:.1f} ms.')
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -1,27 +1,92 @@
 """
 Django command to wait for the database to be available.
 """
+import random
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from psycopg2 import OperationalError as PypsycopgError
 
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+
+
+def probe_database(alias):
+    """Open a connection and run a trivial query, skipping system checks."""
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    finally:
+        connection.close()
+
+
+def probe_cache(alias):
+    """Round-trip one key through the cache backend."""
+    cache = caches[alias]
+    try:
+        cache.get('wait_for_db')
+    finally:
+        cache.close()
+
+
+def backoff_delays(initial, maximum):
+    """Yield exponentially growing delays with jitter, capped at ``maximum``."""
+    delay = initial
+    while True:
+        yield random.uniform(delay / 2, delay)
+        delay = min(delay * 2, maximum)
 
 
 class Command(BaseCommand):
     """Django command to wait for database."""
 
+    def add_arguments(self, parser):
+        parser.add_argument('--timeout', type=float, default=60, help='Seconds to wait before failing.')
+        parser.add_argument('--initial-delay', type=float, default=0.1, help='First retry delay in seconds.')
+        parser.add_argument('--max-delay', type=float, default=2, help='Upper bound for a retry delay in seconds.')
+        parser.add_argument('--skip-caches', action='store_true', help='Only wait for the databases.')
+
+    def wait_for(self, probe, alias, label, errors, deadline, options):
+        """Retry ``probe`` until it passes and return the seconds it took."""
+        start = time.monotonic()
+        delays = backoff_delays(options['initial_delay'], options['max_delay'])
+        while True:
+            try:
+                probe(alias)
+                return time.monotonic() - start
+            except errors as exc:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(f'{label} unavailable after {options["timeout"]}s: {exc}')
+                delay = min(next(delays), remaining)
+                self.stdout.write(f'{label} unavailable, waiting {delay:.2f} seconds...')
+                time.sleep(delay)
+
     def handle(self, *args, **options):
         """Entrypoint for command."""
         self.stdout.write('Waiting for database...')
-        db_up = False
-        while db_up is False:
-            try:
-                self.check(databases=['default'])
-                db_up = True
-            except (PypsycopgError, OperationalError):
-                self.stdout.write('Database unavailable, waiting 1 second...')
-                time.sleep(1)
+        deadline = time.monotonic() + options['timeout']
+
+        checks = [
+            (probe_database, f'database {alias}', alias, (PypsycopgError, OperationalError))
+            for alias in settings.DATABASES
+        ]
+        if not options['skip_caches']:
+            checks += [
+                (probe_cache, f'cache {alias}', alias, Exception)
+                for alias in settings.CACHES
+            ]
+
+        with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+            futures = {
+                label: executor.submit(self.wait_for, probe, alias, label, errors, deadline, options)
+                for probe, label, alias, errors in checks
+            }
+            for label, future in futures.items():
+                self.stdout.write(f'{label} ready in {future.result():.2f}s')
 
         self.stdout.write(self.style.SUCCESS('Database available!'))
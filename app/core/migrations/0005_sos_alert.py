@@ -0,0 +1,62 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:43
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_notification_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SosAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('latitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='latitude')),
+                ('longitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='longitude')),
+                ('contacts_notified', models.PositiveIntegerField(default=0, verbose_name='contacts notified')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+            ],
+            options={
+                'verbose_name': 'sos alert',
+                'verbose_name_plural': 'sos alerts',
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='notificationoutbox',
+            name='outbox_pending_due_idx',
+        ),
+        migrations.AddField(
+            model_name='notificationoutbox',
+            name='priority',
+            field=models.SmallIntegerField(default=0, verbose_name='priority'),
+        ),
+        migrations.AlterField(
+            model_name='notificationoutbox',
+            name='provider',
+            field=models.CharField(choices=[('fcm', 'Firebase Cloud Messaging'), ('onesignal', 'OneSignal'), ('sms', 'SMS')], max_length=20, verbose_name='provider'),
+        ),
+        migrations.AlterField(
+            model_name='notificationoutbox',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='user_notifications', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='notificationoutbox',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['-priority', 'next_attempt_at'], name='outbox_pending_due_idx'),
+        ),
+        migrations.AddField(
+            model_name='sosalert',
+            name='region',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='region_sos_alerts', to='core.regions'),
+        ),
+        migrations.AddField(
+            model_name='sosalert',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_sos_alerts', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
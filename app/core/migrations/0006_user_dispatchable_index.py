@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_sos_alert'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_available', True), ('is_online', True), ('is_verified_driver', True), ('user_type', 'driver')), fields=['service_id', 'latitude', 'longitude'], name='user_dispatchable_idx'),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+CREATE_RIDE_SQL = """
+CREATE TABLE "core_ride" (
+    "id" bigint GENERATED BY DEFAULT AS IDENTITY,
+    "service_id" bigint NULL CHECK ("service_id" >= 0),
+    "status" varchar(20) NOT NULL,
+    "pickup_latitude" numeric(9, 6) NOT NULL,
+    "pickup_longitude" numeric(9, 6) NOT NULL,
+    "dropoff_latitude" numeric(9, 6) NULL,
+    "dropoff_longitude" numeric(9, 6) NULL,
+    "fare" numeric(10, 2) NULL,
+    "created_at" timestamp with time zone NOT NULL,
+    "completed_at" timestamp with time zone NULL,
+    "cancelled_at" timestamp with time zone NULL,
+    "updated_at" timestamp with time zone NOT NULL,
+    "driver_id" bigint NULL REFERENCES "core_user" ("id") DEFERRABLE INITIALLY DEFERRED,
+    "rider_id" bigint NOT NULL REFERENCES "core_user" ("id") DEFERRABLE INITIALLY DEFERRED,
+    PRIMARY KEY ("id", "created_at")
+) PARTITION BY RANGE ("created_at");
+CREATE TABLE "core_ride_default" PARTITION OF "core_ride" DEFAULT;
+CREATE INDEX "ride_rider_status_idx" ON "core_ride" ("rider_id", "status");
+CREATE INDEX "ride_driver_status_idx" ON "core_ride" ("driver_id", "status");
+"""
+
+DROP_RIDE_SQL = 'DROP TABLE "core_ride";'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_user_dispatchable_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='cancelled_rides',
+            field=models.PositiveIntegerField(default=0, verbose_name='cancelled rides'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='completed_rides',
+            field=models.PositiveIntegerField(default=0, verbose_name='completed rides'),
+        ),
+        migrations.SeparateDatabaseAndState(
+            # Postgres needs the partition key in the primary key, which the
+            # model cannot express, so the table is created by hand.
+            database_operations=[
+                migrations.RunSQL(CREATE_RIDE_SQL, DROP_RIDE_SQL),
+            ],
+            state_operations=[
+                migrations.CreateModel(
+                    name='Ride',
+                    fields=[
+                        ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                        ('service_id', models.PositiveBigIntegerField(blank=True, null=True, verbose_name='service id')),
+                        ('status', models.CharField(choices=[('requested', 'Requested'), ('accepted', 'Accepted'), ('in_progress', 'In progress'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], default='requested', max_length=20, verbose_name='status')),
+                        ('pickup_latitude', models.DecimalField(decimal_places=6, max_digits=9, verbose_name='pickup latitude')),
+                        ('pickup_longitude', models.DecimalField(decimal_places=6, max_digits=9, verbose_name='pickup longitude')),
+                        ('dropoff_latitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='dropoff latitude')),
+                        ('dropoff_longitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='dropoff longitude')),
+                        ('fare', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='fare')),
+                        ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='created at')),
+                        ('completed_at', models.DateTimeField(blank=True, null=True, verbose_name='completed at')),
+                        ('cancelled_at', models.DateTimeField(blank=True, null=True, verbose_name='cancelled at')),
+                        ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+                        ('driver', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='driver_rides', to=settings.AUTH_USER_MODEL)),
+                        ('rider', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='rides', to=settings.AUTH_USER_MODEL)),
+                    ],
+                    options={
+                        'verbose_name': 'ride',
+                        'verbose_name_plural': 'rides',
+                        'indexes': [models.Index(fields=['rider', 'status'], name='ride_rider_status_idx'), models.Index(fields=['driver', 'status'], name='ride_driver_status_idx')],
+                    },
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:52
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_ride'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DriverProfile',
+            fields=[
+                ('driver', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='driver_profile', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('rating_sum', models.PositiveBigIntegerField(default=0, verbose_name='rating sum')),
+                ('rating_count', models.PositiveIntegerField(default=0, verbose_name='rating count')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+            ],
+            options={
+                'verbose_name': 'driver profile',
+                'verbose_name_plural': 'driver profiles',
+            },
+        ),
+        migrations.CreateModel(
+            name='Rating',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ride_id', models.BigIntegerField(verbose_name='ride id')),
+                ('score', models.PositiveSmallIntegerField(verbose_name='score')),
+                ('comment', models.TextField(blank=True, verbose_name='comment')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('driver', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='received_ratings', to=settings.AUTH_USER_MODEL)),
+                ('rider', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='given_ratings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'rating',
+                'verbose_name_plural': 'ratings',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='rating',
+            constraint=models.UniqueConstraint(fields=('ride_id', 'rider'), name='rating_one_per_ride_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='rating',
+            constraint=models.CheckConstraint(check=models.Q(('score__gte', 1), ('score__lte', 5)), name='rating_score_range'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_driver_rating'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tariff',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('service_id', models.PositiveBigIntegerField(verbose_name='service id')),
+                ('base_fare', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='base fare')),
+                ('per_distance', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='per distance')),
+                ('per_minute', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='per minute')),
+                ('minimum_fare', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='minimum fare')),
+                ('currency', models.CharField(default='USD', max_length=10, verbose_name='currency')),
+                ('is_active', models.BooleanField(default=True, verbose_name='is active')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+                ('region', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='region_tariffs', to='core.regions')),
+            ],
+            options={
+                'verbose_name': 'tariff',
+                'verbose_name_plural': 'tariffs',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='tariff',
+            constraint=models.UniqueConstraint(fields=('region', 'service_id'), name='tariff_region_service_uniq'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:58
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_tariff'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DriverTrack',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window_start', models.DateTimeField(verbose_name='window start')),
+                ('fix_count', models.PositiveIntegerField(default=0, verbose_name='fix count')),
+                ('data', models.BinaryField(default=bytes, verbose_name='data')),
+                ('last_timestamp', models.BigIntegerField(verbose_name='last timestamp')),
+                ('last_latitude', models.IntegerField(verbose_name='last latitude')),
+                ('last_longitude', models.IntegerField(verbose_name='last longitude')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+                ('driver', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='driver_tracks', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'driver track',
+                'verbose_name_plural': 'driver tracks',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='drivertrack',
+            constraint=models.UniqueConstraint(fields=('driver', 'window_start'), name='track_driver_window_uniq'),
+        ),
+    ]
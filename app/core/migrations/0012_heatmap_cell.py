@@ -0,0 +1,118 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:05
+
+from django.db import migrations, models
+
+
+# Cell size 0.01 degrees, HeatmapCell.CELL_DEGREES.
+HEATMAP_TRIGGER_SQL = """
+CREATE FUNCTION core_heatmap_add(lat integer, lng integer, online_delta integer, available_delta integer)
+RETURNS void AS $$
+    INSERT INTO core_heatmapcell (cell_lat, cell_lng, online, available, updated_at)
+    VALUES (lat, lng, online_delta, available_delta, now())
+    ON CONFLICT (cell_lat, cell_lng) DO UPDATE SET
+        online = core_heatmapcell.online + EXCLUDED.online,
+        available = core_heatmapcell.available + EXCLUDED.available,
+        updated_at = EXCLUDED.updated_at;
+$$ LANGUAGE sql;
+
+CREATE FUNCTION core_user_heatmap() RETURNS trigger AS $$
+DECLARE
+    old_counted boolean := TG_OP <> 'INSERT' AND COALESCE(
+        OLD.user_type = 'driver' AND OLD.is_online AND OLD.latitude IS NOT NULL AND OLD.longitude IS NOT NULL, false);
+    new_counted boolean := TG_OP <> 'DELETE' AND COALESCE(
+        NEW.user_type = 'driver' AND NEW.is_online AND NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL, false);
+    old_lat integer;
+    old_lng integer;
+    new_lat integer;
+    new_lng integer;
+BEGIN
+    IF old_counted THEN
+        old_lat := floor(OLD.latitude / 0.01);
+        old_lng := floor(OLD.longitude / 0.01);
+    END IF;
+    IF new_counted THEN
+        new_lat := floor(NEW.latitude / 0.01);
+        new_lng := floor(NEW.longitude / 0.01);
+    END IF;
+
+    IF old_counted AND new_counted AND old_lat = new_lat AND old_lng = new_lng THEN
+        IF OLD.is_available IS DISTINCT FROM NEW.is_available THEN
+            PERFORM core_heatmap_add(new_lat, new_lng, 0, NEW.is_available::integer - OLD.is_available::integer);
+        END IF;
+        RETURN NULL;
+    END IF;
+
+    -- Touch the two cells in a fixed order so concurrent moves cannot deadlock.
+    IF old_counted AND (NOT new_counted OR (old_lat, old_lng) < (new_lat, new_lng)) THEN
+        PERFORM core_heatmap_add(old_lat, old_lng, -1, -OLD.is_available::integer);
+        old_counted := false;
+    END IF;
+    IF new_counted THEN
+        PERFORM core_heatmap_add(new_lat, new_lng, 1, NEW.is_available::integer);
+    END IF;
+    IF old_counted THEN
+        PERFORM core_heatmap_add(old_lat, old_lng, -1, -OLD.is_available::integer);
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_user_heatmap_insert_delete
+AFTER INSERT OR DELETE ON core_user
+FOR EACH ROW EXECUTE FUNCTION core_user_heatmap();
+
+-- Location reports inside the same cell skip the function entirely.
+CREATE TRIGGER core_user_heatmap_update
+AFTER UPDATE OF latitude, longitude, is_online, is_available, user_type ON core_user
+FOR EACH ROW WHEN (
+    floor(OLD.latitude / 0.01) IS DISTINCT FROM floor(NEW.latitude / 0.01)
+    OR floor(OLD.longitude / 0.01) IS DISTINCT FROM floor(NEW.longitude / 0.01)
+    OR OLD.is_online IS DISTINCT FROM NEW.is_online
+    OR OLD.is_available IS DISTINCT FROM NEW.is_available
+    OR OLD.user_type IS DISTINCT FROM NEW.user_type
+)
+EXECUTE FUNCTION core_user_heatmap();
+
+INSERT INTO core_heatmapcell (cell_lat, cell_lng, online, available, updated_at)
+SELECT floor(latitude / 0.01), floor(longitude / 0.01), COUNT(*), COUNT(*) FILTER (WHERE is_available), now()
+FROM core_user
+WHERE user_type = 'driver' AND is_online AND latitude IS NOT NULL AND longitude IS NOT NULL
+GROUP BY 1, 2;
+"""
+
+DROP_HEATMAP_TRIGGER_SQL = """
+DROP TRIGGER core_user_heatmap_update ON core_user;
+DROP TRIGGER core_user_heatmap_insert_delete ON core_user;
+DROP FUNCTION core_user_heatmap();
+DROP FUNCTION core_heatmap_add(integer, integer, integer, integer);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_user_online_seen_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeatmapCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cell_lat', models.IntegerField(verbose_name='cell latitude')),
+                ('cell_lng', models.IntegerField(verbose_name='cell longitude')),
+                ('online', models.IntegerField(default=0, verbose_name='online')),
+                ('available', models.IntegerField(default=0, verbose_name='available')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+            ],
+            options={
+                'verbose_name': 'heatmap cell',
+                'verbose_name_plural': 'heatmap cells',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='heatmapcell',
+            constraint=models.UniqueConstraint(fields=('cell_lat', 'cell_lng'), name='heatmap_cell_uniq'),
+        ),
+        migrations.RunSQL(HEATMAP_TRIGGER_SQL, DROP_HEATMAP_TRIGGER_SQL),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+
+# Keep in step with user.search.SEARCH_TEXT_SQL.
+SEARCH_TEXT_SQL = (
+    "lower(coalesce(email, '') || ' ' || coalesce(username, '') || ' ' || coalesce(phone_number, '')"
+    " || ' ' || coalesce(first_name, '') || ' ' || coalesce(last_name, ''))"
+)
+SEARCH_VECTOR_SQL = f"to_tsvector('simple', translate({SEARCH_TEXT_SQL}, '@.+-_()', '       '))"
+
+
+def create_trigram_index(apps, schema_editor):
+    """Add the substring index where the server ships pg_trgm."""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(f'CREATE INDEX user_search_trgm_idx ON core_user USING gin (({SEARCH_TEXT_SQL}) gin_trgm_ops)')
+
+
+def drop_trigram_index(apps, schema_editor):
+    schema_editor.execute('DROP INDEX IF EXISTS user_search_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_heatmap_cell'),
+    ]
+
+    operations = [
+        # Stored rather than an expression index: ranking reads the vector
+        # of every match, and re-parsing the text per row dominated.
+        migrations.RunSQL(
+            f'ALTER TABLE core_user ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({SEARCH_VECTOR_SQL}) STORED;'
+            ' CREATE INDEX user_search_fts_idx ON core_user USING gin (search_vector)',
+            'ALTER TABLE core_user DROP COLUMN search_vector',
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:21
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_user_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Task',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('queue', models.CharField(default='default', max_length=50, verbose_name='queue')),
+                ('name', models.CharField(max_length=200, verbose_name='name')),
+                ('args', models.JSONField(blank=True, default=list, verbose_name='args')),
+                ('kwargs', models.JSONField(blank=True, default=dict, verbose_name='kwargs')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='pending', max_length=10, verbose_name='status')),
+                ('priority', models.SmallIntegerField(default=0, verbose_name='priority')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='attempts')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=5, verbose_name='max attempts')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='run at')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='locked at')),
+                ('last_error', models.TextField(blank=True, null=True, verbose_name='last error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='finished at')),
+            ],
+            options={
+                'verbose_name': 'task',
+                'verbose_name_plural': 'tasks',
+                'indexes': [models.Index(condition=models.Q(('status', 'pending')), fields=['queue', '-priority', 'run_at'], name='task_pending_due_idx'), models.Index(condition=models.Q(('status', 'running')), fields=['locked_at'], name='task_running_lock_idx')],
+            },
+        ),
+    ]
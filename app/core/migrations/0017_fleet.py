@@ -0,0 +1,69 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_media_blob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Fleet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='name')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+            ],
+            options={
+                'verbose_name': 'fleet',
+                'verbose_name_plural': 'fleets',
+            },
+        ),
+        # Every fleet id already in use becomes a fleet, so the foreign key
+        # below holds for existing rows.
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO core_fleet (id, name, created_at)
+                SELECT DISTINCT fleet_id, 'Fleet ' || fleet_id, now() FROM core_user WHERE fleet_id IS NOT NULL;
+                SELECT setval(pg_get_serial_sequence('core_fleet', 'id'), coalesce(max(id), 1), max(id) IS NOT NULL)
+                FROM core_fleet;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        # The column keeps its name and values; only its check constraint
+        # gives way to the foreign key.
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    sql="""
+                        ALTER TABLE core_user DROP CONSTRAINT core_user_fleet_id_check;
+                        ALTER TABLE core_user ADD CONSTRAINT core_user_fleet_id_907a4470_fk_core_fleet_id
+                            FOREIGN KEY (fleet_id) REFERENCES core_fleet (id) DEFERRABLE INITIALLY DEFERRED;
+                    """,
+                    reverse_sql="""
+                        ALTER TABLE core_user DROP CONSTRAINT core_user_fleet_id_907a4470_fk_core_fleet_id;
+                        ALTER TABLE core_user ADD CONSTRAINT core_user_fleet_id_check CHECK (fleet_id >= 0);
+                    """,
+                ),
+            ],
+            state_operations=[
+                migrations.RemoveField(
+                    model_name='user',
+                    name='fleet_id',
+                ),
+                migrations.AddField(
+                    model_name='user',
+                    name='fleet',
+                    field=models.ForeignKey(blank=True, db_column='fleet_id', db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='users', to='core.fleet', verbose_name='fleet'),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('fleet__isnull', False)), fields=['fleet', 'user_type', '-id'], name='user_fleet_type_idx'),
+        ),
+    ]
@@ -1,9 +1,9 @@
 import os
-import uuid
 
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.models import (
     AbstractBaseUser,
@@ -11,6 +11,8 @@ from django.contrib.auth.models import (
     PermissionsMixin
 )
 
+from app.utils.fleet_scope import FleetScopedManager
+
 
 def image_file_path(instance, filename):
     if isinstance(instance, User):
@@ -18,13 +20,14 @@ def image_file_path(instance, filename):
     else:
         prefix = 'document'
 
+    # The default storage names the file after its content hash; only the
+    # directory and extension are kept.
     ext = os.path.splitext(filename)[1]
-    filename = f'{uuid.uuid4()}{ext}'
-
-    return os.path.join('uploads', prefix, filename)
+    return os.path.join('uploads', prefix, f'upload{ext}')
 
 
-class UserManager(BaseUserManager):
+class UserManager(FleetScopedManager, BaseUserManager):
+    """Users of the current fleet scope; see app.utils.fleet_scope."""
 
     def create_user(self, email, password=None, **extra_fields):
         if not email:
@@ -47,6 +50,19 @@ class UserManager(BaseUserManager):
         return self.create_user(email, password, **extra_fields)
 
 
+class Fleet(models.Model):
+    """A group of drivers and riders managed by its own staff users."""
+    name = models.CharField(_('name'), max_length=100)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('fleet')
+        verbose_name_plural = _('fleets')
+
+    def __str__(self):
+        return self.name
+
+
 class User(AbstractBaseUser, PermissionsMixin):
 
     class UserTypeChoices(models.TextChoices):
@@ -102,10 +118,22 @@ class User(AbstractBaseUser, PermissionsMixin):
     longitude = models.DecimalField(_('longitude'), max_digits=9, decimal_places=6, blank=True, null=True)
     last_location_update_at = models.DateTimeField(_('last location update'), auto_now_add=True, null=True, blank=True)
 
-    fleet_id = models.PositiveBigIntegerField(_('fleet id'), blank=True, null=True)
+    # Indexed by user_fleet_type_idx, which leads with fleet_id.
+    fleet = models.ForeignKey(
+        Fleet, on_delete=models.SET_NULL, related_name='users', blank=True, null=True,
+        db_column='fleet_id', db_index=False, verbose_name=_('fleet'),
+    )
     player_id = models.CharField(_('player id'), max_length=255, blank=True, null=True)
     service_id = models.PositiveBigIntegerField(_('service id'), blank=True, null=True)
 
+    # Lifetime totals kept in step with Ride status changes, so listings never
+    # count ride history.
+    completed_rides = models.PositiveIntegerField(_('completed rides'), default=0)
+    cancelled_rides = models.PositiveIntegerField(_('cancelled rides'), default=0)
+
+    # core_user also has a generated ``search_vector`` column for the admin
+    # user search; it is added by migration 0013, not declared here.
+
     is_staff = models.BooleanField(_('staff'), default=False)
     is_active = models.BooleanField(_('active'), default=True)
 
@@ -120,6 +148,33 @@ class User(AbstractBaseUser, PermissionsMixin):
     class Meta:
         verbose_name = _('user')
         verbose_name_plural = _('users')
+        indexes = [
+            # Candidate lookup for dispatch: bounding box per service among
+            # drivers who can take a ride right now.
+            models.Index(
+                fields=['service_id', 'latitude', 'longitude'],
+                name='user_dispatchable_idx',
+                condition=models.Q(
+                    user_type='driver',
+                    is_online=True,
+                    is_available=True,
+                    is_verified_driver=True,
+                ),
+            ),
+            # Lets the presence sweeper find online users gone quiet.
+            models.Index(
+                fields=['last_location_update_at'],
+                name='user_online_seen_idx',
+                condition=models.Q(is_online=True),
+            ),
+            # Fleet-scoped staff lists: one fleet's users of a type, newest
+            # first. Users without a fleet are never looked up by fleet.
+            models.Index(
+                fields=['fleet', 'user_type', '-id'],
+                name='user_fleet_type_idx',
+                condition=models.Q(fleet__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         return self.email
@@ -277,6 +332,30 @@ class Regions(models.Model):
         return self.name
 
 
+class Tariff(models.Model):
+    region = models.ForeignKey(Regions, on_delete=models.CASCADE, related_name='region_tariffs')
+    service_id = models.PositiveBigIntegerField(_('service id'))
+    base_fare = models.DecimalField(_('base fare'), max_digits=10, decimal_places=2, default=0)
+    # Per km or per mile, following the region's distance unit.
+    per_distance = models.DecimalField(_('per distance'), max_digits=10, decimal_places=2, default=0)
+    per_minute = models.DecimalField(_('per minute'), max_digits=10, decimal_places=2, default=0)
+    minimum_fare = models.DecimalField(_('minimum fare'), max_digits=10, decimal_places=2, default=0)
+    currency = models.CharField(_('currency'), max_length=10, default='USD')
+    is_active = models.BooleanField(_('is active'), default=True)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('tariff')
+        verbose_name_plural = _('tariffs')
+        constraints = [
+            models.UniqueConstraint(fields=['region', 'service_id'], name='tariff_region_service_uniq'),
+        ]
+
+    def __str__(self):
+        return f'Tariff {self.service_id} ({self.region})'
+
+
 class Sos(models.Model):
 
     class StatusChoices(models.TextChoices):
@@ -297,3 +376,313 @@ class Sos(models.Model):
 
     def __str__(self):
         return f'{self.title} ({self.region})'
+
+
+class SosAlert(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='user_sos_alerts')
+    region = models.ForeignKey(Regions, on_delete=models.SET_NULL, related_name='region_sos_alerts', blank=True, null=True)
+    latitude = models.DecimalField(_('latitude'), max_digits=9, decimal_places=6, blank=True, null=True)
+    longitude = models.DecimalField(_('longitude'), max_digits=9, decimal_places=6, blank=True, null=True)
+    contacts_notified = models.PositiveIntegerField(_('contacts notified'), default=0)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('sos alert')
+        verbose_name_plural = _('sos alerts')
+
+    def __str__(self):
+        return f'SOS from {self.user} ({self.created_at})'
+
+
+class NotificationOutbox(models.Model):
+
+    class ProviderChoices(models.TextChoices):
+        FCM = 'fcm', _('Firebase Cloud Messaging')
+        ONESIGNAL = 'onesignal', _('OneSignal')
+        SMS = 'sms', _('SMS')
+
+    class StatusChoices(models.TextChoices):
+        PENDING = 'pending', _('Pending')
+        SENT = 'sent', _('Sent')
+        FAILED = 'failed', _('Failed')
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='user_notifications', blank=True, null=True)
+    provider = models.CharField(_('provider'), max_length=20, choices=ProviderChoices.choices)
+    token = models.CharField(_('token'), max_length=255)
+    title = models.CharField(_('title'), max_length=255)
+    body = models.TextField(_('body'), blank=True)
+    data = models.JSONField(_('data'), default=dict, blank=True)
+    dedupe_key = models.CharField(_('dedupe key'), max_length=64, blank=True, null=True)
+    status = models.CharField(_('status'), max_length=10, choices=StatusChoices.choices, default=StatusChoices.PENDING)
+    priority = models.SmallIntegerField(_('priority'), default=0)
+    attempts = models.PositiveSmallIntegerField(_('attempts'), default=0)
+    next_attempt_at = models.DateTimeField(_('next attempt at'), default=timezone.now)
+    last_error = models.TextField(_('last error'), blank=True, null=True)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    sent_at = models.DateTimeField(_('sent at'), blank=True, null=True)
+
+    class Meta:
+        verbose_name = _('notification outbox')
+        verbose_name_plural = _('notification outbox')
+        indexes = [
+            models.Index(
+                fields=['-priority', 'next_attempt_at'],
+                name='outbox_pending_due_idx',
+                condition=models.Q(status='pending'),
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedupe_key'],
+                name='outbox_pending_dedupe_key_uniq',
+                condition=models.Q(status='pending'),
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.provider} notification to {self.user_id} ({self.status})'
+
+
+class Ride(models.Model):
+    """A ride, stored in a table partitioned by month on ``created_at``.
+
+    The table is created by raw SQL in migration 0007: its primary key is
+    ``(id, created_at)`` as Postgres requires the partition key in every
+    unique constraint, so no other table can hold a foreign key to it.
+    Filter on ``created_at`` wherever possible so only the matching
+    partitions are read.
+    """
+
+    class StatusChoices(models.TextChoices):
+        REQUESTED = 'requested', _('Requested')
+        ACCEPTED = 'accepted', _('Accepted')
+        IN_PROGRESS = 'in_progress', _('In progress')
+        COMPLETED = 'completed', _('Completed')
+        CANCELLED = 'cancelled', _('Cancelled')
+
+    ACTIVE_STATUSES = (StatusChoices.REQUESTED, StatusChoices.ACCEPTED, StatusChoices.IN_PROGRESS)
+
+    id = models.BigAutoField(primary_key=True)
+    rider = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='rides', db_index=False)
+    driver = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, related_name='driver_rides', blank=True, null=True, db_index=False)
+    service_id = models.PositiveBigIntegerField(_('service id'), blank=True, null=True)
+    status = models.CharField(_('status'), max_length=20, choices=StatusChoices.choices, default=StatusChoices.REQUESTED)
+    pickup_latitude = models.DecimalField(_('pickup latitude'), max_digits=9, decimal_places=6)
+    pickup_longitude = models.DecimalField(_('pickup longitude'), max_digits=9, decimal_places=6)
+    dropoff_latitude = models.DecimalField(_('dropoff latitude'), max_digits=9, decimal_places=6, blank=True, null=True)
+    dropoff_longitude = models.DecimalField(_('dropoff longitude'), max_digits=9, decimal_places=6, blank=True, null=True)
+    fare = models.DecimalField(_('fare'), max_digits=10, decimal_places=2, blank=True, null=True)
+    created_at = models.DateTimeField(_('created at'), default=timezone.now)
+    completed_at = models.DateTimeField(_('completed at'), blank=True, null=True)
+    cancelled_at = models.DateTimeField(_('cancelled at'), blank=True, null=True)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('ride')
+        verbose_name_plural = _('rides')
+        indexes = [
+            models.Index(fields=['rider', 'status'], name='ride_rider_status_idx'),
+            models.Index(fields=['driver', 'status'], name='ride_driver_status_idx'),
+        ]
+
+    def __str__(self):
+        return f'Ride {self.id} ({self.status})'
+
+
+class DriverProfile(models.Model):
+    """Running rating totals of a driver, kept in step with Rating inserts."""
+    RATING_MAX = 5
+
+    driver = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='driver_profile')
+    rating_sum = models.PositiveBigIntegerField(_('rating sum'), default=0)
+    rating_count = models.PositiveIntegerField(_('rating count'), default=0)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('driver profile')
+        verbose_name_plural = _('driver profiles')
+
+    def __str__(self):
+        return f'Profile of {self.driver_id}'
+
+    @classmethod
+    def compute_satisfaction_rate(cls, rating_sum, rating_count):
+        """Average rating as a percentage of the best score, or None if unrated."""
+        if not rating_count:
+            return None
+        return round(rating_sum * 100 / (rating_count * cls.RATING_MAX), 1)
+
+    @property
+    def satisfaction_rate(self):
+        return self.compute_satisfaction_rate(self.rating_sum, self.rating_count)
+
+
+class Rating(models.Model):
+    # Ride has a composite primary key in the database, so it cannot be
+    # the target of a foreign key.
+    ride_id = models.BigIntegerField(_('ride id'))
+    rider = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='given_ratings')
+    driver = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='received_ratings')
+    score = models.PositiveSmallIntegerField(_('score'))
+    comment = models.TextField(_('comment'), blank=True)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('rating')
+        verbose_name_plural = _('ratings')
+        constraints = [
+            models.UniqueConstraint(fields=['ride_id', 'rider'], name='rating_one_per_ride_uniq'),
+            models.CheckConstraint(
+                check=models.Q(score__gte=1, score__lte=DriverProfile.RATING_MAX),
+                name='rating_score_range',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.score} for {self.driver_id} (ride {self.ride_id})'
+
+
+class DriverTrack(models.Model):
+    """A driver's breadcrumbs over one time window, delta encoded.
+
+    ``data`` holds zigzag varints of the time (seconds) and position
+    (microdegrees) deltas between consecutive fixes; the first fix is
+    relative to the window start and 0,0. ``last_*`` keep the newest fix
+    so appending never decodes the chunk. See driver.tracks.
+    """
+    driver = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='driver_tracks', db_index=False)
+    window_start = models.DateTimeField(_('window start'))
+    fix_count = models.PositiveIntegerField(_('fix count'), default=0)
+    data = models.BinaryField(_('data'), default=bytes)
+    last_timestamp = models.BigIntegerField(_('last timestamp'))
+    last_latitude = models.IntegerField(_('last latitude'))
+    last_longitude = models.IntegerField(_('last longitude'))
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('driver track')
+        verbose_name_plural = _('driver tracks')
+        constraints = [
+            models.UniqueConstraint(fields=['driver', 'window_start'], name='track_driver_window_uniq'),
+        ]
+
+    def __str__(self):
+        return f'Track of {self.driver_id} from {self.window_start}'
+
+
+class HeatmapCell(models.Model):
+    """Online and available drivers in one cell of a fixed lat/lng grid.
+
+    Counts are kept by a trigger on the user table (migration 0012), so
+    every write path, bulk updates included, moves them. Cell indexes are
+    ``floor(coordinate / CELL_DEGREES)``; changing the cell size needs a
+    migration that replaces the trigger and rebuilds the table.
+    """
+    CELL_DEGREES = '0.01'
+
+    cell_lat = models.IntegerField(_('cell latitude'))
+    cell_lng = models.IntegerField(_('cell longitude'))
+    online = models.IntegerField(_('online'), default=0)
+    available = models.IntegerField(_('available'), default=0)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('heatmap cell')
+        verbose_name_plural = _('heatmap cells')
+        constraints = [
+            models.UniqueConstraint(fields=['cell_lat', 'cell_lng'], name='heatmap_cell_uniq'),
+        ]
+
+    def __str__(self):
+        return f'Cell {self.cell_lat},{self.cell_lng}: {self.online} online'
+
+
+class Task(models.Model):
+    """A background job in the database queue consumed by run_tasks."""
+
+    class StatusChoices(models.TextChoices):
+        PENDING = 'pending', _('Pending')
+        RUNNING = 'running', _('Running')
+        SUCCEEDED = 'succeeded', _('Succeeded')
+        FAILED = 'failed', _('Failed')
+
+    queue = models.CharField(_('queue'), max_length=50, default='default')
+    name = models.CharField(_('name'), max_length=200)
+    args = models.JSONField(_('args'), default=list, blank=True)
+    kwargs = models.JSONField(_('kwargs'), default=dict, blank=True)
+    status = models.CharField(_('status'), max_length=10, choices=StatusChoices.choices, default=StatusChoices.PENDING)
+    priority = models.SmallIntegerField(_('priority'), default=0)
+    attempts = models.PositiveSmallIntegerField(_('attempts'), default=0)
+    max_attempts = models.PositiveSmallIntegerField(_('max attempts'), default=5)
+    run_at = models.DateTimeField(_('run at'), default=timezone.now)
+    locked_at = models.DateTimeField(_('locked at'), blank=True, null=True)
+    last_error = models.TextField(_('last error'), blank=True, null=True)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    finished_at = models.DateTimeField(_('finished at'), blank=True, null=True)
+
+    class Meta:
+        verbose_name = _('task')
+        verbose_name_plural = _('tasks')
+        indexes = [
+            models.Index(
+                fields=['queue', '-priority', 'run_at'],
+                name='task_pending_due_idx',
+                condition=models.Q(status='pending'),
+            ),
+            # Finds tasks whose worker died mid-run.
+            models.Index(
+                fields=['locked_at'],
+                name='task_running_lock_idx',
+                condition=models.Q(status='running'),
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
+
+
+class IdempotencyKey(models.Model):
+    """A client's ``Idempotency-Key`` for one write, and the response it got.
+
+    ``response_status`` is null while the first request is still running;
+    ``expires_at`` then bounds how long a crashed request holds the key.
+    """
+    scope = models.CharField(_('scope'), max_length=255)
+    key = models.CharField(_('key'), max_length=255)
+    fingerprint = models.CharField(_('fingerprint'), max_length=64)
+    response_status = models.PositiveSmallIntegerField(_('response status'), blank=True, null=True)
+    response_body = models.JSONField(_('response body'), blank=True, null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(_('created at'), default=timezone.now)
+    expires_at = models.DateTimeField(_('expires at'))
+
+    class Meta:
+        verbose_name = _('idempotency key')
+        verbose_name_plural = _('idempotency keys')
+        indexes = [
+            models.Index(fields=['expires_at'], name='idempotency_key_expiry_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='idempotency_key_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.key} for {self.scope}'
+
+
+class MediaBlob(models.Model):
+    """A stored upload and how many rows refer to it.
+
+    Maintained by ``app.utils.storage.ContentAddressedStorage``.
+    """
+    name = models.CharField(_('name'), max_length=255, unique=True)
+    sha256 = models.CharField(_('sha256'), max_length=64)
+    size = models.BigIntegerField(_('size'))
+    refcount = models.PositiveIntegerField(_('reference count'), default=1)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('media blob')
+        verbose_name_plural = _('media blobs')
+
+    def __str__(self):
+        return f'{self.name} ({self.refcount} references)'
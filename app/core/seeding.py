@@ -0,0 +1,366 @@
+"""
+Deterministic synthetic data for scale testing, loaded with COPY.
+
+Users are generated in fixed-size chunks. Chunk ``n`` draws from its own
+``random.Random(f'{seed}:{n}')`` and owns a fixed slice of every id
+range, so its rows do not depend on how many workers load the chunks or
+in which order, and no worker waits on a sequence. A chunk's users, user
+details, wallets and driver documents are streamed with COPY in one
+transaction; fleets, regions, SOS contacts and document types are few
+and are bulk-created first. Every user shares one password, hashed once.
+
+The same seed and starting ids give the same rows. Timestamps are
+offsets from the start of the run, so presence and retention windows
+see the data as current. Drivers are copied offline and switched online
+afterwards in one UPDATE: the heatmap trigger then counts them in a
+single transaction instead of parallel chunks contending for its cells.
+"""
+import io
+import random
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from core.models import Document, DriverDocument, Fleet, Regions, Sos, UserDetail, Wallet
+from sos.services import invalidate_contacts
+
+
+User = get_user_model()
+
+# name, latitude, longitude, timezone, distance unit, currency
+CITIES = [
+    ('Paris', 48.8566, 2.3522, 'Europe/Paris', 'km', 'EUR'),
+    ('Lyon', 45.7640, 4.8357, 'Europe/Paris', 'km', 'EUR'),
+    ('London', 51.5072, -0.1276, 'Europe/London', 'mile', 'GBP'),
+    ('Berlin', 52.5200, 13.4050, 'Europe/Berlin', 'km', 'EUR'),
+    ('Madrid', 40.4168, -3.7038, 'Europe/Madrid', 'km', 'EUR'),
+    ('Rome', 41.9028, 12.4964, 'Europe/Rome', 'km', 'EUR'),
+    ('Casablanca', 33.5731, -7.5898, 'Africa/Casablanca', 'km', 'MAD'),
+    ('Dakar', 14.7167, -17.4677, 'Africa/Dakar', 'km', 'XOF'),
+    ('Abidjan', 5.3600, -4.0083, 'Africa/Abidjan', 'km', 'XOF'),
+    ('Montreal', 45.5019, -73.5674, 'America/Toronto', 'km', 'CAD'),
+    ('New York', 40.7128, -74.0060, 'America/New_York', 'mile', 'USD'),
+    ('Chicago', 41.8781, -87.6298, 'America/Chicago', 'mile', 'USD'),
+    ('Sao Paulo', -23.5505, -46.6333, 'America/Sao_Paulo', 'km', 'BRL'),
+    ('Dubai', 25.2048, 55.2708, 'Asia/Dubai', 'km', 'AED'),
+    ('Mumbai', 19.0760, 72.8777, 'Asia/Kolkata', 'km', 'INR'),
+    ('Sydney', -33.8688, 151.2093, 'Australia/Sydney', 'km', 'AUD'),
+]
+SOS_LINES = ['Police', 'Ambulance', 'Fire brigade', 'Roadside assistance', 'Women helpline']
+DOCUMENT_TYPES = [
+    ('Driving licence', True, True),
+    ('Vehicle registration', True, False),
+    ('Insurance certificate', True, True),
+    ('Identity card', False, True),
+]
+
+FIRST_NAMES = [
+    'Adam', 'Amina', 'Ana', 'Arjun', 'Awa', 'Camille', 'Chen', 'Chloe', 'David', 'Elena', 'Emma', 'Fatou',
+    'Hugo', 'Ibrahim', 'Ines', 'Jade', 'James', 'Jose', 'Karim', 'Leila', 'Liam', 'Lucas', 'Maria', 'Mateo',
+    'Mohamed', 'Nina', 'Noah', 'Olivia', 'Omar', 'Priya', 'Sara', 'Sofia', 'Thomas', 'Yasmine', 'Yuki', 'Zoe',
+]
+LAST_NAMES = [
+    'Alves', 'Bernard', 'Chen', 'Diallo', 'Dubois', 'Garcia', 'Haddad', 'Ivanova', 'Johnson', 'Kone', 'Kumar',
+    'Laurent', 'Martin', 'Mendes', 'Moreau', 'Nguyen', 'Okafor', 'Patel', 'Petit', 'Rossi', 'Santos', 'Schmidt',
+    'Silva', 'Smith', 'Tanaka', 'Traore', 'Wang', 'Williams',
+]
+STREETS = [
+    'Main Street', 'Station Road', 'Church Lane', 'Park Avenue', 'High Street', 'Market Square', 'Harbour Road',
+    'Victoria Street', 'Garden Way', 'Mill Lane', 'River Drive', 'King Street',
+]
+CAR_MODELS = ['Toyota Corolla', 'Toyota Prius', 'Peugeot 508', 'Renault Megane', 'Skoda Octavia', 'Hyundai Ioniq', 'Kia Niro', 'Tesla Model 3', 'Dacia Logan', 'Volkswagen Passat']
+CAR_COLORS = ['black', 'white', 'grey', 'silver', 'blue', 'red']
+STATUSES = (['active', 'inactive', 'pending', 'banned'], [90, 5, 3, 2])
+LOGIN_TYPES = (['email', 'mobile', 'google', 'facebook'], [55, 30, 10, 5])
+
+COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+@dataclass(frozen=True)
+class Region:
+    id: int
+    latitude: float
+    longitude: float
+    timezone: str
+    currency: str
+
+
+@dataclass(frozen=True)
+class SeedPlan:
+    """Everything a chunk needs; sent to each worker process."""
+    seed: int
+    users: int
+    chunk_size: int
+    driver_share: float
+    online_share: float
+    password: str
+    now: datetime
+    regions: tuple
+    fleet_ids: tuple
+    document_ids: tuple
+    # First ids of each table, taken above the rows already there.
+    user_start: int
+    detail_start: int
+    wallet_start: int
+    driver_document_start: int
+
+    @property
+    def chunks(self):
+        return -(-self.users // self.chunk_size)
+
+
+def _next_id(model):
+    return (model._base_manager.aggregate(top=Max('pk'))['top'] or 0) + 1
+
+
+def create_reference_data(seed, regions, fleets, sos_per_region):
+    """Bulk-create regions, their SOS contacts, fleets and missing document types.
+
+    Returns ``(regions, fleet_ids, document_ids)`` for ``build_plan()``.
+    """
+    rng = random.Random(f'{seed}:reference')
+    region_rows = []
+    for number in range(regions):
+        name, latitude, longitude, tz, unit, currency = CITIES[number % len(CITIES)]
+        lap = number // len(CITIES)
+        if lap:
+            # Outlying districts once every city has a region.
+            name = f'{name} {lap + 1}'
+            latitude += rng.uniform(-0.5, 0.5)
+            longitude += rng.uniform(-0.5, 0.5)
+        region_rows.append(Regions(
+            name=name, coordinates=f'{latitude:.4f},{longitude:.4f}', timezone=tz, distance_unit=unit,
+        ))
+    created = Regions.objects.bulk_create(region_rows, batch_size=5000)
+    Sos.objects.bulk_create(
+        (
+            Sos(region=region, title=title, contact_number=f'+1555{rng.randrange(10 ** 7):07d}')
+            for region in created
+            for title in SOS_LINES[:sos_per_region]
+        ),
+        batch_size=5000,
+    )
+    # bulk_create() sends no post_save; drop the cached contacts by hand.
+    invalidate_contacts()
+
+    fleet_rows = Fleet.objects.bulk_create(
+        Fleet(name=f'{CITIES[number % len(CITIES)][0]} Cabs {number + 1}') for number in range(fleets)
+    )
+
+    existing = dict(Document.objects.filter(name__in=[name for name, _, _ in DOCUMENT_TYPES]).values_list('name', 'id'))
+    Document.objects.bulk_create(
+        Document(name=name, is_required=required, has_expiry_date=expires, status=1)
+        for name, required, expires in DOCUMENT_TYPES if name not in existing
+    )
+    documents = dict(Document.objects.filter(name__in=[name for name, _, _ in DOCUMENT_TYPES]).values_list('name', 'id'))
+
+    return (
+        tuple(
+            Region(region.id, *map(float, region.coordinates.split(',')), region.timezone, CITIES[number % len(CITIES)][5])
+            for number, region in enumerate(created)
+        ),
+        tuple(fleet.id for fleet in fleet_rows),
+        tuple(documents[name] for name, _, _ in DOCUMENT_TYPES),
+    )
+
+
+def build_plan(seed, users, chunk_size, regions, fleet_ids, document_ids, password,
+               driver_share=0.2, online_share=0.3):
+    """Return the ``SeedPlan`` for ``users`` users above the current ids."""
+    return SeedPlan(
+        seed=seed,
+        users=users,
+        chunk_size=chunk_size,
+        driver_share=driver_share,
+        online_share=online_share,
+        # A fixed salt keeps the hash, like every other column, a function of the seed.
+        password=make_password(password, salt=f'seed{seed}'),
+        now=timezone.now(),
+        regions=regions,
+        fleet_ids=fleet_ids,
+        document_ids=document_ids,
+        user_start=_next_id(User),
+        detail_start=_next_id(UserDetail),
+        wallet_start=_next_id(Wallet),
+        driver_document_start=_next_id(DriverDocument),
+    )
+
+
+def _copy_text(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value).translate(COPY_ESCAPES)
+
+
+def copy_rows(cursor, model, rows, now):
+    """COPY ``rows``, dicts keyed by attname, into ``model``'s table.
+
+    Fields missing from a row get their model default, and ``now`` for
+    auto_now fields, as the database knows neither. Returns the row count.
+    """
+    fields = model._meta.concrete_fields
+    defaults = [
+        now if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False) else field.get_default()
+        for field in fields
+    ]
+    buffer = io.StringIO()
+    count = 0
+    for row in rows:
+        buffer.write('\t'.join(_copy_text(row.get(field.attname, default)) for field, default in zip(fields, defaults)))
+        buffer.write('\n')
+        count += 1
+    buffer.seek(0)
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+    cursor.copy_expert(f'COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN', buffer)
+    return count
+
+
+def _coordinate(value):
+    return f'{value:.6f}'
+
+
+def generate_chunk(plan, number):
+    """Return the rows of chunk ``number`` as ``{model: [row, ...]}`` and its online drivers.
+
+    Online drivers come back as ``[(user_id, is_available), ...]``.
+    """
+    rng = random.Random(f'{plan.seed}:{number}')
+    now = plan.now
+    first = number * plan.chunk_size
+    rows = {User: [], UserDetail: [], Wallet: [], DriverDocument: []}
+    online = []
+    for index in range(first, min(first + plan.chunk_size, plan.users)):
+        user_id = plan.user_start + index
+        first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        is_driver = rng.random() < plan.driver_share
+        region = rng.choice(plan.regions)
+        joined = now - timedelta(seconds=rng.randrange(3 * 365 * 86400))
+        if is_driver and rng.random() < plan.online_share:
+            online.append((user_id, rng.random() < 0.7))
+            seen = now - timedelta(seconds=rng.randrange(120))
+        else:
+            seen = joined + (now - joined) * rng.random()
+        completed = int(rng.expovariate(1 / (400 if is_driver else 25)))
+
+        rows[User].append({
+            'id': user_id,
+            'password': plan.password,
+            'email': f'{first_name}.{last_name}.{user_id}@example.com'.lower(),
+            'username': f'{first_name}{last_name}{user_id}'.lower(),
+            'first_name': first_name,
+            'last_name': last_name,
+            'phone_number': f'+1{user_id:010d}',
+            'date_of_birth': date(rng.randint(1950, 2006), rng.randint(1, 12), rng.randint(1, 28)),
+            'gender': rng.choice(['male', 'female']),
+            'address': f'{rng.randint(1, 250)} {rng.choice(STREETS)}',
+            'user_type': 'driver' if is_driver else 'rider',
+            'status': rng.choices(*STATUSES)[0],
+            'login_type': rng.choices(*LOGIN_TYPES)[0],
+            'timezone': region.timezone,
+            'email_verified_at': joined + timedelta(minutes=rng.randrange(600)) if rng.random() < 0.8 else None,
+            'is_verified_driver': is_driver and rng.random() < 0.85,
+            'latitude': _coordinate(region.latitude + rng.gauss(0, 0.04)),
+            'longitude': _coordinate(region.longitude + rng.gauss(0, 0.04)),
+            'last_location_update_at': seen,
+            'fleet_id': rng.choice(plan.fleet_ids) if plan.fleet_ids and rng.random() < 0.9 else None,
+            'service_id': rng.randint(1, 3) if is_driver else None,
+            'completed_rides': completed,
+            'cancelled_rides': int(completed * rng.uniform(0, 0.15)),
+            'created_at': joined,
+            'updated_at': seen,
+        })
+
+        detail = {
+            'id': plan.detail_start + index,
+            'user_id': user_id,
+            'home_address': f'{rng.randint(1, 250)} {rng.choice(STREETS)}',
+            'home_latitude': _coordinate(region.latitude + rng.gauss(0, 0.05)),
+            'home_longitude': _coordinate(region.longitude + rng.gauss(0, 0.05)),
+            'created_at': joined,
+            'updated_at': joined,
+        }
+        if is_driver:
+            detail.update({
+                'car_model': rng.choice(CAR_MODELS),
+                'car_color': rng.choice(CAR_COLORS),
+                'car_plate_number': f'{rng.choice("ABCDEFGHJKLMNPRSTVWXYZ")}{rng.choice("ABCDEFGHJKLMNPRSTVWXYZ")}-{rng.randrange(1000):03d}-{user_id % 100:02d}',
+                'car_production_year': str(rng.randint(2008, now.year)),
+            })
+        elif rng.random() < 0.6:
+            detail.update({
+                'work_address': f'{rng.randint(1, 250)} {rng.choice(STREETS)}',
+                'work_latitude': _coordinate(region.latitude + rng.gauss(0, 0.03)),
+                'work_longitude': _coordinate(region.longitude + rng.gauss(0, 0.03)),
+            })
+        rows[UserDetail].append(detail)
+
+        earned = round(completed * rng.uniform(8, 25), 2) if is_driver else 0.0
+        withdrawn = round(earned * rng.uniform(0, 0.9), 2)
+        cash = round(earned * rng.uniform(0, 0.5), 2)
+        rows[Wallet].append({
+            'id': plan.wallet_start + index,
+            'user_id': user_id,
+            'total_amount': round(earned - withdrawn, 2),
+            'online_received': round(earned - cash, 2),
+            'collected_cash': cash,
+            'manual_received': 0.0,
+            'total_withdrawn': withdrawn,
+            'currency': region.currency,
+            'created_at': joined,
+            'updated_at': seen,
+        })
+
+        if is_driver:
+            for slot, document_id in enumerate(plan.document_ids):
+                rows[DriverDocument].append({
+                    'id': plan.driver_document_start + index * len(plan.document_ids) + slot,
+                    'document_id_id': document_id,
+                    'driver_id_id': user_id,
+                    'expire_date': (now + timedelta(days=rng.randint(-30, 3 * 365))).date(),
+                    'is_verified': rng.random() < 0.9,
+                    'created_at': joined,
+                    'updated_at': joined,
+                })
+    return rows, online
+
+
+def load_chunk(plan, number):
+    """Generate chunk ``number`` and COPY it in one transaction.
+
+    Returns ``({model: rows}, online drivers)``.
+    """
+    rows, online = generate_chunk(plan, number)
+    with transaction.atomic(), connection.cursor() as cursor:
+        counts = {model: copy_rows(cursor, model, model_rows, plan.now) for model, model_rows in rows.items()}
+    return counts, online
+
+
+def finish(online):
+    """Move the sequences past the copied ids, switch drivers online and analyze.
+
+    ``online`` holds the ``(user_id, is_available)`` pairs of every chunk.
+    """
+    models = [User, UserDetail, Wallet, DriverDocument]
+    with transaction.atomic(), connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
+        if online:
+            user_ids, available = zip(*online)
+            cursor.execute(
+                f'UPDATE {User._meta.db_table} AS u SET is_online = true, is_available = v.available '
+                'FROM unnest(%s::bigint[], %s::boolean[]) AS v(id, available) WHERE u.id = v.id',
+                [list(user_ids), list(available)],
+            )
+    with connection.cursor() as cursor:
+        for model in models + [Regions, Sos, Fleet]:
+            cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
@@ -0,0 +1,11 @@
+"""
+Housekeeping tasks for core tables.
+"""
+from app.utils.idempotency import purge_expired
+from taskqueue.registry import task
+
+
+@task(name='core.purge_idempotency_keys')
+def purge_idempotency_keys():
+    """Delete idempotency keys whose stored response has expired."""
+    purge_expired()
@@ -1,11 +1,15 @@
 """
 Tests for the Django admin modifications.
 """
+from django.db import connection
 from django.test import TestCase
 from django.urls import reverse
 from django.test import Client
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 
+from app.utils.custom_pagination import EstimatedCountPaginator
+
 
 class AdminSiteTests(TestCase):
     """Tests for Django admin."""
@@ -43,3 +47,51 @@ class AdminSiteTests(TestCase):
         res = self.client.get(url)
 
         self.assertEqual(res.status_code, 200)
+
+    def test_changelist_scales(self):
+        """Test the changelist skips the full count and loads only shown columns."""
+        url = reverse('admin:core_user_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, {'user_type': 'rider'})
+
+        self.assertIsInstance(res.context['cl'].paginator, EstimatedCountPaginator)
+        self.assertIsNone(res.context['cl'].full_result_count)
+        listing = [query['sql'] for query in queries if query['sql'].startswith('SELECT') and 'core_driverprofile' in query['sql']]
+        self.assertEqual(len(listing), 1)
+        self.assertNotIn('"core_user"."password"', listing[0])
+
+    def test_search_uses_index(self):
+        """Test changelist search matches partial terms through the search index."""
+        url = reverse('admin:core_user_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, {'q': 'user@exa'})
+
+        self.assertContains(res, self.user.email)
+        self.assertNotContains(res, '<a href="/admin/core/user/%d/change/">%s' % (self.admin_user.id, self.admin_user.email))
+        self.assertTrue(any('search_vector' in query['sql'] for query in queries))
+
+    def test_bulk_status_action_is_one_update(self):
+        """Test status actions change every selected user with one UPDATE."""
+        other = get_user_model().objects.create_user(email='other@example.com', password='testpass123')
+        url = reverse('admin:core_user_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(url, {
+                'action': 'set_status_banned',
+                '_selected_action': [self.user.id, other.id],
+            })
+
+        self.assertEqual(res.status_code, 302)
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "core_user"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            set(get_user_model().objects.filter(status='banned').values_list('id', flat=True)),
+            {self.user.id, other.id},
+        )
+
+    def test_bulk_deactivate_action(self):
+        """Test the deactivate action."""
+        url = reverse('admin:core_user_changelist')
+        self.client.post(url, {'action': 'deactivate_users', '_selected_action': [self.user.id]})
+
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
@@ -1,34 +1,142 @@
 """
 Test custom Django management commands.
 """
+import os
+import subprocess
+import sys
+import tempfile
+from io import StringIO
+from pathlib import Path
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2OpError
 
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
 
+from core.management.commands.profile_startup import parse_importtime
 
-@patch('core.management.commands.wait_for_db.Command.check')
+
+@patch('core.management.commands.wait_for_db.probe_cache')
+@patch('core.management.commands.wait_for_db.probe_database')
 class CommandTests(SimpleTestCase):
     """Test commands."""
 
-    def test_wait_for_db_ready(self, patched_check):
+    def test_wait_for_db_ready(self, patched_probe, patched_cache_probe):
         """Test waiting for database if database ready."""
-        patched_check.return_value = True
+        patched_probe.return_value = None
 
-        call_command('wait_for_db')
+        call_command('wait_for_db', stdout=StringIO())
 
-        patched_check.assert_called_once_with(databases=['default'])
+        patched_probe.assert_called_once_with('default')
+        patched_cache_probe.assert_called_once_with('default')
 
     @patch('time.sleep')
-    def test_wait_for_db_delay(self, patched_sleep, patched_check):
+    def test_wait_for_db_delay(self, patched_sleep, patched_probe, patched_cache_probe):
         """Test waiting for database when getting OperationalError."""
-        patched_check.side_effect = [Psycopg2OpError] * 2 + \
-            [OperationalError] * 3 + [True]
+        patched_probe.side_effect = [Psycopg2OpError] * 2 + \
+            [OperationalError] * 3 + [None]
+
+        call_command('wait_for_db', '--initial-delay', '0.1', '--max-delay', '0.5', stdout=StringIO())
+
+        self.assertEqual(patched_probe.call_count, 6)
+        patched_probe.assert_called_with('default')
+        delays = [call.args[0] for call in patched_sleep.call_args_list]
+        self.assertEqual(len(delays), 5)
+        self.assertTrue(all(0.05 <= delay <= 0.5 for delay in delays))
+        self.assertGreater(delays[-1], delays[0])
+
+    @patch('time.sleep')
+    def test_wait_for_db_timeout(self, patched_sleep, patched_probe, patched_cache_probe):
+        """Test the command fails once the timeout is spent."""
+        patched_probe.side_effect = OperationalError
+
+        with self.assertRaises(CommandError):
+            call_command('wait_for_db', '--timeout', '0', stdout=StringIO())
+
+    def test_wait_for_db_skip_caches(self, patched_probe, patched_cache_probe):
+        """Test caches can be left out of the readiness check."""
+        call_command('wait_for_db', '--skip-caches', stdout=StringIO())
+
+        patched_probe.assert_called_once_with('default')
+        patched_cache_probe.assert_not_called()
+
+
+class BuildSchemaCommandTests(SimpleTestCase):
+    """Test prebuilding the OpenAPI schema."""
+
+    def setUp(self):
+        self.static_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.static_root.cleanup)
+
+    def test_build_schema_writes_versioned_file(self):
+        """Test the schema is written once per code version."""
+        with override_settings(STATIC_ROOT=self.static_root.name, APP_VERSION='1.2.3'):
+            call_command('build_schema', stdout=StringIO())
+            path = Path(self.static_root.name) / 'schema' / 'openapi-1.2.3.json'
+            self.assertTrue(path.is_file())
+
+            with patch('core.management.commands.build_schema.render_schema') as patched_render:
+                call_command('build_schema', stdout=StringIO())
+                patched_render.assert_not_called()
+
+    def test_build_schema_without_version(self):
+        """Test nothing is written when no code version is known."""
+        with override_settings(STATIC_ROOT=self.static_root.name, APP_VERSION=None):
+            call_command('build_schema', stdout=StringIO())
+
+        self.assertFalse((Path(self.static_root.name) / 'schema').exists())
+
+    def test_schema_view_serves_built_file(self):
+        """Test the schema endpoint serves the file with cache headers."""
+        with override_settings(STATIC_ROOT=self.static_root.name, APP_VERSION='1.2.3'):
+            call_command('build_schema', stdout=StringIO())
+            res = self.client.get(reverse('api-schema'))
+
+            self.assertEqual(res.status_code, 200)
+            self.assertIn('public', res['Cache-Control'])
+            self.assertEqual(res['ETag'], '"1.2.3"')
+
+            res = self.client.get(reverse('api-schema'), HTTP_IF_NONE_MATCH='"1.2.3"')
+            self.assertEqual(res.status_code, 304)
+
+
+class ProfileStartupCommandTests(SimpleTestCase):
+    """Test the startup profiling command."""
+
+    def test_parse_importtime(self):
+        """Test -X importtime lines are parsed into module timings."""
+        stderr = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |   yaml.reader\n'
+            'import time:       300 |        420 | yaml\n'
+        )
+
+        modules = list(parse_importtime(stderr))
+
+        self.assertEqual(modules, [('yaml.reader', 120, 120), ('yaml', 300, 420)])
+
+    def test_profile_startup_reports_phases(self):
+        """Test the command profiles a fresh interpreter."""
+        out = StringIO()
+
+        call_command('profile_startup', '--top', '3', stdout=out)
+
+        self.assertIn('apps ready', out.getvalue())
+        self.assertIn('modules imported', out.getvalue())
+
+    def test_lean_worker_skips_schema_imports(self):
+        """Test a lean worker loads every view without importing drf_spectacular."""
+        probe = (
+            'import sys, django; django.setup(); '
+            'from django.urls import get_resolver; get_resolver().url_patterns; '
+            'print(sorted(m for m in sys.modules if m.startswith("drf_spectacular")))'
+        )
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='app.settings', LEAN_WORKER='1')
 
-        call_command('wait_for_db')
+        result = subprocess.run([sys.executable, '-c', probe], env=env, capture_output=True, text=True, check=True)
 
-        self.assertEqual(patched_check.call_count, 6)
-        patched_check.assert_called_with(databases=['default'])
+        self.assertEqual(result.stdout.strip(), '[]')
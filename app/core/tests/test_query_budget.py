@@ -0,0 +1,403 @@
+"""
+Tests that every endpoint runs a constant number of queries.
+
+Each test seeds the rows its endpoint reads at two sizes and checks the
+query count does not move between them, nor pass the endpoint's budget.
+A failure lists the SQL of both runs, repeated statements marked.
+"""
+import itertools
+from datetime import timedelta
+
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from app.utils.query_budget import QueryBudgetMixin
+from core.models import Fleet, NotificationOutbox, Regions, Ride, Sos, Tariff, Task
+from driver.tracks import append_fix
+from ride.services import close_ride, create_ride
+
+
+User = get_user_model()
+
+PARIS = ('48.856600', '2.352200')
+
+# Routes without an API budget: the admin is covered by test_admin apart
+# from the user changelist below, and the schema is served from a file.
+UNBUDGETED = {'admin', 'api-schema', 'api-docs'}
+
+
+def route_names(patterns, namespace=None):
+    """Yield the ``namespace:name`` of every named route under ``patterns``."""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            inner = ':'.join(filter(None, [namespace, pattern.namespace]))
+            yield from route_names(pattern.url_patterns, inner or None)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield f'{namespace}:{pattern.name}' if namespace else pattern.name
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class EndpointQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Test each endpoint's query count is independent of data size."""
+
+    def setUp(self):
+        self.serial = itertools.count()
+        self.fleet = Fleet.objects.create(name='North')
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='testpass123', user_type='admin')
+        self.staff = User.objects.create_user(
+            email='staff@example.com', password='testpass123', user_type='staff', is_staff=True, fleet=self.fleet,
+        )
+        self.rider = User.objects.create_user(
+            email='rider@example.com', password='testpass123', first_name='Jane', user_type='rider',
+            latitude=PARIS[0], longitude=PARIS[1],
+        )
+        self.driver = self.create_driver()
+        self.client = APIClient()
+
+    def create_user(self, **params):
+        number = next(self.serial)
+        params.setdefault('user_type', 'rider')
+        return User.objects.create_user(
+            email=f'user{number}@example.com', password='testpass123', username=f'user{number}',
+            first_name='Jane', fleet=self.fleet, **params,
+        )
+
+    def create_users(self, count, **params):
+        for _ in range(count):
+            self.create_user(**params)
+
+    def create_driver(self, **params):
+        return self.create_user(
+            user_type='driver', is_online=True, is_available=True, is_verified_driver=True, service_id=1,
+            latitude=PARIS[0], longitude=PARIS[1], last_location_update_at=timezone.now(), **params,
+        )
+
+    def create_drivers(self, count):
+        for _ in range(count):
+            self.create_driver()
+
+    def create_rides(self, count, status=Ride.StatusChoices.COMPLETED):
+        for _ in range(count):
+            ride = create_ride(self.rider, self.driver.id, *PARIS, service_id=1)
+            close_ride(ride, status)
+
+    def active_ride(self):
+        return (create_ride(self.rider, self.driver.id, *PARIS, service_id=1).id,)
+
+    def as_user(self, user):
+        self.client.force_authenticate(user)
+
+    def test_every_endpoint_is_budgeted(self):
+        """Test each named route has a query budget test below."""
+        budgeted = {
+            name.split('test_', 1)[1].replace('__', ':')
+            for name in dir(self) if name.startswith('test_') and name != 'test_every_endpoint_is_budgeted'
+        }
+        routes = {
+            name for name in route_names(get_resolver().url_patterns)
+            if name.split(':', 1)[0] not in UNBUDGETED
+        }
+
+        self.assertEqual(routes - budgeted, set())
+
+    def test_token_obtain_pair(self):
+        self.assertQueryBudget(
+            lambda: self.client.post(reverse('token_obtain_pair'), {'email': 'rider@example.com', 'password': 'testpass123'}),
+            self.create_users, budget=1,
+        )
+        self.assertEqual(self.last_response.status_code, 200)
+
+    def test_token_refresh(self):
+        self.assertQueryBudget(
+            lambda: self.client.post(reverse('token_refresh'), {'refresh': str(RefreshToken.for_user(self.rider))}),
+            self.create_users, budget=0,
+        )
+        self.assertEqual(self.last_response.status_code, 200)
+
+    def test_user__list_user(self):
+        self.as_user(self.staff)
+
+        def seed(count):
+            self.create_users(count)
+            self.create_rides(count)
+            self.create_drivers(count)
+
+        self.assertQueryBudget(
+            lambda: self.client.get(reverse('user:list_user'), {'user_type': 'driver'}),
+            seed, budget=3,
+        )
+        self.assertEqual(self.last_response.status_code, 200)
+
+    def test_user__search_user(self):
+        self.as_user(self.staff)
+        self.assertQueryBudget(
+            lambda: self.client.get(reverse('user:search_user'), {'q': 'jane'}),
+            self.create_users, budget=1,
+        )
+        self.assertEqual(self.last_response.status_code, 200)
+
+    def test_user__register_manager(self):
+        def register():
+            number = next(self.serial)
+            return self.client.post(reverse('user:register_manager'), {
+                'email': f'manager{number}@example.com', 'username': f'manager{number}', 'phone_number': f'+3360000{number:04}',
+                'password': 'testpass123', 'confirm_password': 'testpass123',
+            })
+
+        self.assertQueryBudget(register, self.create_users, budget=3)
+        self.assertEqual(self.last_response.status_code, 201)
+
+    def test_user__update_user_status(self):
+        self.as_user(self.admin)
+        self.assertQueryBudget(
+            lambda: self.client.put(reverse('user:update_user_status', args=[self.rider.id]), {'status': 'banned'}),
+            self.create_users, budget=2,
+        )
+        self.assertEqual(self.last_response.status_code, 200)
+
+    def test_user__change_password(self):
+        self.as_user(self.rider)
+        passwords = itertools.pairwise(itertools.cycle(['testpass123', 'Another-pass-456']))
+
+        self.assertQueryBudget(
+            lambda old, new: self.client.post(reverse('user:change_password'), {
+                'old_password': old, 'new_password': new, 'confirm_password': new,
+            }),
+            self.create_users, prepare=lambda: next(passwords), budget=1,
+        )
+        self.assertEqual(self.last_response.status_code, 200)
+
+    def test_rider__register_rider(self):
+        def register():
+            number = next(self.serial)
+            return self.client.post(reverse('rider:register_rider'), {
+                'email': f'new{number}@example.com', 'username': f'new{number}', 'phone_number': f'+3360000{number:04}',
+                'password': 'testpass123', 'confirm_password': 'testpass123',
+            })
+
+        self.assertQueryBudget(register, self.create_users, budget=3)
+        self.assertEqual(self.last_response.status_code, 201)
+
+    def test_driver__register_driver(self):
+        def register():
+            number = next(self.serial)
+            return self.client.post(reverse('driver:register_driver'), {
+                'email': f'new{number}@example.com', 'username': f'new{number}', 'phone_number': f'+3360000{number:04}',
+                'password': 'testpass123', 'confirm_password': 'testpass123',
+            })
+
+        self.assertQueryBudget(register, self.create_drivers, budget=3)
+        self.assertEqual(self.last_response.status_code, 201)
+
+    def test_driver__match(self):
+        self.as_user(self.admin)
+        self.assertQueryBudget(
+            lambda: self.client.post(reverse('driver:match'), {'latitude': PARIS[0], 'longitude': PARIS[1], 'service_id': 1}),
+            self.create_drivers, budget=2,
+        )
+        self.assertEqual(self.last_response.status_code, 200)
+
+    def test_driver__location(self):
+        self.as_user(self.driver)
+
+        def seed(count):
+            start = timezone.now() - timedelta(minutes=30)
+            for second in range(count):
+                append_fix(self.driver.id, (start + timedelta(seconds=second)).timestamp(), *PARIS)
+
+        self.assertQueryBudget(
+            lambda: self.client.post(reverse('driver:location'), {'latitude': PARIS[0], 'longitude': PARIS[1]}),
+            seed, budget=5,
+        )
+        self.assertEqual(self.last_response.status_code, 200)
+
+    def test_driver__track(self):
+        self.as_user(self.admin)
+
+        def seed(count):
+            start = timezone.now() - timedelta(minutes=50)
+            for minute in range(count):
+                append_fix(self.driver.id, (start + timedelta(minutes=minute)).timestamp(), *PARIS)
+
+        self.assertQueryBudget(
+            lambda: self.client.get(reverse('driver:track', args=[self.driver.id])),
+            seed, budget=1,
+        )
+        self.assertEqual(self.last_response.status_code, 200)
+
+    def test_driver__presence_metrics(self):
+        self.as_user(self.admin)
+        self.assertQueryBudget(
+            lambda: self.client.get(reverse('driver:presence_metrics')),
+            self.create_drivers, budget=2,
+        )
+        self.assertEqual(self.last_response.status_code, 200)
+
+    @override_settings(HEATMAP_SNAPSHOT_TTL=0)
+    def test_driver__heatmap(self):
+        self.as_user(self.admin)
+        self.assertQueryBudget(
+            lambda: self.client.get(reverse('driver:heatmap'), {'min_lat': 48.8, 'max_lat': 48.9, 'min_lng': 2.3, 'max_lng': 2.4}),
+            self.create_drivers, budget=1,
+        )
+        self.assertEqual(self.last_response.status_code, 200)
+
+    def test_driver__heatmap_for_fleet_staff(self):
+        self.as_user(self.staff)
+        self.assertQueryBudget(
+            lambda: self.client.get(reverse('driver:heatmap'), {'min_lat': 48.8, 'max_lat': 48.9, 'min_lng': 2.3, 'max_lng': 2.4}),
+            self.create_drivers, budget=1,
+        )
+        self.assertEqual(len(self.last_response.data['data']['cells']), 1)
+
+    def test_notification__metrics(self):
+        self.as_user(self.admin)
+
+        def seed(count):
+            NotificationOutbox.objects.bulk_create(
+                NotificationOutbox(provider='sms', token='+33600000000', title='Hello') for _ in range(count)
+            )
+
+        self.assertQueryBudget(lambda: self.client.get(reverse('notification:metrics')), seed, budget=1)
+        self.assertEqual(self.last_response.status_code, 200)
+
+    def test_sos__trigger(self):
+        self.as_user(self.rider)
+        region = Regions.objects.create(name='Paris', coordinates='48.8566,2.3522')
+
+        def seed(count):
+            for _ in range(count):
+                Sos.objects.create(region=region, title='Police', contact_number='+33 17')
+
+        self.assertQueryBudget(
+            lambda: self.client.post(reverse('sos:trigger'), {'latitude': PARIS[0], 'longitude': PARIS[1]}),
+            seed, budget=7,
+        )
+        self.assertEqual(self.last_response.status_code, 202)
+
+    def test_ride__list(self):
+        self.as_user(self.rider)
+        self.assertQueryBudget(lambda: self.client.get(reverse('ride:list')), self.create_rides, budget=2)
+        self.assertEqual(self.last_response.status_code, 200)
+
+    def test_ride__request(self):
+        self.as_user(self.rider)
+
+        def end_active_rides():
+            Ride.objects.filter(rider=self.rider, status__in=Ride.ACTIVE_STATUSES).update(status='cancelled')
+            return ()
+
+        self.assertQueryBudget(
+            lambda: self.client.post(reverse('ride:request'), {
+                'pickup_latitude': PARIS[0], 'pickup_longitude': PARIS[1], 'service_id': 1,
+            }),
+            # Reservation and ride commit together; the savepoint pair is the test's
+            # transaction. The rider lock and active ride check come first.
+            self.create_drivers, prepare=end_active_rides, budget=7,
+        )
+        self.assertEqual(self.last_response.status_code, 201)
+
+    def test_ride__estimate(self):
+        self.as_user(self.rider)
+        region = Regions.objects.create(name='Paris', coordinates='48.8566,2.3522')
+        services = itertools.count(1)
+
+        def seed(count):
+            for _ in range(count):
+                Tariff.objects.create(region=region, service_id=next(services), base_fare=2, per_distance=1, currency='EUR')
+
+        self.assertQueryBudget(
+            lambda: self.client.post(reverse('ride:estimate'), {'routes': [{
+                'pickup_latitude': 48.8566, 'pickup_longitude': 2.3522,
+                'dropoff_latitude': 48.8049, 'dropoff_longitude': 2.1204,
+            }]}, format='json'),
+            seed, budget=3,
+        )
+        self.assertEqual(self.last_response.status_code, 200)
+
+    def test_ride__complete(self):
+        self.as_user(self.driver)
+        self.assertQueryBudget(
+            lambda pk: self.client.post(reverse('ride:complete', args=[pk])),
+            self.create_rides, prepare=self.active_ride, budget=6,
+        )
+        self.assertEqual(self.last_response.status_code, 200)
+
+    def test_ride__cancel(self):
+        self.as_user(self.rider)
+        self.assertQueryBudget(
+            lambda pk: self.client.post(reverse('ride:cancel', args=[pk])),
+            self.create_rides, prepare=self.active_ride, budget=6,
+        )
+        self.assertEqual(self.last_response.status_code, 200)
+
+    def test_ride__rate(self):
+        self.as_user(self.rider)
+
+        def completed_ride():
+            ride = create_ride(self.rider, self.driver.id, *PARIS, service_id=1)
+            close_ride(ride, Ride.StatusChoices.COMPLETED)
+            return (ride.id,)
+
+        self.assertQueryBudget(
+            lambda pk: self.client.post(reverse('ride:rate', args=[pk]), {'score': 5}),
+            self.create_rides, prepare=completed_ride, budget=6,
+        )
+        self.assertEqual(self.last_response.status_code, 201)
+
+    def test_taskqueue__metrics(self):
+        self.as_user(self.admin)
+        queues = itertools.cycle(['default', 'notifications', 'media'])
+
+        def seed(count):
+            Task.objects.bulk_create(Task(queue=next(queues), name='core.noop') for _ in range(count))
+
+        self.assertQueryBudget(lambda: self.client.get(reverse('taskqueue:metrics')), seed, budget=1)
+        self.assertEqual(self.last_response.status_code, 200)
+
+    def test_admin_user_changelist(self):
+        """Test the admin user changelist, the admin page that lists most rows."""
+        self.client.force_login(self.admin)
+
+        def seed(count):
+            self.create_users(count)
+            self.create_drivers(count)
+
+        self.assertQueryBudget(lambda: self.client.get(reverse('admin:core_user_changelist')), seed, budget=5)
+        self.assertEqual(self.last_response.status_code, 200)
+
+
+class QueryBudgetHarnessTests(QueryBudgetMixin, TestCase):
+    """Test the harness catches queries that grow with data."""
+
+    def test_query_per_row_fails(self):
+        """Test an N+1 fails with its repeated statement marked."""
+        fleet = Fleet.objects.create(name='North')
+
+        def seed(count):
+            User.objects.bulk_create(
+                User(email=f'user{fleet.users.count() + index}@example.com', fleet=fleet) for index in range(count)
+            )
+
+        def request():
+            return [user.fleet.name for user in User.objects.filter(fleet=fleet)]
+
+        with self.assertRaises(AssertionError) as failure:
+            self.assertQueryBudget(request, seed, budget=25)
+
+        message = str(failure.exception)
+        self.assertIn('cold cache: 3 queries with 2 rows, 21 queries with 20 rows (budget 25).', message)
+        self.assertIn('[x20] SELECT "core_fleet"', message)
+
+    def test_records_database_time(self):
+        """Test each run keeps its statements and their duration."""
+        cold, warm = self.assertQueryBudget(lambda: list(Fleet.objects.all()), lambda count: None, budget=1)[-1]
+
+        self.assertEqual(len(cold), 1)
+        self.assertGreater(cold.time, 0)
+        self.assertIn('FROM "core_fleet"', cold.queries[0][0])
@@ -0,0 +1,76 @@
+"""
+Tests for the synthetic data generator.
+"""
+from io import StringIO
+
+from django.db import transaction
+from django.test import TestCase
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+
+from core import seeding
+from core.models import DriverDocument, HeatmapCell, Regions, Sos, UserDetail, Wallet
+
+
+User = get_user_model()
+
+
+def snapshot():
+    return (
+        list(User.objects.order_by('id').values_list('id', 'email', 'user_type', 'latitude', 'longitude', 'fleet_id', 'password')),
+        list(UserDetail.objects.order_by('id').values_list('id', 'user_id', 'car_plate_number', 'home_latitude')),
+        list(Wallet.objects.order_by('id').values_list('id', 'user_id', 'total_amount', 'currency')),
+        list(DriverDocument.objects.order_by('id').values_list('id', 'driver_id_id', 'document_id_id', 'expire_date')),
+    )
+
+
+class SeedCommandTests(TestCase):
+    """Test the seed command and its chunks."""
+
+    def test_seed_creates_related_rows(self):
+        """Test users come with details, wallets and documents, usable afterwards."""
+        call_command('seed', users=50, chunk_size=20, workers=1, regions=18, fleets=2, sos_per_region=2, stdout=StringIO())
+
+        drivers = User.objects.filter(user_type='driver')
+        self.assertEqual(User.objects.count(), 50)
+        self.assertEqual(UserDetail.objects.count(), 50)
+        self.assertEqual(Wallet.objects.count(), 50)
+        self.assertEqual(DriverDocument.objects.count(), drivers.count() * len(seeding.DOCUMENT_TYPES))
+        self.assertEqual(Regions.objects.count(), 18)
+        self.assertTrue(Regions.objects.filter(name='Paris 2').exists())
+        self.assertEqual(Sos.objects.count(), 36)
+        self.assertEqual(UserDetail.objects.filter(user__user_type='driver', car_model__isnull=True).count(), 0)
+        self.assertTrue(User.objects.order_by('id').first().check_password('password'))
+        # Online drivers went through the heatmap trigger.
+        online = drivers.filter(is_online=True).count()
+        self.assertEqual(sum(HeatmapCell.objects.values_list('online', flat=True)), online)
+        # Sequences continue after the copied ids.
+        self.assertGreater(
+            User.objects.create_user(email='new@example.com', password='testpass123').id,
+            User.objects.exclude(email='new@example.com').latest('id').id,
+        )
+
+    def test_chunks_do_not_depend_on_load_order(self):
+        """Test chunks loaded in any order, as parallel workers do, give the same rows."""
+        regions, fleet_ids, document_ids = seeding.create_reference_data(3, 4, 2, 1)
+
+        def load(seed, order):
+            with transaction.atomic():
+                plan = seeding.build_plan(seed, 30, 10, regions, fleet_ids, document_ids, 'password')
+                for number in order:
+                    seeding.load_chunk(plan, number)
+                rows = snapshot()
+                transaction.set_rollback(True)
+            return rows
+
+        in_order = load(3, [0, 1, 2])
+
+        self.assertEqual(len(in_order[0]), 30)
+        self.assertEqual(load(3, [2, 0, 1]), in_order)
+        self.assertNotEqual(load(4, [0, 1, 2]), in_order)
+
+    def test_copy_escapes_text(self):
+        """Test COPY text format escapes are applied to generated values."""
+        self.assertEqual(seeding._copy_text('a\tb\\c\nd'), 'a\\tb\\\\c\\nd')
+        self.assertEqual(seeding._copy_text(None), '\\N')
+        self.assertEqual(seeding._copy_text(False), 'f')
@@ -0,0 +1,124 @@
+"""
+Tests for content-addressed media storage.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+
+from core.models import MediaBlob
+
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'a' * 1000
+OTHER_PNG = b'\x89PNG\r\n\x1a\n' + b'b' * 1000
+
+
+class ContentAddressedStorageTests(TestCase):
+    """Test uploads are stored once per content and reference counted."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.media_root)
+            for root, _, names in os.walk(self.media_root) for name in names
+        )
+
+    def test_identical_uploads_share_one_sharded_file(self):
+        """Test re-uploads of the same bytes are deduplicated by hash."""
+        digest = hashlib.sha256(PNG).hexdigest()
+
+        first = default_storage.save('uploads/user/a.PNG', ContentFile(PNG))
+        second = default_storage.save('uploads/user/b.png', ContentFile(PNG))
+        other = default_storage.save('uploads/user/c.png', ContentFile(OTHER_PNG))
+
+        self.assertEqual(first, f'uploads/user/{digest[:2]}/{digest[2:4]}/{digest}.png')
+        self.assertEqual(second, first)
+        self.assertNotEqual(other, first)
+        self.assertEqual(self.files(), sorted([first, other]))
+        self.assertEqual(MediaBlob.objects.get(name=first).refcount, 2)
+        self.assertEqual(MediaBlob.objects.get(name=first).size, len(PNG))
+
+    def test_file_removed_with_last_reference(self):
+        """Test delete() drops one reference and the file goes with the last."""
+        name = default_storage.save('uploads/user/a.png', ContentFile(PNG))
+        default_storage.save('uploads/user/a.png', ContentFile(PNG))
+
+        default_storage.delete(name)
+        self.assertTrue(default_storage.exists(name))
+        default_storage.delete(name)
+
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_large_upload_is_moved_not_copied(self):
+        """Test an upload spooled to disk is hashed in place and moved."""
+        upload = TemporaryUploadedFile('a.png', 'image/png', len(PNG), None)
+        upload.write(PNG)
+        upload.seek(0)
+
+        name = default_storage.save('uploads/user/a.png', upload)
+        upload.close()
+
+        self.assertEqual(name.rsplit('/', 1)[-1], f'{hashlib.sha256(PNG).hexdigest()}.png')
+        self.assertFalse(os.path.exists(upload.temporary_file_path()))
+        self.assertEqual(default_storage.open(name).read(), PNG)
+
+    def test_model_rows_hold_references(self):
+        """Test replacing or deleting a row's image releases its old file."""
+        users = [
+            get_user_model().objects.create_user(email=f'user{index}@example.com', password='testpass123')
+            for index in range(2)
+        ]
+        for user in users:
+            user.profile_image = SimpleUploadedFile('me.png', PNG, content_type='image/png')
+            user.save()
+        shared = users[0].profile_image.name
+        self.assertEqual(users[1].profile_image.name, shared)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user = get_user_model().objects.get(pk=users[0].pk)
+            user.profile_image = SimpleUploadedFile('new.png', OTHER_PNG, content_type='image/png')
+            user.save()
+        self.assertEqual(MediaBlob.objects.get(name=shared).refcount, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            get_user_model().objects.filter(pk=users[1].pk).delete()
+        self.assertFalse(default_storage.exists(shared))
+        self.assertEqual(self.files(), [user.profile_image.name])
+
+    def test_identical_reupload_keeps_one_reference(self):
+        """Test storing the same bytes again on a row does not add a reference."""
+        user = get_user_model().objects.create_user(email='user@example.com', password='testpass123')
+        with self.captureOnCommitCallbacks(execute=True):
+            user.profile_image = SimpleUploadedFile('me.png', PNG, content_type='image/png')
+            user.save()
+        name = user.profile_image.name
+
+        for _ in range(2):
+            with self.captureOnCommitCallbacks(execute=True):
+                user = get_user_model().objects.get(pk=user.pk)
+                user.profile_image = SimpleUploadedFile('retry.png', PNG, content_type='image/png')
+                user.save()
+            self.assertEqual(user.profile_image.name, name)
+            self.assertEqual(MediaBlob.objects.get(name=name).refcount, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.assertEqual(MediaBlob.objects.get(name=name).refcount, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user.delete()
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(MediaBlob.objects.exists())
@@ -0,0 +1,121 @@
+"""
+Tests for streaming uploads and header-only image checks.
+"""
+import io
+import os
+from unittest import mock
+
+from django.urls import reverse
+from django.test import RequestFactory, TestCase, override_settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+
+from PIL import Image, ImageFile
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app.utils.uploads import SpoolingUploadHandler, UploadTooLarge, sniff_image
+from driver.serializers import DriverSerializer
+
+
+def image_bytes(size=(120, 150), fmt='PNG'):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, fmt)
+    return buffer.getvalue()
+
+
+class UploadHandlerTests(TestCase):
+    """Test uploads are spooled to disk and capped."""
+
+    def test_small_files_are_spooled_to_disk(self):
+        """Test even a tiny upload is a temporary file, not a memory buffer."""
+        request = RequestFactory().post('/', {'file': SimpleUploadedFile('a.txt', b'hello')})
+
+        upload = request.FILES['file']
+
+        self.assertIsInstance(upload, TemporaryUploadedFile)
+        self.assertEqual(upload.read(), b'hello')
+
+    @override_settings(UPLOAD_MAX_REQUEST_SIZE=1000)
+    def test_oversized_request_refused_from_content_length(self):
+        """Test a request larger than the cap is refused before reading it."""
+        request = RequestFactory().post('/', {'file': SimpleUploadedFile('a.txt', b'x' * 2000)})
+
+        with self.assertRaises(UploadTooLarge):
+            request.FILES
+
+    @override_settings(UPLOAD_MAX_REQUEST_SIZE=1000)
+    def test_oversized_stream_refused_while_reading(self):
+        """Test bytes are counted as they arrive when Content-Length is missing."""
+        handler = SpoolingUploadHandler()
+        handler.handle_raw_input(None, {}, None, b'boundary')
+        handler.new_file('file', 'a.txt', 'text/plain', None)
+        handler.receive_data_chunk(b'x' * 600, 0)
+        path = handler.file.temporary_file_path()
+
+        with self.assertRaises(UploadTooLarge):
+            handler.receive_data_chunk(b'x' * 600, 600)
+        self.assertTrue(handler.file.closed)
+        self.assertFalse(os.path.exists(path))
+
+    @override_settings(UPLOAD_MAX_REQUEST_SIZE=1000)
+    def test_register_refuses_oversized_upload(self):
+        """Test an oversized upload to a public endpoint gets 413."""
+        cache.clear()
+        res = APIClient().post(reverse('driver:register_driver'), {
+            'email': 'driver@example.com',
+            'profile_image': SimpleUploadedFile('me.png', b'x' * 2000, content_type='image/png'),
+        }, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    def test_malformed_multipart_still_bad_request(self):
+        """Test other multipart errors keep their 400."""
+        cache.clear()
+        res = APIClient().post(
+            reverse('driver:register_driver'), b'--x\r\n',
+            content_type='multipart/form-data',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Multipart form parse error', res.data['detail'])
+
+
+class ImageSniffTests(TestCase):
+    """Test images are checked from their header without decoding."""
+
+    def test_sniff_reads_header_only(self):
+        """Test format and size come back without loading any pixel."""
+        for fmt, content_type in (('PNG', 'image/png'), ('JPEG', 'image/jpeg')):
+            file = io.BytesIO(image_bytes(fmt=fmt))
+            with mock.patch.object(ImageFile.ImageFile, 'load') as load:
+                info = sniff_image(file)
+
+            self.assertEqual(tuple(info), (fmt, content_type, 120, 150))
+            load.assert_not_called()
+            self.assertEqual(file.tell(), 0)
+
+    def test_sniff_rejects_other_files(self):
+        """Test non-image content is rejected whatever it claims to be."""
+        with self.assertRaises(ValueError):
+            sniff_image(io.BytesIO(b'%PDF-1.4 not an image'))
+
+    def test_profile_image_checks(self):
+        """Test the profile image type, size and dimensions are validated."""
+        cases = [
+            (image_bytes(), None),
+            (image_bytes(size=(50, 150)), 'Image dimensions must be at least 100x100 px.'),
+            (b'GIF89a' + b'\0' * 100, 'File must be an image.'),
+            (b'\x89PNG' + b'\0' * (1024 * 1024), 'Image file size must be under 1 MB.'),
+        ]
+        for content, error in cases:
+            upload = SimpleUploadedFile('me.png', content, content_type='text/plain')
+            serializer = DriverSerializer(data={'profile_image': upload})
+            serializer.is_valid()
+
+            if error is None:
+                self.assertNotIn('profile_image', serializer.errors)
+                self.assertEqual(upload.content_type, 'image/png')
+                self.assertEqual(upload.image_info.width, 120)
+            else:
+                self.assertEqual(serializer.errors['profile_image'], [error])
@@ -0,0 +1,125 @@
+"""
+Supply heatmap: online and available drivers per cell of a lat/lng grid.
+
+Cell counts live in ``HeatmapCell`` and are moved by a trigger on the user
+table as drivers report locations or change state, so no request ever
+aggregates users. Each process keeps a snapshot of the non-empty cells,
+sorted by cell, and serves tiles from it; the snapshot is reloaded with
+one small scan once it is ``HEATMAP_SNAPSHOT_TTL`` seconds old.
+
+The cells count every fleet. Staff confined to a fleet get
+``fleet_tile()`` instead, one GROUP BY over their fleet's online drivers
+in the box.
+"""
+import bisect
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Floor
+
+from core.models import HeatmapCell
+
+
+User = get_user_model()
+
+CELL_DEGREES = Decimal(HeatmapCell.CELL_DEGREES)
+
+REBUILD_SQL = f"""
+INSERT INTO {HeatmapCell._meta.db_table} (cell_lat, cell_lng, online, available, updated_at)
+SELECT floor(latitude / %(cell)s), floor(longitude / %(cell)s),
+       COUNT(*), COUNT(*) FILTER (WHERE is_available), now()
+FROM {User._meta.db_table}
+WHERE user_type = %(driver)s AND is_online AND latitude IS NOT NULL AND longitude IS NOT NULL
+GROUP BY 1, 2
+"""
+
+_snapshot = {}
+
+
+def cell_index(value):
+    """Return the grid index of a latitude or longitude."""
+    return int((Decimal(str(value)) / CELL_DEGREES).to_integral_value(rounding='ROUND_FLOOR'))
+
+
+def rebuild():
+    """Recount every cell from the user table with one GROUP BY.
+
+    Fixes any drift from writes that bypassed the trigger. The cell table
+    is locked against trigger writes meanwhile, so driver updates wait for
+    the rebuild instead of being lost. Returns the number of cells.
+    """
+    table = connection.ops.quote_name(HeatmapCell._meta.db_table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {table} IN EXCLUSIVE MODE')
+        cursor.execute(f'DELETE FROM {table}')
+        cursor.execute(REBUILD_SQL, {'cell': CELL_DEGREES, 'driver': User.UserTypeChoices.DRIVER})
+        cells = cursor.rowcount
+    _snapshot.clear()
+    return cells
+
+
+def snapshot():
+    """Return the non-empty cells as a sorted tuple of
+    ``(cell_lat, cell_lng, online, available)``, reloading when stale."""
+    now = time.monotonic()
+    if now - _snapshot.get('loaded_at', float('-inf')) >= settings.HEATMAP_SNAPSHOT_TTL:
+        cells = tuple(
+            HeatmapCell.objects
+            .filter(online__gt=0)
+            .order_by('cell_lat', 'cell_lng')
+            .values_list('cell_lat', 'cell_lng', 'online', 'available')
+        )
+        _snapshot.update(loaded_at=now, cells=cells, keys=[cell[:2] for cell in cells])
+    return _snapshot['cells']
+
+
+def tile(min_lat, max_lat, min_lng, max_lng):
+    """Return the snapshot cells overlapping a bounding box."""
+    cells = snapshot()
+    keys = _snapshot['keys']
+    lat_low, lat_high = cell_index(min_lat), cell_index(max_lat)
+    lng_low, lng_high = cell_index(min_lng), cell_index(max_lng)
+    found = []
+    # Cells are sorted by (lat, lng), so the box's rows form one slice.
+    start = bisect.bisect_left(keys, (lat_low, lng_low))
+    end = bisect.bisect_right(keys, (lat_high, lng_high))
+    for cell in cells[start:end]:
+        if lng_low <= cell[1] <= lng_high:
+            found.append(cell)
+    return found
+
+
+def fleet_tile(fleet_id, min_lat, max_lat, min_lng, max_lng):
+    """Return the cells of a bounding box counting only ``fleet_id``'s drivers.
+
+    Covers the same whole cells as ``tile()``, in the same shape.
+    """
+    lat_low, lat_high = cell_index(min_lat), cell_index(max_lat)
+    lng_low, lng_high = cell_index(min_lng), cell_index(max_lng)
+    cells = (
+        User.objects.unscoped()
+        .filter(
+            fleet_id=fleet_id,
+            user_type=User.UserTypeChoices.DRIVER,
+            is_online=True,
+            latitude__gte=lat_low * CELL_DEGREES,
+            latitude__lt=(lat_high + 1) * CELL_DEGREES,
+            longitude__gte=lng_low * CELL_DEGREES,
+            longitude__lt=(lng_high + 1) * CELL_DEGREES,
+        )
+        .annotate(cell_lat=Floor(F('latitude') / CELL_DEGREES), cell_lng=Floor(F('longitude') / CELL_DEGREES))
+        .values('cell_lat', 'cell_lng')
+        .annotate(online=Count('pk'), available=Count('pk', filter=Q(is_available=True)))
+        .order_by('cell_lat', 'cell_lng')
+        .values_list('cell_lat', 'cell_lng', 'online', 'available')
+    )
+    return [(int(cell_lat), int(cell_lng), online, available) for cell_lat, cell_lng, online, available in cells]
+
+
+def cell_origin(cell):
+    """Return the south-west corner of a cell in degrees."""
+    return float(cell[0] * CELL_DEGREES), float(cell[1] * CELL_DEGREES)
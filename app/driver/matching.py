@@ -0,0 +1,112 @@
+"""
+Match a pickup point to the best online, available driver.
+"""
+import math
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.functions import Now
+from django.utils import timezone
+
+from app.utils.geo import haversine_km
+
+
+User = get_user_model()
+
+KM_PER_DEGREE = 111.32
+
+
+@dataclass
+class Match:
+    driver_id: int
+    distance_km: float
+    score: float
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """Return ``(min_lat, max_lat, min_lng, max_lng)`` around a point."""
+    lat_delta = radius_km / KM_PER_DEGREE
+    lng_delta = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+    return latitude - lat_delta, latitude + lat_delta, longitude - lng_delta, longitude + lng_delta
+
+
+def dispatchable_drivers():
+    """Drivers who can take a ride now; matches the partial dispatch index."""
+    return User.objects.filter(
+        user_type=User.UserTypeChoices.DRIVER,
+        is_online=True,
+        is_available=True,
+        is_verified_driver=True,
+    )
+
+
+def find_candidates(latitude, longitude, service_id, radius_km, fleet_id=None, limit=None, exclude_id=None):
+    """Return scored candidates within ``radius_km``, best first.
+
+    The score adds the distance, as a share of the radius, to how stale the
+    driver's last position is, as a share of ``DISPATCH_MAX_LOCATION_AGE``.
+    Drivers whose position is older than that are skipped, and so is
+    ``exclude_id``, the requester when a driver asks for a ride.
+    """
+    latitude, longitude = float(latitude), float(longitude)
+    min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_km)
+    queryset = dispatchable_drivers().filter(
+        service_id=service_id,
+        latitude__range=(min_lat, max_lat),
+        longitude__range=(min_lng, max_lng),
+    )
+    if fleet_id is not None:
+        queryset = queryset.filter(fleet_id=fleet_id)
+    if exclude_id is not None:
+        queryset = queryset.exclude(pk=exclude_id)
+
+    now = timezone.now()
+    max_age = settings.DISPATCH_MAX_LOCATION_AGE
+    candidates = []
+    for driver_id, driver_lat, driver_lng, updated_at in queryset.values_list(
+        'id', 'latitude', 'longitude', 'last_location_update_at',
+    ):
+        age = (now - updated_at).total_seconds() if updated_at else max_age
+        if age >= max_age:
+            continue
+        distance = haversine_km(latitude, longitude, driver_lat, driver_lng)
+        if distance > radius_km:
+            continue
+        score = distance / radius_km + settings.DISPATCH_STALENESS_WEIGHT * age / max_age
+        candidates.append(Match(driver_id, distance, score))
+
+    candidates.sort(key=lambda match: match.score)
+    return candidates[:limit] if limit else candidates
+
+
+def reserve_driver(driver_id):
+    """Atomically take a driver out of the available pool.
+
+    The UPDATE only matches while the driver is still available, and row
+    locking makes concurrent reservations of one driver serialize, so at
+    most one caller ever gets True.
+    """
+    return dispatchable_drivers().filter(pk=driver_id).update(is_available=False, updated_at=Now()) == 1
+
+
+def release_driver(driver_id):
+    """Put a reserved driver back in the available pool."""
+    User.objects.filter(pk=driver_id, is_online=True).update(is_available=True, updated_at=Now())
+
+
+def match_driver(latitude, longitude, service_id, fleet_id=None, exclude_id=None):
+    """Reserve and return the best driver for a pickup, or None.
+
+    The search widens through ``DISPATCH_SEARCH_RADII_KM`` until a driver
+    is reserved; candidates lost to a concurrent request are skipped.
+    """
+    for radius_km in settings.DISPATCH_SEARCH_RADII_KM:
+        candidates = find_candidates(
+            latitude, longitude, service_id, radius_km,
+            fleet_id=fleet_id, limit=settings.DISPATCH_MAX_CANDIDATES, exclude_id=exclude_id,
+        )
+        for candidate in candidates:
+            if reserve_driver(candidate.driver_id):
+                return candidate
+    return None
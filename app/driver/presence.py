@@ -0,0 +1,56 @@
+"""
+Mark online drivers offline once their location reports stop.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.functions import Now
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from app.utils import metrics
+
+
+User = get_user_model()
+
+
+def stale_drivers(max_age):
+    """Online drivers whose last report is older than ``max_age`` seconds."""
+    cutoff = timezone.now() - timedelta(seconds=max_age)
+    return User.objects.filter(
+        Q(last_location_update_at__lt=cutoff) | Q(last_location_update_at__isnull=True),
+        is_online=True,
+        user_type=User.UserTypeChoices.DRIVER,
+    )
+
+
+def sweep_batch(max_age, batch_size):
+    """Take up to ``batch_size`` stale drivers offline in one UPDATE.
+
+    The ids come from the partial ``user_online_seen_idx`` index. The outer
+    filter is checked again when each row is locked, so a driver who
+    reported in the meantime stays online.
+    """
+    stale = stale_drivers(max_age)
+    ids = stale.order_by().values('pk')[:batch_size]
+    return stale.filter(pk__in=ids).update(is_online=False, is_available=False, updated_at=Now())
+
+
+def sweep_stale_drivers(max_age=None, batch_size=1000):
+    """Sweep every stale driver in batches and record the sweep metrics."""
+    max_age = settings.PRESENCE_TIMEOUT_SECONDS if max_age is None else max_age
+    start = time.perf_counter()
+    total = 0
+    while True:
+        swept = sweep_batch(max_age, batch_size)
+        total += swept
+        if swept < batch_size:
+            break
+    elapsed = time.perf_counter() - start
+
+    metrics.incr('presence.swept', total)
+    metrics.observe('presence.sweep', elapsed)
+    metrics.gauge('presence.last_sweep', {'at': timezone.now().isoformat(), 'swept': total, 'seconds': round(elapsed, 4)})
+    return total, elapsed
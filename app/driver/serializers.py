@@ -1,6 +1,8 @@
 import re
 import pytz
+from datetime import timedelta
 
+from django.conf import settings
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
@@ -8,6 +10,8 @@ from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from app.utils.uploads import ImageUploadField
+
 
 User = get_user_model()
 
@@ -18,6 +22,8 @@ class DriverSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=6, style={'input_type': 'password'})
     confirm_password = serializers.CharField(write_only=True, required=True, min_length=6, style={'input_type': 'password'})
     phone_number = serializers.CharField(required=True)
+    # Type, size and dimensions are checked from the file header, without decoding it.
+    profile_image = ImageUploadField(required=False, allow_null=True, max_size=1024 * 1024, min_dimensions=(100, 100))
 
     class Meta:
         model = User
@@ -58,20 +64,6 @@ class DriverSerializer(serializers.ModelSerializer):
             if gender not in User.GenderUnitChoices.values:
                 raise serializers.ValidationError(_('Invalid gender choice.'))
 
-        profile_image = data.get('profile_image')
-        if profile_image:
-            # Check if the uploaded file is an image
-            if not profile_image.content_type.startswith('image'):
-                raise serializers.ValidationError(_('File must be an image.'))
-
-            # Check if the image is too large
-            if profile_image.size > (1024 * 1024):
-                raise serializers.ValidationError(_('Image file size must be under 1 MB.'))
-
-            # Check if the image is too small
-            if profile_image.width < 100 or profile_image.height < 100:
-                raise serializers.ValidationError(_('Image dimensions must be at least 100x100 px.'))
-
         timezone_data = data.get('timezone')
         if timezone_data:
             try:
@@ -151,3 +143,53 @@ class MyTokenObtainPairSerializer(serializers.Serializer):
         user_data = DriverSerializer(user).data
 
         token['user'] = user_data
+
+
+class DriverMatchSerializer(serializers.Serializer):
+    latitude = serializers.DecimalField(max_digits=9, decimal_places=6, min_value=-90, max_value=90)
+    longitude = serializers.DecimalField(max_digits=9, decimal_places=6, min_value=-180, max_value=180)
+    service_id = serializers.IntegerField(min_value=1)
+    fleet_id = serializers.IntegerField(required=False, min_value=1)
+
+
+class DriverLocationSerializer(serializers.Serializer):
+    latitude = serializers.DecimalField(max_digits=9, decimal_places=6, min_value=-90, max_value=90)
+    longitude = serializers.DecimalField(max_digits=9, decimal_places=6, min_value=-180, max_value=180)
+    recorded_at = serializers.DateTimeField(required=False)
+
+    def validate_recorded_at(self, value):
+        if value > timezone.now() + timedelta(minutes=1):
+            raise serializers.ValidationError(_('Location time cannot be in the future.'))
+        return value
+
+
+class DriverTrackQuerySerializer(serializers.Serializer):
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+
+    def validate(self, data):
+        data.setdefault('end', timezone.now())
+        data.setdefault('start', data['end'] - timedelta(hours=1))
+        if data['start'] >= data['end']:
+            raise serializers.ValidationError(_('Start must be before end.'))
+        if (data['end'] - data['start']).total_seconds() > settings.TRACK_MAX_QUERY_SECONDS:
+            raise serializers.ValidationError(_('Requested range is too long.'))
+        return data
+
+
+class HeatmapQuerySerializer(serializers.Serializer):
+    region_id = serializers.IntegerField(required=False)
+    min_lat = serializers.FloatField(required=False, min_value=-90, max_value=90)
+    max_lat = serializers.FloatField(required=False, min_value=-90, max_value=90)
+    min_lng = serializers.FloatField(required=False, min_value=-180, max_value=180)
+    max_lng = serializers.FloatField(required=False, min_value=-180, max_value=180)
+
+    def validate(self, data):
+        box = [data.get(name) for name in ('min_lat', 'max_lat', 'min_lng', 'max_lng')]
+        if 'region_id' in data:
+            return data
+        if None in box:
+            raise serializers.ValidationError(_('Provide a region or a full bounding box.'))
+        if box[0] > box[1] or box[2] > box[3]:
+            raise serializers.ValidationError(_('Invalid bounding box.'))
+        return data
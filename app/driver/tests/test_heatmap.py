@@ -0,0 +1,179 @@
+"""
+Tests for the driver supply heatmap.
+"""
+from io import StringIO
+from unittest import mock
+
+from django.urls import reverse
+from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Fleet, HeatmapCell, Regions
+from driver import heatmap
+from driver.matching import reserve_driver
+from driver.presence import sweep_stale_drivers
+
+
+HEATMAP_URL = reverse('driver:heatmap')
+
+User = get_user_model()
+
+
+def create_driver(email, latitude, longitude, **params):
+    """Create an online, available driver at a point."""
+    defaults = {'user_type': 'driver', 'is_online': True, 'is_available': True, 'is_verified_driver': True}
+    defaults.update(params)
+    return User.objects.create_user(
+        email=email, password='testpass123', latitude=latitude, longitude=longitude, **defaults,
+    )
+
+
+def cells():
+    """Return the stored non-empty cells as ``{(lat, lng): (online, available)}``."""
+    return {
+        (cell_lat, cell_lng): (online, available)
+        for cell_lat, cell_lng, online, available in HeatmapCell.objects.exclude(online=0, available=0)
+        .values_list('cell_lat', 'cell_lng', 'online', 'available')
+    }
+
+
+class HeatmapCountTests(TestCase):
+    """Test cell counts follow driver writes."""
+
+    def test_counts_online_drivers_per_cell(self):
+        """Test drivers are counted in the cell holding their position."""
+        create_driver('a@example.com', '48.856600', '2.352200')
+        create_driver('b@example.com', '48.859900', '2.350000', is_available=False)
+        create_driver('c@example.com', '-33.868800', '151.209300')
+        create_driver('offline@example.com', '48.856600', '2.352200', is_online=False)
+        create_driver('rider@example.com', '48.856600', '2.352200', user_type='rider')
+
+        self.assertEqual(cells(), {(4885, 235): (2, 1), (-3387, 15120): (1, 1)})
+
+    def test_moves_and_toggles(self):
+        """Test moving, going unavailable, offline and deleting adjust counts."""
+        driver = create_driver('a@example.com', '48.856600', '2.352200')
+
+        User.objects.filter(pk=driver.pk).update(latitude='48.856700')
+        self.assertEqual(cells(), {(4885, 235): (1, 1)})
+
+        User.objects.filter(pk=driver.pk).update(latitude='48.870000', longitude='2.360000')
+        self.assertEqual(cells(), {(4887, 236): (1, 1)})
+
+        self.assertTrue(reserve_driver(driver.pk))
+        self.assertEqual(cells(), {(4887, 236): (1, 0)})
+
+        User.objects.filter(pk=driver.pk).update(is_online=False)
+        self.assertEqual(cells(), {})
+
+        User.objects.filter(pk=driver.pk).update(is_online=True, is_available=True)
+        self.assertEqual(cells(), {(4887, 236): (1, 1)})
+
+        driver.delete()
+        self.assertEqual(cells(), {})
+
+    def test_bulk_sweep_updates_counts(self):
+        """Test the presence sweep's bulk updates leave the heatmap in step."""
+        for index in range(3):
+            create_driver(f'driver{index}@example.com', '48.856600', '2.352200')
+        User.objects.update(last_location_update_at=None)
+
+        sweep_stale_drivers(max_age=300)
+
+        self.assertEqual(cells(), {})
+
+    def test_rebuild_fixes_drift(self):
+        """Test the rebuild command recounts cells from the user table."""
+        create_driver('a@example.com', '48.856600', '2.352200')
+        HeatmapCell.objects.update(online=7, available=-2)
+        HeatmapCell.objects.create(cell_lat=1, cell_lng=1, online=3)
+        out = StringIO()
+
+        call_command('rebuild_heatmap', stdout=out)
+
+        self.assertIn('Rebuilt 1 heatmap cells', out.getvalue())
+        self.assertEqual(cells(), {(4885, 235): (1, 1)})
+
+
+class HeatmapTileTests(TestCase):
+    """Test serving tiles from the snapshot."""
+
+    def setUp(self):
+        cache.clear()
+        heatmap._snapshot.clear()
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(
+            email='admin@example.com', password='testpass123', username='admin', user_type='admin',
+        )
+        self.client.force_authenticate(self.admin)
+        create_driver('a@example.com', '48.856600', '2.352200')
+        create_driver('b@example.com', '48.866600', '2.302200', is_available=False)
+        create_driver('c@example.com', '-33.868800', '151.209300')
+
+    def test_tile_filters_bounding_box(self):
+        """Test only cells inside the box are returned."""
+        tile = heatmap.tile(48.85, 48.859, 2.31, 2.36)
+
+        self.assertEqual(tile, [(4885, 235, 1, 1)])
+
+    def test_fleet_tile_counts_one_fleet(self):
+        """Test a fleet's tile covers the same cells as the snapshot, counting only that fleet."""
+        fleet = Fleet.objects.create(name='North')
+        User.objects.update(fleet=fleet)
+        boxes = [(48.85, 48.859, 2.31, 2.36), (48, 49, 2, 3), (-34, -33, 151, 152)]
+        expected = [heatmap.tile(*box) for box in boxes]
+        create_driver('d@example.com', '48.856600', '2.352200')
+        heatmap._snapshot.clear()
+
+        with self.assertNumQueries(1):
+            heatmap.fleet_tile(fleet.id, *boxes[1])
+        self.assertEqual([heatmap.fleet_tile(fleet.id, *box) for box in boxes], expected)
+        self.assertEqual(heatmap.tile(*boxes[0]), [(4885, 235, 2, 2)])
+
+    def test_snapshot_is_reused_until_stale(self):
+        """Test tiles are served from memory until the TTL passes."""
+        heatmap.snapshot()
+        create_driver('d@example.com', '48.856600', '2.352200')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(heatmap.tile(48.85, 48.86, 2.35, 2.36), [(4885, 235, 1, 1)])
+
+        with mock.patch('driver.heatmap.time.monotonic', return_value=heatmap._snapshot['loaded_at'] + 60):
+            self.assertEqual(heatmap.tile(48.85, 48.86, 2.35, 2.36), [(4885, 235, 2, 2)])
+
+    def test_region_endpoint(self):
+        """Test a region's tile covers cells around its centre."""
+        paris = Regions.objects.create(name='Paris', coordinates='48.8566,2.3522')
+
+        res = self.client.get(HEATMAP_URL, {'region_id': paris.pk})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(res.data['data']['cells']),
+            [[48.85, 2.35, 1, 1], [48.86, 2.3, 1, 0]],
+        )
+
+    def test_bounding_box_endpoint(self):
+        """Test a bounding box query and its validation."""
+        res = self.client.get(HEATMAP_URL, {'min_lat': -34, 'max_lat': -33, 'min_lng': 151, 'max_lng': 152})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['data']['cells'], [[-33.87, 151.2, 1, 1]])
+
+        res = self.client.get(HEATMAP_URL, {'min_lat': -34})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(HEATMAP_URL, {'region_id': 999})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_requires_admin(self):
+        """Test non-staff users cannot read the heatmap."""
+        self.client.force_authenticate(create_driver('d@example.com', '1', '1'))
+
+        res = self.client.get(HEATMAP_URL, {'region_id': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
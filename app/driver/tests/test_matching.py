@@ -0,0 +1,181 @@
+"""
+Tests for driver dispatch.
+"""
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from django.test import TestCase, TransactionTestCase
+from django.contrib.auth import get_user_model
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Fleet
+from driver.matching import find_candidates, match_driver, release_driver, reserve_driver
+
+
+MATCH_URL = reverse('driver:match')
+
+PICKUP = (48.8566, 2.3522)
+
+
+def create_driver(email, latitude, longitude, service_id=1, age=0, **params):
+    """Create a dispatchable driver whose position is ``age`` seconds old."""
+    defaults = {
+        'user_type': 'driver',
+        'is_online': True,
+        'is_available': True,
+        'is_verified_driver': True,
+        'service_id': service_id,
+        'latitude': latitude,
+        'longitude': longitude,
+    }
+    defaults.update(params)
+    driver = get_user_model().objects.create_user(email=email, password='testpass123', **defaults)
+    get_user_model().objects.filter(pk=driver.pk).update(
+        last_location_update_at=timezone.now() - timedelta(seconds=age),
+    )
+    return driver
+
+
+class MatchingTests(TestCase):
+    """Test candidate selection and reservation."""
+
+    def test_nearest_fresh_driver_wins(self):
+        """Test candidates are ranked by distance and location age."""
+        near = create_driver('near@example.com', 48.857, 2.353)
+        stale = create_driver('stale@example.com', 48.8567, 2.3523, age=110)
+        far = create_driver('far@example.com', 48.87, 2.37)
+
+        ranked = [match.driver_id for match in find_candidates(*PICKUP, service_id=1, radius_km=5)]
+
+        self.assertEqual(ranked, [near.id, far.id, stale.id])
+
+    def test_ineligible_drivers_are_skipped(self):
+        """Test offline, busy, other-service, ghost and distant drivers are ignored."""
+        create_driver('offline@example.com', 48.857, 2.353, is_online=False)
+        create_driver('busy@example.com', 48.857, 2.353, is_available=False)
+        create_driver('unverified@example.com', 48.857, 2.353, is_verified_driver=False)
+        create_driver('other@example.com', 48.857, 2.353, service_id=2)
+        create_driver('ghost@example.com', 48.857, 2.353, age=600)
+        create_driver('distant@example.com', 49.5, 3.0)
+
+        self.assertEqual(find_candidates(*PICKUP, service_id=1, radius_km=10), [])
+        self.assertIsNone(match_driver(*PICKUP, service_id=1))
+
+    def test_search_widens_until_a_driver_is_found(self):
+        """Test a driver outside the first radius is still matched."""
+        driver = create_driver('outer@example.com', 48.9, 2.3522)
+
+        match = match_driver(*PICKUP, service_id=1)
+
+        self.assertEqual(match.driver_id, driver.id)
+        self.assertAlmostEqual(match.distance_km, 4.8, places=1)
+
+    def test_reserve_is_exclusive(self):
+        """Test a driver can be reserved once until released."""
+        driver = create_driver('driver@example.com', *PICKUP)
+
+        self.assertTrue(reserve_driver(driver.id))
+        self.assertFalse(reserve_driver(driver.id))
+        release_driver(driver.id)
+        self.assertTrue(reserve_driver(driver.id))
+
+    def test_fleet_filter(self):
+        """Test a fleet-restricted match only considers that fleet."""
+        fleets = [Fleet.objects.create(name=name) for name in ('a', 'b')]
+        create_driver('a@example.com', 48.857, 2.353, fleet=fleets[0])
+        driver = create_driver('b@example.com', 48.86, 2.36, fleet=fleets[1])
+
+        self.assertEqual(match_driver(*PICKUP, service_id=1, fleet_id=fleets[1].id).driver_id, driver.id)
+
+    def test_excluded_driver_is_skipped(self):
+        """Test the requester is never their own candidate."""
+        requester = create_driver('requester@example.com', *PICKUP)
+        other = create_driver('other@example.com', 48.86, 2.36)
+
+        ranked = [match.driver_id for match in find_candidates(*PICKUP, service_id=1, radius_km=5, exclude_id=requester.id)]
+
+        self.assertEqual(ranked, [other.id])
+        self.assertEqual(match_driver(*PICKUP, service_id=1, exclude_id=requester.id).driver_id, other.id)
+
+    def test_candidate_query_uses_dispatch_index(self):
+        """Test the bounding-box lookup can use the partial dispatch index."""
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = get_user_model().objects.filter(
+            user_type='driver', is_online=True, is_available=True, is_verified_driver=True,
+            service_id=1, latitude__range=(48, 49), longitude__range=(2, 3),
+        ).explain()
+
+        self.assertIn('user_dispatchable_idx', plan)
+
+
+class MatchEndpointTests(TestCase):
+    """Test the match endpoint."""
+
+    def setUp(self):
+        self.dispatcher = get_user_model().objects.create_superuser(email='admin@example.com', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.dispatcher)
+
+    def test_match_reserves_driver(self):
+        """Test a match returns and reserves the driver."""
+        driver = create_driver('driver@example.com', 48.857, 2.353)
+
+        res = self.client.post(MATCH_URL, {'latitude': '48.8566', 'longitude': '2.3522', 'service_id': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['data']['driver_id'], driver.id)
+        driver.refresh_from_db()
+        self.assertFalse(driver.is_available)
+
+    def test_no_driver_available(self):
+        """Test a 404 is returned when nobody can be matched."""
+        res = self.client.post(MATCH_URL, {'latitude': '48.8566', 'longitude': '2.3522', 'service_id': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_riders_cannot_reserve_drivers(self):
+        """Test only staff can reserve a driver without a ride."""
+        driver = create_driver('driver@example.com', 48.857, 2.353)
+        rider = get_user_model().objects.create_user(email='rider@example.com', password='testpass123')
+        self.client.force_authenticate(rider)
+
+        res = self.client.post(MATCH_URL, {'latitude': '48.8566', 'longitude': '2.3522', 'service_id': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        driver.refresh_from_db()
+        self.assertTrue(driver.is_available)
+
+    def test_requires_authentication(self):
+        """Test anonymous callers are rejected."""
+        res = APIClient().post(MATCH_URL, {'latitude': '48.8566', 'longitude': '2.3522', 'service_id': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ConcurrentMatchingTests(TransactionTestCase):
+    """Test concurrent matches never share a driver."""
+
+    def test_no_driver_is_reserved_twice(self):
+        """Test more requests than drivers leave each driver with one rider."""
+        for index in range(5):
+            create_driver(f'driver{index}@example.com', 48.8566 + index * 0.001, 2.3522)
+
+        def request_match(_):
+            try:
+                match = match_driver(*PICKUP, service_id=1)
+                return match.driver_id if match else None
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(request_match, range(16)))
+
+        matched = [driver_id for driver_id in results if driver_id is not None]
+        self.assertEqual(len(matched), 5)
+        self.assertEqual(len(set(matched)), 5)
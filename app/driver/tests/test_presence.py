@@ -0,0 +1,87 @@
+"""
+Tests for the stale-presence sweeper.
+"""
+from datetime import timedelta
+from io import StringIO
+
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from driver.presence import stale_drivers, sweep_stale_drivers
+
+
+PRESENCE_METRICS_URL = reverse('driver:presence_metrics')
+
+User = get_user_model()
+
+
+def create_driver(email, age, **params):
+    """Create an online driver whose last report is ``age`` seconds old."""
+    defaults = {'user_type': 'driver', 'is_online': True, 'is_available': True}
+    defaults.update(params)
+    driver = User.objects.create_user(email=email, password='testpass123', **defaults)
+    seen = timezone.now() - timedelta(seconds=age) if age is not None else None
+    User.objects.filter(pk=driver.pk).update(last_location_update_at=seen)
+    return driver
+
+
+class PresenceSweepTests(TestCase):
+    """Test sweeping ghost drivers offline."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_sweeps_only_stale_drivers(self):
+        """Test drivers without a recent report go offline and unavailable."""
+        fresh = create_driver('fresh@example.com', 10)
+        stale = create_driver('stale@example.com', 600)
+        silent = create_driver('silent@example.com', None)
+        rider = create_driver('rider@example.com', 600, user_type='rider')
+
+        swept, _ = sweep_stale_drivers(max_age=300)
+
+        self.assertEqual(swept, 2)
+        online = dict(User.objects.values_list('email', 'is_online'))
+        self.assertEqual(online, {fresh.email: True, stale.email: False, silent.email: False, rider.email: True})
+        self.assertFalse(User.objects.get(pk=stale.pk).is_available)
+
+    def test_sweeps_in_batches(self):
+        """Test more stale drivers than one batch are all swept."""
+        for index in range(5):
+            create_driver(f'driver{index}@example.com', 600)
+
+        swept, _ = sweep_stale_drivers(max_age=300, batch_size=2)
+
+        self.assertEqual(swept, 5)
+        self.assertFalse(User.objects.filter(is_online=True).exists())
+
+    def test_stale_lookup_uses_index(self):
+        """Test finding stale drivers can use the partial presence index."""
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+        self.assertIn('user_online_seen_idx', stale_drivers(300).explain())
+
+    def test_command_and_metrics(self):
+        """Test the command reports each sweep and metrics are exposed."""
+        create_driver('stale@example.com', 600)
+        out = StringIO()
+
+        call_command('sweep_presence', '--once', stdout=out)
+
+        self.assertIn('Swept 1 drivers', out.getvalue())
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser(email='admin@example.com', password='testpass123', username='admin', user_type='admin'))
+        res = client.get(PRESENCE_METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['swept'], 1)
+        self.assertEqual(res.data['sweeps']['count'], 1)
+        self.assertEqual(res.data['last_sweep']['swept'], 1)
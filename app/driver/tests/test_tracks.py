@@ -0,0 +1,120 @@
+"""
+Tests for driver location tracks.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.urls import reverse
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import DriverTrack
+from driver.tracks import append_fix, decode_fixes, decode_varints, encode_fixes, encode_varints, track_points
+
+
+LOCATION_URL = reverse('driver:location')
+
+User = get_user_model()
+
+START = datetime(2024, 5, 1, 8, 0, tzinfo=dt_timezone.utc)
+
+
+def track_url(driver_id):
+    return reverse('driver:track', args=[driver_id])
+
+
+class TrackEncodingTests(TestCase):
+    """Test the chunk encoding."""
+
+    def test_varints_round_trip(self):
+        """Test signed values survive zigzag varint encoding."""
+        values = [0, 1, -1, 63, -64, 64, 300, -300, 2 ** 40, -(2 ** 40)]
+
+        self.assertEqual(list(decode_varints(encode_varints(values))), values)
+        self.assertEqual(len(encode_varints([5, -20, 31])), 3)
+
+    def test_fixes_round_trip(self):
+        """Test fixes decode back to the same values."""
+        origin = (1714550400, 0, 0)
+        fixes = [(1714550405, 48856600, 2352200), (1714550410, 48856650, 2352150), (1714550400, -33868800, 151209300)]
+
+        self.assertEqual(list(decode_fixes(encode_fixes(fixes, origin), origin)), fixes)
+
+
+class TrackStorageTests(TestCase):
+    """Test appending and querying tracks."""
+
+    def setUp(self):
+        self.driver = User.objects.create_user(email='driver@example.com', password='testpass123', user_type='driver')
+
+    def test_fixes_share_one_chunk_per_window(self):
+        """Test fixes in one window append to a single compact row."""
+        for second in range(0, 600, 5):
+            append_fix(self.driver.id, START.timestamp() + second, 48.8566 + second / 1e5, 2.3522)
+        append_fix(self.driver.id, (START + timedelta(hours=1)).timestamp(), 48.9, 2.4)
+
+        chunks = DriverTrack.objects.order_by('window_start')
+        self.assertEqual([chunk.fix_count for chunk in chunks], [120, 1])
+        self.assertLess(len(chunks[0].data), 120 * 4)
+
+    def test_range_query(self):
+        """Test a range returns only its fixes, across windows, in order."""
+        times = [START + timedelta(minutes=minutes) for minutes in (10, 50, 70, 130)]
+        for index, moment in enumerate(times):
+            append_fix(self.driver.id, moment.timestamp(), 48.8566 + index / 1000, '2.352200')
+
+        points = list(track_points(self.driver.id, times[1], times[3]))
+
+        self.assertEqual([point.timestamp for point in points], [int(times[1].timestamp()), int(times[2].timestamp())])
+        self.assertEqual((points[0].latitude, points[0].longitude), (48.8576, 2.3522))
+
+    def test_late_fix_returned_in_time_order(self):
+        """Test a fix reported after newer ones still comes back in order."""
+        for second in (0, 20, 40):
+            append_fix(self.driver.id, START.timestamp() + second, 48.8566, 2.3522)
+        append_fix(self.driver.id, START.timestamp() + 10, 48.8570, 2.3522)
+
+        points = list(track_points(self.driver.id, START, START + timedelta(minutes=1)))
+
+        self.assertEqual([point.timestamp - START.timestamp() for point in points], [0, 10, 20, 40])
+        self.assertEqual(points[1].latitude, 48.857)
+
+
+class DriverLocationApiTests(TestCase):
+    """Test the location and track endpoints."""
+
+    def setUp(self):
+        self.driver = User.objects.create_user(email='driver@example.com', password='testpass123', user_type='driver')
+        self.client = APIClient()
+        self.client.force_authenticate(self.driver)
+
+    def test_location_updates_position_and_track(self):
+        """Test a report moves the driver and shows in their track."""
+        res = self.client.post(LOCATION_URL, {'latitude': '48.856600', 'longitude': '2.352200'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.driver.refresh_from_db()
+        self.assertEqual(str(self.driver.latitude), '48.856600')
+        res = self.client.get(track_url(self.driver.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([point[1:] for point in res.data['data']['points']], [[48.8566, 2.3522]])
+
+    def test_late_report_does_not_move_driver(self):
+        """Test an older report is tracked without replacing the position."""
+        self.client.post(LOCATION_URL, {'latitude': '48.856600', 'longitude': '2.352200'})
+        recorded_at = (datetime.now(dt_timezone.utc) - timedelta(minutes=5)).isoformat()
+        self.client.post(LOCATION_URL, {'latitude': '40.000000', 'longitude': '3.000000', 'recorded_at': recorded_at})
+
+        self.driver.refresh_from_db()
+        self.assertEqual(str(self.driver.latitude), '48.856600')
+        self.assertEqual(sum(DriverTrack.objects.values_list('fix_count', flat=True)), 2)
+
+    def test_track_access(self):
+        """Test riders cannot report positions or read other tracks."""
+        rider = User.objects.create_user(email='rider@example.com', password='testpass123', user_type='rider')
+        self.client.force_authenticate(rider)
+
+        self.assertEqual(self.client.post(LOCATION_URL, {'latitude': '1', 'longitude': '1'}).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.get(track_url(self.driver.id)).status_code, status.HTTP_403_FORBIDDEN)
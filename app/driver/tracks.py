@@ -0,0 +1,159 @@
+"""
+Driver breadcrumbs stored as delta-encoded chunks, one row per driver and
+time window.
+
+A fix is ``(unix seconds, latitude, longitude)`` with positions kept in
+microdegrees (about 11 cm). Each chunk stores, per fix, the deltas from the
+previous fix as zigzag varints, so a driver reporting every few seconds
+costs around three bytes per fix instead of a table row.
+"""
+import math
+from collections import namedtuple
+from operator import itemgetter
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Value
+from django.db.models.expressions import CombinedExpression
+from django.db.models.functions import Now
+
+from core.models import DriverTrack
+
+
+MICRODEGREES = 1_000_000
+
+Fix = namedtuple('Fix', ['timestamp', 'latitude', 'longitude'])
+
+
+def encode_varints(values):
+    """Encode signed integers as zigzag varints."""
+    out = bytearray()
+    for value in values:
+        value = (value << 1) ^ (value >> 63)
+        while value > 0x7F:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+
+def decode_varints(data):
+    """Yield the signed integers of a zigzag varint stream."""
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        yield (value >> 1) ^ -(value & 1)
+        value = shift = 0
+
+
+def to_microdegrees(value):
+    return round(float(value) * MICRODEGREES)
+
+
+def window_start(timestamp):
+    """Return the start of the track window holding a unix timestamp."""
+    window = settings.TRACK_WINDOW_SECONDS
+    return datetime.fromtimestamp(timestamp - timestamp % window, dt_timezone.utc)
+
+
+def encode_fixes(fixes, origin):
+    """Encode ``(seconds, lat_e6, lng_e6)`` fixes as deltas from ``origin``."""
+    values = []
+    previous_ts, previous_lat, previous_lng = origin
+    for timestamp, latitude, longitude in fixes:
+        values += (timestamp - previous_ts, latitude - previous_lat, longitude - previous_lng)
+        previous_ts, previous_lat, previous_lng = timestamp, latitude, longitude
+    return encode_varints(values)
+
+
+def decode_fixes(data, origin):
+    """Lazily yield ``(seconds, lat_e6, lng_e6)`` fixes from a chunk."""
+    # decode_varints inlined: this loop runs once per byte of every query.
+    fix = list(origin)
+    field = value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        fix[field] += (value >> 1) ^ -(value & 1)
+        value = shift = 0
+        if field == 2:
+            yield tuple(fix)
+            field = 0
+        else:
+            field += 1
+
+
+def chunk_origin(window):
+    return int(window.timestamp()), 0, 0
+
+
+def append_fix(driver_id, timestamp, latitude, longitude):
+    """Append one fix to the driver's chunk for its window.
+
+    Only the chunk's last fix is read, under a row lock so concurrent
+    reports of one driver stay consistent; the encoded delta is appended
+    in the database with ``||`` without fetching the chunk.
+    """
+    timestamp = int(timestamp)
+    fix = (timestamp, to_microdegrees(latitude), to_microdegrees(longitude))
+    window = window_start(timestamp)
+    chunk = DriverTrack.objects.filter(driver_id=driver_id, window_start=window)
+    last_fix = ('pk', 'last_timestamp', 'last_latitude', 'last_longitude')
+    with transaction.atomic():
+        track = chunk.select_for_update().values_list(*last_fix).first()
+        if track is None:
+            try:
+                with transaction.atomic():
+                    DriverTrack.objects.create(
+                        driver_id=driver_id,
+                        window_start=window,
+                        fix_count=1,
+                        data=encode_fixes([fix], chunk_origin(window)),
+                        last_timestamp=fix[0],
+                        last_latitude=fix[1],
+                        last_longitude=fix[2],
+                    )
+                return
+            except IntegrityError:
+                # Another request created the chunk first.
+                track = chunk.select_for_update().values_list(*last_fix).get()
+
+        pk, origin = track[0], track[1:]
+        delta = Value(encode_fixes([fix], origin), output_field=models.BinaryField())
+        DriverTrack.objects.filter(pk=pk).update(
+            data=CombinedExpression(F('data'), '||', delta, output_field=models.BinaryField()),
+            fix_count=F('fix_count') + 1,
+            last_timestamp=fix[0],
+            last_latitude=fix[1],
+            last_longitude=fix[2],
+            updated_at=Now(),
+        )
+
+
+def track_points(driver_id, start, end):
+    """Lazily yield the driver's fixes with ``start <= time < end``, oldest first.
+
+    A query spans at most a day of small chunks, so they are fetched at
+    once; each chunk is decoded only when reached. Fixes are stored in
+    arrival order, and a late report lands in its own window behind newer
+    fixes, so each chunk is sorted by time before it is yielded.
+    """
+    # Fixes are stored to the second, so a fix in the start's second counts.
+    start_ts, end_ts = math.floor(start.timestamp()), end.timestamp()
+    chunks = (
+        DriverTrack.objects
+        .filter(driver_id=driver_id, window_start__gte=window_start(start_ts), window_start__lt=end)
+        .order_by('window_start')
+        .values_list('window_start', 'data')
+    )
+    for window, data in chunks:
+        fixes = sorted(decode_fixes(bytes(data), chunk_origin(window)), key=itemgetter(0))
+        for timestamp, latitude, longitude in fixes:
+            if start_ts <= timestamp < end_ts:
+                yield Fix(timestamp, latitude / MICRODEGREES, longitude / MICRODEGREES)
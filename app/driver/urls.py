@@ -1,7 +1,12 @@
 from django.urls import path
 
 from driver.views import (
+    DriverLocationView,
+    DriverMatchView,
     DriverRegisterView,
+    DriverTrackView,
+    HeatmapView,
+    PresenceMetricsView,
 )
 
 app_name = 'driver'
@@ -9,4 +14,9 @@ app_name = 'driver'
 
 urlpatterns = [
     path('register/', DriverRegisterView.as_view(), name='register_driver'),
+    path('match/', DriverMatchView.as_view(), name='match'),
+    path('location/', DriverLocationView.as_view(), name='location'),
+    path('<int:pk>/track/', DriverTrackView.as_view(), name='track'),
+    path('presence/metrics/', PresenceMetricsView.as_view(), name='presence_metrics'),
+    path('heatmap/', HeatmapView.as_view(), name='heatmap'),
 ]
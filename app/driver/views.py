@@ -1,21 +1,48 @@
+import time
+
+from django.conf import settings
 from django.db import IntegrityError
+from django.db.models import Q
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 
 from rest_framework import generics, status
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.permissions import (
     AllowAny,
+    IsAdminUser,
+    IsAuthenticated,
 )
 
-from driver.serializers import DriverSerializer
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from app.utils import metrics
+from app.utils.fleet_scope import UNSCOPED, FleetScopeMixin, current_scope
+from app.utils.idempotency import IdempotencyMixin
+from app.utils.schema_hints import OpenApiTypes, extend_schema
+from app.utils.throttling import PublicThrottleMixin
+from driver import heatmap
+from driver.matching import bounding_box, match_driver
+from driver.presence import stale_drivers
+from driver.serializers import (
+    DriverLocationSerializer,
+    DriverMatchSerializer,
+    DriverSerializer,
+    DriverTrackQuerySerializer,
+    HeatmapQuerySerializer,
+)
+from driver.tracks import append_fix, track_points
+from sos.services import active_regions
 
 
 User = get_user_model()
 
 
-class DriverRegisterView(generics.CreateAPIView):
+class DriverRegisterView(PublicThrottleMixin, IdempotencyMixin, generics.CreateAPIView):
+    throttle_scope = 'register'
     permission_classes = (AllowAny,)
     serializer_class = DriverSerializer
 
@@ -29,7 +56,7 @@ class DriverRegisterView(generics.CreateAPIView):
                 'status': 'success',
                 'message': 'User registered successfully.',
                 'data': {
-                    'user': UserSerializer(user, context={'request': request}).data,
+                    'user': DriverSerializer(user, context={'request': request}).data,
                 }
             }
             return Response(response_data, status=status.HTTP_201_CREATED)
@@ -53,3 +80,177 @@ class DriverRegisterView(generics.CreateAPIView):
                 'message': _('Something went wrong.'),
                 'error': str(e),
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class DriverMatchView(FleetScopeMixin, APIView):
+    """Reserve the best driver for a pickup, for dispatchers.
+
+    Staff only: the reservation is not tied to a ride, so the dispatcher
+    who makes it is responsible for the ride. Riders go through
+    ride:request, which reserves and creates the ride together. Staff
+    confined to a fleet only reserve that fleet's drivers.
+    """
+    serializer_class = DriverMatchSerializer
+    permission_classes = [IsAdminUser]
+    authentication_classes = [JWTAuthentication]
+
+    def post(self, request):
+        start = time.perf_counter()
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        match = match_driver(**serializer.validated_data)
+        metrics.observe('dispatch.match', time.perf_counter() - start)
+
+        if match is None:
+            metrics.incr('dispatch.unmatched')
+            return Response({
+                'status': 'error',
+                'message': _('No driver available nearby.'),
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        metrics.incr('dispatch.matched')
+        return Response({
+            'status': 'success',
+            'message': _('Driver reserved.'),
+            'data': {
+                'driver_id': match.driver_id,
+                'distance_km': round(match.distance_km, 3),
+            },
+        }, status=status.HTTP_200_OK)
+
+
+class DriverLocationView(APIView):
+    """Record the calling driver's position and append it to their track."""
+    serializer_class = DriverLocationSerializer
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    @extend_schema(responses={200: OpenApiTypes.OBJECT})
+    def post(self, request):
+        user = request.user
+        if user.user_type != User.UserTypeChoices.DRIVER:
+            return Response({
+                'status': 'error',
+                'message': _('Only drivers can report a location.'),
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        latitude = serializer.validated_data['latitude']
+        longitude = serializer.validated_data['longitude']
+        recorded_at = serializer.validated_data.get('recorded_at') or timezone.now()
+
+        # A late report still joins the track but never moves the driver back.
+        User.objects.filter(
+            Q(last_location_update_at__isnull=True) | Q(last_location_update_at__lte=recorded_at),
+            pk=user.pk,
+        ).update(latitude=latitude, longitude=longitude, last_location_update_at=recorded_at)
+        append_fix(user.pk, recorded_at.timestamp(), latitude, longitude)
+
+        return Response({
+            'status': 'success',
+            'message': _('Location updated.'),
+        }, status=status.HTTP_200_OK)
+
+
+class DriverTrackView(FleetScopeMixin, APIView):
+    """Return a driver's breadcrumbs between ``start`` and ``end``.
+
+    Drivers read their own track; staff read those of their fleet.
+    """
+    serializer_class = DriverTrackQuerySerializer
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    @extend_schema(parameters=[DriverTrackQuerySerializer], responses={200: OpenApiTypes.OBJECT})
+    def get(self, request, pk):
+        if request.user.pk != pk and not self.staff_can_read(request.user, pk):
+            return Response({
+                'status': 'error',
+                'message': _('You are not authorized to access this resource.'),
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        serializer = self.serializer_class(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        points = track_points(pk, serializer.validated_data['start'], serializer.validated_data['end'])
+
+        return Response({
+            'status': 'success',
+            'message': _('Driver track.'),
+            'data': {
+                'driver': pk,
+                'fields': ['timestamp', 'latitude', 'longitude'],
+                'points': [list(point) for point in points],
+            },
+        }, status=status.HTTP_200_OK)
+
+    def staff_can_read(self, user, pk):
+        if not user.is_staff:
+            return False
+        return current_scope() is UNSCOPED or User.objects.filter(pk=pk).exists()
+
+
+class PresenceMetricsView(FleetScopeMixin, APIView):
+    """Count online and stale drivers; superusers also get the sweeper's metrics."""
+    permission_classes = [IsAdminUser]
+    authentication_classes = [JWTAuthentication]
+
+    @extend_schema(responses={200: OpenApiTypes.OBJECT})
+    def get(self, request):
+        data = {
+            'online': User.objects.filter(is_online=True, user_type=User.UserTypeChoices.DRIVER).count(),
+            'stale': stale_drivers(settings.PRESENCE_TIMEOUT_SECONDS).count(),
+        }
+        if current_scope() is UNSCOPED:
+            # The sweeper counts every fleet.
+            data.update(
+                swept=metrics.snapshot('presence.swept')['presence.swept'],
+                sweeps=metrics.timing_snapshot('presence.sweep'),
+                last_sweep=metrics.snapshot('presence.last_sweep')['presence.last_sweep'] or None,
+            )
+        return Response(data)
+
+
+class HeatmapView(FleetScopeMixin, APIView):
+    """Return driver supply per grid cell for a region or bounding box.
+
+    Staff confined to a fleet only count that fleet's drivers.
+    """
+    serializer_class = HeatmapQuerySerializer
+    permission_classes = [IsAdminUser]
+    authentication_classes = [JWTAuthentication]
+
+    @extend_schema(parameters=[HeatmapQuerySerializer], responses={200: OpenApiTypes.OBJECT})
+    def get(self, request):
+        serializer = self.serializer_class(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        if 'region_id' in data:
+            centre = next((region for region in active_regions() if region[0] == data['region_id']), None)
+            if centre is None:
+                return Response({
+                    'status': 'error',
+                    'message': _('Region not found.'),
+                }, status=status.HTTP_404_NOT_FOUND)
+            box = bounding_box(centre[1], centre[2], settings.HEATMAP_REGION_RADIUS_KM)
+        else:
+            box = data['min_lat'], data['max_lat'], data['min_lng'], data['max_lng']
+
+        return Response({
+            'status': 'success',
+            'message': _('Driver heatmap.'),
+            'data': {
+                'cell_degrees': float(heatmap.CELL_DEGREES),
+                'fields': ['latitude', 'longitude', 'online', 'available'],
+                'cells': [[*heatmap.cell_origin(cell), cell[2], cell[3]] for cell in self.tile(box)],
+            },
+        }, status=status.HTTP_200_OK)
+
+    def tile(self, box):
+        fleet_id = current_scope()
+        if fleet_id is UNSCOPED:
+            return heatmap.tile(*box)
+        if fleet_id is None:
+            return []
+        return heatmap.fleet_tile(fleet_id, *box)
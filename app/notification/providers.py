@@ -0,0 +1,145 @@
+"""
+Push providers used by the notification dispatcher.
+
+Each provider sends one payload to many device tokens per HTTP call and
+reports a per-token outcome, so the dispatcher never loops over recipients.
+"""
+import requests
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class DeliveryError(Exception):
+    """A send failed; ``retryable`` tells the dispatcher whether to try again."""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class BaseProvider:
+    max_batch_size = 500
+    timeout = 10
+
+    def __init__(self):
+        # One keep-alive session per worker process.
+        self.session = requests.Session()
+
+    def send(self, tokens, title, body, data):
+        """Send one payload to ``tokens``; return ``{token: DeliveryError or None}``."""
+        raise NotImplementedError
+
+    def post(self, url, payload, headers):
+        try:
+            response = self.session.post(url, json=payload, headers=headers, timeout=self.timeout)
+        except requests.RequestException as exc:
+            raise DeliveryError(str(exc))
+        if response.status_code >= 500 or response.status_code == 429:
+            raise DeliveryError(f'{response.status_code} {response.text[:200]}')
+        if response.status_code >= 400:
+            raise DeliveryError(f'{response.status_code} {response.text[:200]}', retryable=False)
+        return response.json()
+
+
+class FCMProvider(BaseProvider):
+    """Firebase Cloud Messaging, multicast through ``registration_ids``."""
+    url = 'https://fcm.googleapis.com/fcm/send'
+    max_batch_size = 1000
+    retryable_errors = {'Unavailable', 'InternalServerError', 'DeviceMessageRateExceeded'}
+
+    def send(self, tokens, title, body, data):
+        result = self.post(
+            self.url,
+            {
+                'registration_ids': tokens,
+                'notification': {'title': title, 'body': body},
+                'data': data,
+            },
+            {'Authorization': f'key={settings.FCM_SERVER_KEY}'},
+        )
+        # Tokens without a result are left out; the dispatcher counts them as failed.
+        outcomes = {}
+        for token, outcome in zip(tokens, result.get('results', [])):
+            error = outcome.get('error')
+            outcomes[token] = error and DeliveryError(error, retryable=error in self.retryable_errors)
+        return outcomes
+
+
+class OneSignalProvider(BaseProvider):
+    """OneSignal, addressed by ``player_id``."""
+    url = 'https://onesignal.com/api/v1/notifications'
+    max_batch_size = 2000
+
+    def send(self, tokens, title, body, data):
+        result = self.post(
+            self.url,
+            {
+                'app_id': settings.ONESIGNAL_APP_ID,
+                'include_player_ids': tokens,
+                'headings': {'en': title},
+                'contents': {'en': body or title},
+                'data': data,
+            },
+            {'Authorization': f'Basic {settings.ONESIGNAL_API_KEY}'},
+        )
+        errors = result.get('errors') or {}
+        invalid = set(errors.get('invalid_player_ids', [])) if isinstance(errors, dict) else set()
+        return {
+            token: DeliveryError('invalid_player_id', retryable=False) if token in invalid else None
+            for token in tokens
+        }
+
+
+class TwilioSMSProvider(BaseProvider):
+    """Twilio SMS, addressed by phone number; one API call per recipient."""
+    url = 'https://api.twilio.com/2010-04-01/Accounts/{sid}/Messages.json'
+    max_batch_size = 50
+
+    def send(self, tokens, title, body, data):
+        url = self.url.format(sid=settings.TWILIO_ACCOUNT_SID)
+        auth = (settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+        outcomes = {}
+        for token in tokens:
+            try:
+                response = self.session.post(
+                    url,
+                    data={'To': token, 'From': settings.TWILIO_FROM_NUMBER, 'Body': f'{title}: {body}'},
+                    auth=auth,
+                    timeout=self.timeout,
+                )
+            except requests.RequestException as exc:
+                outcomes[token] = DeliveryError(str(exc))
+                continue
+            if response.status_code >= 400:
+                retryable = response.status_code >= 500 or response.status_code == 429
+                outcomes[token] = DeliveryError(f'{response.status_code} {response.text[:200]}', retryable=retryable)
+            else:
+                outcomes[token] = None
+        return outcomes
+
+
+class StubProvider(BaseProvider):
+    """Records sends in memory; for tests and local runs."""
+    sent = []
+    failures = {}
+
+    def send(self, tokens, title, body, data):
+        self.sent.append({'tokens': list(tokens), 'title': title, 'body': body, 'data': data})
+        return {token: self.failures.get(token) for token in tokens}
+
+    @classmethod
+    def reset(cls):
+        cls.sent.clear()
+        cls.failures.clear()
+
+
+_providers = {}
+
+
+def get_provider(name):
+    """Return the provider configured for ``name``, one instance per process."""
+    path = settings.NOTIFICATION_PROVIDERS[name]
+    if _providers.get(name, (None,))[0] != path:
+        _providers[name] = (path, import_string(path)())
+    return _providers[name][1]
@@ -0,0 +1,51 @@
+"""
+Queue push notifications without sending them inline.
+"""
+import hashlib
+
+from django.contrib.auth import get_user_model
+
+from app.utils import metrics
+from core.models import NotificationOutbox
+
+
+User = get_user_model()
+
+PROVIDER_TOKEN_FIELDS = (
+    (NotificationOutbox.ProviderChoices.FCM, 'fcm_token'),
+    (NotificationOutbox.ProviderChoices.ONESIGNAL, 'player_id'),
+)
+
+
+def _dedupe_key(key, provider, user_id):
+    return hashlib.sha256(f'{key}:{provider}:{user_id}'.encode()).hexdigest()
+
+
+def notify_users(user_ids, title, body='', data=None, dedupe_key=None):
+    """Queue one outbox row per registered device of each user.
+
+    Rows sharing ``dedupe_key`` with a still pending row for the same user
+    and provider are dropped by the database, so retried requests coalesce.
+    Returns the number of rows offered to the outbox.
+    """
+    token_fields = [field for _, field in PROVIDER_TOKEN_FIELDS]
+    recipients = User.objects.filter(pk__in=user_ids).values_list('id', *token_fields)
+
+    rows = []
+    for user_id, *tokens in recipients:
+        for (provider, _), token in zip(PROVIDER_TOKEN_FIELDS, tokens):
+            if not token:
+                continue
+            rows.append(NotificationOutbox(
+                user_id=user_id,
+                provider=provider,
+                token=token,
+                title=title,
+                body=body,
+                data=data or {},
+                dedupe_key=_dedupe_key(dedupe_key, provider, user_id) if dedupe_key else None,
+            ))
+
+    NotificationOutbox.objects.bulk_create(rows, ignore_conflicts=True)
+    metrics.incr('notifications.queued', len(rows))
+    return len(rows)
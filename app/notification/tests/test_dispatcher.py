@@ -0,0 +1,159 @@
+"""
+Tests for queueing and dispatching push notifications.
+"""
+from unittest import mock
+
+from django.urls import reverse
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import NotificationOutbox
+from notification.dispatcher import dispatch_batch
+from notification.providers import DeliveryError, StubProvider
+from notification.services import notify_users
+
+
+STUB_PROVIDERS = {
+    'fcm': 'notification.providers.StubProvider',
+    'onesignal': 'notification.providers.StubProvider',
+}
+
+
+def create_user(email, **params):
+    return get_user_model().objects.create_user(email=email, password='testpass123', **params)
+
+
+@override_settings(NOTIFICATION_PROVIDERS=STUB_PROVIDERS)
+class NotificationDispatchTests(TestCase):
+    """Test the notification outbox and dispatcher."""
+
+    def setUp(self):
+        StubProvider.reset()
+        cache.clear()
+        self.rider = create_user('rider@example.com', username='rider', fcm_token='fcm-1')
+        self.driver = create_user('driver@example.com', username='driver', fcm_token='fcm-2', player_id='player-2')
+
+    def test_notify_users_only_queues(self):
+        """Test queueing writes outbox rows and calls no provider."""
+        queued = notify_users([self.rider.id, self.driver.id], 'Ride update')
+
+        self.assertEqual(queued, 3)
+        self.assertEqual(NotificationOutbox.objects.filter(status='pending').count(), 3)
+        self.assertEqual(StubProvider.sent, [])
+
+    def test_duplicates_are_coalesced(self):
+        """Test a retried enqueue with the same key adds no rows."""
+        notify_users([self.rider.id], 'Ride update', dedupe_key='ride-1')
+        notify_users([self.rider.id], 'Ride update', dedupe_key='ride-1')
+
+        self.assertEqual(NotificationOutbox.objects.count(), 1)
+
+    def test_dispatch_batches_per_provider(self):
+        """Test one provider call carries every token with the same payload."""
+        notify_users([self.rider.id, self.driver.id], 'Ride update', body='Arriving')
+
+        handled = dispatch_batch()
+
+        self.assertEqual(handled, 3)
+        self.assertEqual(len(StubProvider.sent), 2)
+        fcm_call = next(call for call in StubProvider.sent if 'fcm-1' in call['tokens'])
+        self.assertEqual(sorted(fcm_call['tokens']), ['fcm-1', 'fcm-2'])
+        self.assertFalse(NotificationOutbox.objects.exclude(status='sent').exists())
+
+    def test_same_token_sent_once(self):
+        """Test identical pending rows for one device go out once."""
+        notify_users([self.rider.id], 'Ride update')
+        notify_users([self.rider.id], 'Ride update')
+
+        dispatch_batch()
+
+        self.assertEqual(StubProvider.sent[0]['tokens'], ['fcm-1'])
+        self.assertEqual(NotificationOutbox.objects.filter(status='sent').count(), 2)
+
+    def test_retryable_failure_is_rescheduled(self):
+        """Test a transient failure backs off and a permanent one stops."""
+        StubProvider.failures['fcm-1'] = DeliveryError('Unavailable')
+        StubProvider.failures['fcm-2'] = DeliveryError('NotRegistered', retryable=False)
+        notify_users([self.rider.id, self.driver.id], 'Ride update')
+
+        dispatch_batch()
+
+        retried = NotificationOutbox.objects.get(token='fcm-1')
+        self.assertEqual(retried.status, 'pending')
+        self.assertEqual(retried.attempts, 1)
+        self.assertGreater(retried.next_attempt_at, timezone.now())
+        self.assertEqual(NotificationOutbox.objects.get(token='fcm-2').status, 'failed')
+        self.assertEqual(dispatch_batch(), 0)
+
+    def test_gives_up_after_max_attempts(self):
+        """Test a row fails once it used all of its attempts."""
+        StubProvider.failures['fcm-1'] = DeliveryError('Unavailable')
+        notify_users([self.rider.id], 'Ride update')
+
+        with self.settings(NOTIFICATION_MAX_ATTEMPTS=2):
+            dispatch_batch()
+            NotificationOutbox.objects.update(next_attempt_at=timezone.now())
+            dispatch_batch()
+
+        row = NotificationOutbox.objects.get()
+        self.assertEqual(row.status, 'failed')
+        self.assertEqual(row.attempts, 2)
+
+    def test_metrics_endpoint(self):
+        """Test admins can read throughput and backlog metrics."""
+        admin_user = get_user_model().objects.create_superuser(email='admin@example.com', password='testpass123')
+        client = APIClient()
+        client.force_authenticate(admin_user)
+        notify_users([self.rider.id, self.driver.id], 'Ride update')
+        dispatch_batch()
+
+        res = client.get(reverse('notification:metrics'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['pending'], 0)
+        self.assertEqual(res.data['counters']['notifications.sent'], 3)
+        self.assertEqual(res.data['batches']['count'], 1)
+
+    def test_provider_crash_counts_as_attempt(self):
+        """Test an unexpected provider error is recorded as a failed attempt."""
+        notify_users([self.rider.id], 'Ride update')
+
+        with mock.patch.object(StubProvider, 'send', side_effect=ValueError('bad response')):
+            self.assertEqual(dispatch_batch(), 1)
+
+        row = NotificationOutbox.objects.get()
+        self.assertEqual((row.status, row.attempts), ('pending', 1))
+        self.assertIn('ValueError: bad response', row.last_error)
+        self.assertGreater(row.next_attempt_at, timezone.now())
+
+    def test_missing_results_are_failures(self):
+        """Test tokens the provider did not report on are not marked sent."""
+        notify_users([self.rider.id, self.driver.id], 'Ride update')
+
+        with mock.patch.object(StubProvider, 'send', return_value={'fcm-1': None}):
+            dispatch_batch()
+
+        self.assertEqual(
+            sorted(NotificationOutbox.objects.filter(status='sent').values_list('token', flat=True)), ['fcm-1'],
+        )
+        self.assertEqual(NotificationOutbox.objects.get(token='fcm-2').last_error, 'No result from the provider.')
+
+    def test_claimed_rows_are_skipped_while_sending(self):
+        """Test a claim is committed and leased before any provider call."""
+        notify_users([self.rider.id], 'Ride update')
+
+        def send(tokens, title, body, data):
+            # Another worker polling now finds nothing due.
+            self.assertEqual(dispatch_batch(), 0)
+            self.assertEqual(NotificationOutbox.objects.get().attempts, 1)
+            return dict.fromkeys(tokens)
+
+        with mock.patch.object(StubProvider, 'send', side_effect=send):
+            self.assertEqual(dispatch_batch(), 1)
+
+        self.assertEqual(NotificationOutbox.objects.get().status, 'sent')
@@ -0,0 +1,12 @@
+from django.urls import path
+
+from notification.views import (
+    NotificationMetricsView,
+)
+
+app_name = 'notification'
+
+
+urlpatterns = [
+    path('metrics/', NotificationMetricsView.as_view(), name='metrics'),
+]
@@ -0,0 +1,43 @@
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from rest_framework.views import APIView
+from rest_framework.response import Response
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from app.utils import metrics
+from app.utils.fleet_scope import IsSuperUser
+from app.utils.schema_hints import OpenApiTypes, extend_schema
+from core.models import NotificationOutbox
+
+
+class NotificationMetricsView(APIView):
+    permission_classes = [IsSuperUser]
+    authentication_classes = [JWTAuthentication]
+
+    @extend_schema(responses={200: OpenApiTypes.OBJECT})
+    def get(self, request):
+        backlog = NotificationOutbox.objects.filter(
+            status=NotificationOutbox.StatusChoices.PENDING,
+        ).aggregate(pending=Count('id'), oldest=Min('created_at'))
+        counters = metrics.snapshot(
+            'notifications.queued',
+            'notifications.sent',
+            'notifications.retried',
+            'notifications.failed',
+            'notifications.provider_calls',
+        )
+        batches = metrics.timing_snapshot('notifications.batch')
+        busy_seconds = batches['mean_ms'] * batches['count'] / 1000
+        sent = counters['notifications.sent']
+
+        return Response({
+            'pending': backlog['pending'],
+            'oldest_pending_seconds': (
+                (timezone.now() - backlog['oldest']).total_seconds() if backlog['oldest'] else 0
+            ),
+            'counters': counters,
+            'batches': batches,
+            'sent_per_second': round(sent / busy_seconds, 1) if busy_seconds else 0,
+        })
@@ -0,0 +1,16 @@
+from django.apps import AppConfig
+
+
+class RideConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'ride'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from core.models import Regions, Tariff
+        from ride.fares import invalidate_tariffs
+
+        for model in (Regions, Tariff):
+            post_save.connect(invalidate_tariffs, sender=model, dispatch_uid=f'fares_invalidate_{model.__name__}_save')
+            post_delete.connect(invalidate_tariffs, sender=model, dispatch_uid=f'fares_invalidate_{model.__name__}_delete')
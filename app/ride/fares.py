@@ -0,0 +1,147 @@
+"""
+Fare estimates from per-region tariff tables.
+
+Each region's active tariffs are held in process memory as NumPy arrays,
+one entry per service. A version token in the cache is replaced whenever
+a tariff or region changes, so every worker sharing that cache reloads on
+its next quote; a table older than ``FARE_TARIFFS_LOCAL_TTL`` seconds is
+reloaded regardless, for workers that do not share it. Distances,
+durations and fares for a batch of routes are computed in a handful of
+array operations instead of a Python loop per route.
+"""
+import time
+import uuid
+from dataclasses import dataclass
+
+import numpy as np
+
+from django.conf import settings
+from django.core.cache import cache
+
+from app.utils.geo import KM_PER_MILE, haversine_km_array
+from core.models import Regions, Tariff
+
+
+VERSION_KEY = 'fares:tariffs:version'
+
+_tables = {}
+
+
+@dataclass(frozen=True)
+class TariffTable:
+    service_ids: np.ndarray
+    base_fare: np.ndarray
+    per_distance: np.ndarray
+    per_minute: np.ndarray
+    minimum_fare: np.ndarray
+    currencies: np.ndarray
+    km_per_unit: float
+
+
+@dataclass(frozen=True)
+class Estimate:
+    service_ids: list
+    currencies: list
+    distance_km: np.ndarray
+    minutes: np.ndarray
+    fares: np.ndarray
+
+
+def _current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate_tariffs(**kwargs):
+    """Signal receiver: make every worker reload tariff tables."""
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+    _tables.clear()
+
+
+def _load_table(region_id):
+    unit = Regions.objects.filter(pk=region_id).values_list('distance_unit', flat=True).first()
+    rows = list(
+        Tariff.objects
+        .filter(region_id=region_id, is_active=True)
+        .order_by('service_id')
+        .values_list('service_id', 'base_fare', 'per_distance', 'per_minute', 'minimum_fare', 'currency')
+    )
+    if unit is None or not rows:
+        return None
+    service_ids, base_fare, per_distance, per_minute, minimum_fare, currencies = zip(*rows)
+    return TariffTable(
+        service_ids=np.array(service_ids, dtype=np.int64),
+        base_fare=np.array(base_fare, dtype=np.float64),
+        per_distance=np.array(per_distance, dtype=np.float64),
+        per_minute=np.array(per_minute, dtype=np.float64),
+        minimum_fare=np.array(minimum_fare, dtype=np.float64),
+        currencies=np.array(currencies, dtype=object),
+        km_per_unit=KM_PER_MILE if unit == Regions.DistanceUnitChoices.MILE else 1.0,
+    )
+
+
+def tariff_table(region_id):
+    """Return the cached TariffTable of a region, or None if it has no tariffs."""
+    version = _current_version()
+    entry = _tables.get(region_id)
+    if entry is None or entry[0] != version or time.monotonic() - entry[1] >= settings.FARE_TARIFFS_LOCAL_TTL:
+        entry = _tables[region_id] = (version, time.monotonic(), _load_table(region_id))
+    return entry[2]
+
+
+def route_metrics(pickups, dropoffs):
+    """Return estimated road distance in km and duration in minutes per route.
+
+    ``pickups`` and ``dropoffs`` are ``(n, 2)`` arrays of latitude and
+    longitude. Road distance is the great-circle distance scaled by
+    ``FARE_ROAD_FACTOR``.
+    """
+    pickups = np.asarray(pickups, dtype=np.float64).reshape(-1, 2)
+    dropoffs = np.asarray(dropoffs, dtype=np.float64).reshape(-1, 2)
+    distance_km = haversine_km_array(pickups[:, 0], pickups[:, 1], dropoffs[:, 0], dropoffs[:, 1])
+    distance_km *= settings.FARE_ROAD_FACTOR
+    minutes = distance_km * (60 / settings.FARE_AVERAGE_SPEED_KMH)
+    return distance_km, minutes
+
+
+def quote(table, distance_km, minutes, service_id=None):
+    """Return the tariff columns used and a ``(routes, services)`` fare matrix.
+
+    Both are None when ``service_id`` has no tariff in the table.
+    """
+    columns = slice(None)
+    if service_id is not None:
+        matches = np.flatnonzero(table.service_ids == service_id)
+        if not matches.size:
+            return None, None
+        columns = matches[:1]
+    units = distance_km / table.km_per_unit
+    fares = np.outer(units, table.per_distance[columns])
+    fares += np.outer(minutes, table.per_minute[columns])
+    fares += table.base_fare[columns]
+    np.maximum(fares, table.minimum_fare[columns], out=fares)
+    return columns, np.round(fares, 2)
+
+
+def estimate_fares(region_id, pickups, dropoffs, service_id=None):
+    """Quote every route for one or all services of a region.
+
+    Returns an Estimate, or None when the region has no matching tariff.
+    """
+    table = tariff_table(region_id)
+    if table is None:
+        return None
+    distance_km, minutes = route_metrics(pickups, dropoffs)
+    columns, fares = quote(table, distance_km, minutes, service_id)
+    if fares is None:
+        return None
+    return Estimate(
+        service_ids=table.service_ids[columns].tolist(),
+        currencies=table.currencies[columns].tolist(),
+        distance_km=distance_km,
+        minutes=minutes,
+        fares=fares,
+    )
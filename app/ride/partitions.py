@@ -0,0 +1,104 @@
+"""
+Monthly partitions of the ride table.
+
+Rows land in ``core_ride_default`` until their month has a partition named
+``core_ride_pYYYYMM``. Old partitions are detached, copied to a gzipped
+CSV file, and dropped.
+"""
+import gzip
+import re
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+
+
+PARENT = 'core_ride'
+DEFAULT_PARTITION = 'core_ride_default'
+PARTITION_NAME = re.compile(r'^core_ride_p(\d{4})(\d{2})$')
+
+
+def month_start(value):
+    """Return the first day of the month of a date or datetime."""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    """Return the first day of the month ``count`` months after ``month``."""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{PARENT}_p{month:%Y%m}'
+
+
+def existing_partitions():
+    """Return ``{month: table name}`` for the attached monthly partitions."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname FROM pg_inherits '
+            'JOIN pg_class parent ON parent.oid = pg_inherits.inhparent '
+            'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            'WHERE parent.relname = %s',
+            [PARENT],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+
+def create_partition(month):
+    """Create the partition for ``month``, moving its rows out of the default one.
+
+    Postgres refuses to attach a range the default partition still holds
+    rows for, so those rows are moved into the new table first.
+    """
+    name = partition_name(month)
+    start, end = month, add_months(month, 1)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TABLE "{name}" (LIKE "{PARENT}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        )
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" '
+            f'WHERE created_at >= %s AND created_at < %s RETURNING *) '
+            f'INSERT INTO "{name}" SELECT * FROM moved',
+            [start, end],
+        )
+        moved = cursor.rowcount
+        cursor.execute(
+            f'ALTER TABLE "{PARENT}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)',
+            [start, end],
+        )
+    return moved
+
+
+def archive_partition(name, archive_dir):
+    """Copy a partition to ``archive_dir``, then detach and drop it.
+
+    Returns the archive file path. The copy reads the partition while it
+    is still attached, under the same locks as any other read, and is
+    written to a temporary file renamed once complete. Only then are the
+    DETACH and DROP run, in a short transaction of their own: a plain
+    DETACH locks the whole ride table until commit, so it gives up after
+    ``RIDE_PARTITION_LOCK_TIMEOUT_MS`` rather than queue live traffic
+    behind it. A failed copy or lock leaves the partition attached.
+    """
+    path = Path(archive_dir) / f'{name}.csv.gz'
+    partial = path.with_name(f'{path.name}.partial')
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with connection.cursor() as cursor, gzip.open(partial, 'wb') as archive:
+        cursor.copy_expert(f'COPY "{name}" TO STDOUT WITH (FORMAT csv, HEADER)', archive)
+    partial.replace(path)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('SET LOCAL lock_timeout = %s', [settings.RIDE_PARTITION_LOCK_TIMEOUT_MS])
+        cursor.execute(f'ALTER TABLE "{PARENT}" DETACH PARTITION "{name}"')
+        cursor.execute(f'DROP TABLE "{name}"')
+    return path
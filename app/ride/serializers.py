@@ -0,0 +1,44 @@
+from django.conf import settings
+
+from rest_framework import serializers
+
+from core.models import DriverProfile, Ride
+
+
+class RideSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Ride
+        fields = [
+            'id', 'rider', 'driver', 'service_id', 'status',
+            'pickup_latitude', 'pickup_longitude', 'dropoff_latitude', 'dropoff_longitude',
+            'fare', 'created_at', 'completed_at', 'cancelled_at',
+        ]
+        read_only_fields = fields
+
+
+class RideRequestSerializer(serializers.Serializer):
+    pickup_latitude = serializers.DecimalField(max_digits=9, decimal_places=6, min_value=-90, max_value=90)
+    pickup_longitude = serializers.DecimalField(max_digits=9, decimal_places=6, min_value=-180, max_value=180)
+    dropoff_latitude = serializers.DecimalField(max_digits=9, decimal_places=6, min_value=-90, max_value=90, required=False)
+    dropoff_longitude = serializers.DecimalField(max_digits=9, decimal_places=6, min_value=-180, max_value=180, required=False)
+    service_id = serializers.IntegerField(min_value=1)
+
+
+class RideRatingSerializer(serializers.Serializer):
+    score = serializers.IntegerField(min_value=1, max_value=DriverProfile.RATING_MAX)
+    comment = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class FareRouteSerializer(serializers.Serializer):
+    # Floats, not decimals: estimates go straight into float arrays.
+    pickup_latitude = serializers.FloatField(min_value=-90, max_value=90)
+    pickup_longitude = serializers.FloatField(min_value=-180, max_value=180)
+    dropoff_latitude = serializers.FloatField(min_value=-90, max_value=90)
+    dropoff_longitude = serializers.FloatField(min_value=-180, max_value=180)
+
+
+class FareEstimateSerializer(serializers.Serializer):
+    region_id = serializers.IntegerField(required=False, min_value=1)
+    service_id = serializers.IntegerField(required=False, min_value=1)
+    routes = FareRouteSerializer(many=True, allow_empty=False, max_length=settings.FARE_MAX_ROUTES)
@@ -0,0 +1,95 @@
+"""
+Ride lifecycle and the per-user counters and rating totals that follow it.
+"""
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Now
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from core.models import DriverProfile, Rating, Ride
+from driver.matching import release_driver
+
+
+User = get_user_model()
+
+STATUS_COUNTERS = {
+    Ride.StatusChoices.COMPLETED: ('completed_at', 'completed_rides'),
+    Ride.StatusChoices.CANCELLED: ('cancelled_at', 'cancelled_rides'),
+}
+
+
+def create_ride(rider, driver_id, pickup_latitude, pickup_longitude, **fields):
+    """Record a ride accepted by ``driver_id``."""
+    return Ride.objects.create(
+        rider=rider,
+        driver_id=driver_id,
+        status=Ride.StatusChoices.ACCEPTED,
+        pickup_latitude=pickup_latitude,
+        pickup_longitude=pickup_longitude,
+        **fields,
+    )
+
+
+def close_ride(ride, status):
+    """Move an active ride to ``status`` and count it for rider and driver.
+
+    The status change and the counter increments commit together, and the
+    conditional UPDATE makes a second close of the same ride a no-op, so
+    counters never drift from the ride history. Returns whether the ride
+    was closed by this call.
+    """
+    timestamp_field, counter = STATUS_COUNTERS[status]
+    now = timezone.now()
+    with transaction.atomic():
+        closed = Ride.objects.filter(
+            pk=ride.pk,
+            # Lets Postgres read only the ride's partition.
+            created_at=ride.created_at,
+            status__in=Ride.ACTIVE_STATUSES,
+        ).update(status=status, updated_at=now, **{timestamp_field: now})
+        if not closed:
+            return False
+
+        participants = [user_id for user_id in (ride.rider_id, ride.driver_id) if user_id]
+        User.objects.filter(pk__in=participants).update(**{counter: F(counter) + 1, 'updated_at': Now()})
+        if ride.driver_id:
+            release_driver(ride.driver_id)
+
+    ride.status = status
+    ride.updated_at = now
+    setattr(ride, timestamp_field, now)
+    return True
+
+
+ADD_RATING_SQL = f"""
+INSERT INTO {DriverProfile._meta.db_table} (driver_id, rating_sum, rating_count, updated_at)
+VALUES (%s, %s, 1, now())
+ON CONFLICT (driver_id) DO UPDATE SET
+    rating_sum = {DriverProfile._meta.db_table}.rating_sum + EXCLUDED.rating_sum,
+    rating_count = {DriverProfile._meta.db_table}.rating_count + 1,
+    updated_at = EXCLUDED.updated_at
+"""
+
+
+def rate_ride(ride, score, comment=''):
+    """Record the rider's rating of a ride and add it to the driver's totals.
+
+    The profile row is upserted with relative increments, so concurrent
+    ratings of one driver never lose an update and reads stay O(1).
+    Raises IntegrityError if the ride was already rated.
+    """
+    with transaction.atomic():
+        rating = Rating.objects.create(
+            ride_id=ride.pk,
+            rider_id=ride.rider_id,
+            driver_id=ride.driver_id,
+            score=score,
+            comment=comment,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(ADD_RATING_SQL, [ride.driver_id, score])
+        # The satisfaction rate shows in user listings, whose validators
+        # follow users.updated_at.
+        User.objects.filter(pk=ride.driver_id).update(updated_at=Now())
+    return rating
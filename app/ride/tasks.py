@@ -0,0 +1,12 @@
+"""
+Housekeeping tasks for the ride table.
+"""
+from django.core.management import call_command
+
+from taskqueue.registry import task
+
+
+@task(name='ride.archive_partitions')
+def archive_partitions():
+    """Archive and drop ride partitions past ``RIDE_RETENTION_MONTHS``."""
+    call_command('manage_ride_partitions', archive=True)
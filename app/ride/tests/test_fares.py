@@ -0,0 +1,112 @@
+"""
+Tests for fare estimates.
+"""
+import time
+from unittest import mock
+
+import numpy as np
+
+from django.conf import settings
+from django.urls import reverse
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app.utils.geo import KM_PER_MILE, haversine_km, haversine_km_array
+from core.models import Regions, Tariff
+from ride.fares import estimate_fares, tariff_table
+
+
+ESTIMATE_URL = reverse('ride:estimate')
+
+ROUTE = {
+    'pickup_latitude': 48.8566,
+    'pickup_longitude': 2.3522,
+    'dropoff_latitude': 48.8049,
+    'dropoff_longitude': 2.1204,
+}
+
+
+@override_settings(FARE_ROAD_FACTOR=1, FARE_AVERAGE_SPEED_KMH=60)
+class FareEstimateTests(TestCase):
+    """Test the fare engine and endpoint."""
+
+    def setUp(self):
+        cache.clear()
+        self.region = Regions.objects.create(name='Paris', coordinates='48.8566,2.3522')
+        self.standard = Tariff.objects.create(
+            region=self.region, service_id=1, base_fare=2, per_distance=1, per_minute='0.5', minimum_fare=7, currency='EUR',
+        )
+        Tariff.objects.create(region=self.region, service_id=2, base_fare=5, per_distance=2, minimum_fare=10, currency='EUR')
+        self.distance = haversine_km(48.8566, 2.3522, 48.8049, 2.1204)
+
+    def test_vectorized_haversine_matches_scalar(self):
+        """Test the array version agrees with the scalar one."""
+        rng = np.random.default_rng(0)
+        points = rng.uniform([-80, -180, -80, -180], [80, 180, 80, 180], size=(50, 4))
+
+        expected = [haversine_km(*point) for point in points]
+
+        np.testing.assert_allclose(haversine_km_array(*points.T), expected, rtol=1e-12)
+
+    def test_quotes_every_service(self):
+        """Test each route gets a fare per service, floored at the minimum."""
+        estimate = estimate_fares(self.region.id, [(48.8566, 2.3522)] * 2, [(48.8049, 2.1204), (48.8566, 2.3522)])
+
+        self.assertEqual(estimate.service_ids, [1, 2])
+        self.assertEqual(estimate.fares.shape, (2, 2))
+        self.assertAlmostEqual(estimate.fares[0, 0], round(2 + self.distance * 1.5, 2))
+        self.assertAlmostEqual(estimate.fares[0, 1], round(5 + self.distance * 2, 2))
+        self.assertEqual(estimate.fares[1].tolist(), [7, 10])
+
+    def test_mile_regions_price_per_mile(self):
+        """Test distance is charged in the region's unit."""
+        self.region.distance_unit = Regions.DistanceUnitChoices.MILE
+        self.region.save()
+
+        estimate = estimate_fares(self.region.id, [(48.8566, 2.3522)], [(48.8049, 2.1204)], service_id=2)
+
+        self.assertEqual(estimate.service_ids, [2])
+        self.assertAlmostEqual(estimate.fares[0, 0], round(5 + self.distance / KM_PER_MILE * 2, 2))
+
+    def test_tariffs_are_cached_until_changed(self):
+        """Test tables are reused without queries and reloaded after a save."""
+        table = tariff_table(self.region.id)
+        with self.assertNumQueries(0):
+            self.assertIs(tariff_table(self.region.id), table)
+
+        self.standard.base_fare = 3
+        self.standard.save()
+
+        self.assertEqual(tariff_table(self.region.id).base_fare.tolist(), [3, 5])
+
+    def test_tariffs_expire_without_invalidation(self):
+        """Test a change another worker's cache never heard of shows once the table expires."""
+        tariff_table(self.region.id)
+        # A queryset update sends no signal, like a save seen only by another worker's cache.
+        Tariff.objects.filter(pk=self.standard.pk).update(base_fare=3)
+        loaded_at = time.monotonic()
+
+        with mock.patch('ride.fares.time.monotonic', return_value=loaded_at + settings.FARE_TARIFFS_LOCAL_TTL - 1):
+            self.assertEqual(tariff_table(self.region.id).base_fare.tolist(), [2, 5])
+        with mock.patch('ride.fares.time.monotonic', return_value=loaded_at + settings.FARE_TARIFFS_LOCAL_TTL + 1):
+            self.assertEqual(tariff_table(self.region.id).base_fare.tolist(), [3, 5])
+
+    def test_estimate_endpoint(self):
+        """Test the endpoint resolves the region and returns quotes."""
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(email='rider@example.com', password='testpass123'))
+
+        res = client.post(ESTIMATE_URL, {'routes': [ROUTE]}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['data']['region'], self.region.id)
+        fares = res.data['data']['estimates'][0]['fares']
+        self.assertEqual([fare['service_id'] for fare in fares], [1, 2])
+        self.assertEqual(fares[0]['currency'], 'EUR')
+
+        res = client.post(ESTIMATE_URL, {'routes': [ROUTE], 'service_id': 9}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
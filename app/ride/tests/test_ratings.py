@@ -0,0 +1,108 @@
+"""
+Tests for driver ratings and satisfaction rates.
+"""
+from io import StringIO
+
+from django.db import IntegrityError
+from django.urls import reverse
+from django.test import TestCase
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import DriverProfile, Rating, Ride
+from ride.services import close_ride, create_ride, rate_ride
+from user.serializers import UserListAllSerializer, UserListAllValuesSerializer
+
+
+User = get_user_model()
+
+
+def rate_url(ride_id):
+    return reverse('ride:rate', args=[ride_id])
+
+
+class RatingTests(TestCase):
+    """Test rating drivers."""
+
+    def setUp(self):
+        self.rider = User.objects.create_user(email='rider@example.com', password='testpass123', user_type='rider')
+        self.driver = User.objects.create_user(email='driver@example.com', password='testpass123', user_type='driver')
+        self.client = APIClient()
+        self.client.force_authenticate(self.rider)
+
+    def completed_ride(self):
+        ride = create_ride(self.rider, self.driver.id, '48.856600', '2.352200')
+        close_ride(ride, Ride.StatusChoices.COMPLETED)
+        return ride
+
+    def test_ratings_update_running_totals(self):
+        """Test each rating adds to the driver's sum and count."""
+        rate_ride(self.completed_ride(), 5)
+        rate_ride(self.completed_ride(), 3)
+
+        profile = DriverProfile.objects.get(driver=self.driver)
+        self.assertEqual((profile.rating_sum, profile.rating_count), (8, 2))
+        self.assertEqual(profile.satisfaction_rate, 80.0)
+
+    def test_ride_is_rated_once(self):
+        """Test a second rating of the same ride is refused and not counted."""
+        ride = self.completed_ride()
+        rate_ride(ride, 4)
+
+        with self.assertRaises(IntegrityError):
+            rate_ride(ride, 1)
+        self.assertEqual(DriverProfile.objects.get(driver=self.driver).rating_count, 1)
+
+    def test_rate_endpoint(self):
+        """Test only completed rides of the caller can be rated, once."""
+        active = create_ride(self.rider, self.driver.id, '48.856600', '2.352200')
+        ride = self.completed_ride()
+
+        self.assertEqual(self.client.post(rate_url(active.id), {'score': 5}).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.post(rate_url(ride.id), {'score': 6}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.post(rate_url(ride.id), {'score': 4}).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.client.post(rate_url(ride.id), {'score': 4}).status_code, status.HTTP_409_CONFLICT)
+
+    def test_user_list_reports_satisfaction_rate(self):
+        """Test both list serializers read the rate from the profile."""
+        rate_ride(self.completed_ride(), 4)
+        User.objects.create_user(email='new@example.com', password='testpass123', user_type='driver')
+        queryset = User.objects.filter(user_type='driver').order_by('id')
+
+        expected = UserListAllSerializer(queryset, many=True).data
+        data = UserListAllValuesSerializer(UserListAllValuesSerializer.values(queryset)).data
+
+        self.assertEqual(data, expected)
+        self.assertEqual([row['satisfaction_rate'] for row in data], [80.0, None])
+
+    def test_backfill_recomputes_totals(self):
+        """Test the backfill rebuilds drifted and orphaned totals."""
+        rate_ride(self.completed_ride(), 5)
+        rate_ride(self.completed_ride(), 2)
+        other = User.objects.create_user(email='other@example.com', password='testpass123', user_type='driver')
+        DriverProfile.objects.filter(driver=self.driver).update(rating_sum=1, rating_count=9)
+        DriverProfile.objects.create(driver=other, rating_sum=10, rating_count=2)
+        Rating.objects.create(ride_id=999, rider=self.rider, driver=self.driver, score=5)
+
+        call_command('backfill_driver_ratings', stdout=StringIO())
+
+        totals = dict(DriverProfile.objects.values_list('driver_id', 'rating_count'))
+        self.assertEqual(totals, {self.driver.id: 3, other.id: 0})
+        self.assertEqual(DriverProfile.objects.get(driver=self.driver).rating_sum, 12)
+
+    def test_backfill_invalidates_user_list_etag(self):
+        """Test a changed satisfaction rate is not hidden behind a 304."""
+        rate_ride(self.completed_ride(), 5)
+        DriverProfile.objects.filter(driver=self.driver).update(rating_sum=1)
+        admin = User.objects.create_superuser(email='admin@example.com', password='testpass123')
+        self.client.force_authenticate(admin)
+        etag = self.client.get(reverse('user:list_user'), {'user_type': 'driver'})['ETag']
+
+        call_command('backfill_driver_ratings', stdout=StringIO())
+
+        res = self.client.get(reverse('user:list_user'), {'user_type': 'driver'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'][0]['satisfaction_rate'], 100.0)
@@ -0,0 +1,268 @@
+"""
+Tests for rides, their counters and partitions.
+"""
+import gzip
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from django.test import TestCase
+from django.core.management import CommandError, call_command
+from django.contrib.auth import get_user_model
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ride
+from ride.partitions import (
+    add_months,
+    archive_partition,
+    create_partition,
+    existing_partitions,
+    month_start,
+    partition_name,
+)
+from ride.services import close_ride, create_ride
+
+
+RIDES_URL = reverse('ride:list')
+REQUEST_URL = reverse('ride:request')
+
+User = get_user_model()
+
+
+def complete_url(ride_id):
+    return reverse('ride:complete', args=[ride_id])
+
+
+def cancel_url(ride_id):
+    return reverse('ride:cancel', args=[ride_id])
+
+
+class RideTestMixin:
+
+    def setUp(self):
+        self.rider = User.objects.create_user(email='rider@example.com', password='testpass123', user_type='rider')
+        self.driver = User.objects.create_user(
+            email='driver@example.com',
+            password='testpass123',
+            user_type='driver',
+            is_online=True,
+            is_available=True,
+            is_verified_driver=True,
+            service_id=1,
+            latitude='48.857000',
+            longitude='2.353000',
+        )
+
+    def create_ride(self, **params):
+        return create_ride(self.rider, self.driver.id, '48.856600', '2.352200', **params)
+
+
+class RideCounterTests(RideTestMixin, TestCase):
+    """Test the per-user ride counters."""
+
+    def test_close_ride_updates_counters_once(self):
+        """Test closing a ride counts it once for both participants."""
+        ride = self.create_ride()
+
+        self.assertTrue(close_ride(ride, Ride.StatusChoices.COMPLETED))
+        self.assertFalse(close_ride(ride, Ride.StatusChoices.COMPLETED))
+        self.assertFalse(close_ride(ride, Ride.StatusChoices.CANCELLED))
+
+        for user in (self.rider, self.driver):
+            user.refresh_from_db()
+            self.assertEqual((user.completed_rides, user.cancelled_rides), (1, 0))
+        ride.refresh_from_db()
+        self.assertEqual(ride.status, Ride.StatusChoices.COMPLETED)
+        self.assertIsNotNone(ride.completed_at)
+
+    def test_closing_releases_driver(self):
+        """Test the driver is available again after the ride ends."""
+        User.objects.filter(pk=self.driver.pk).update(is_available=False)
+        close_ride(self.create_ride(), Ride.StatusChoices.CANCELLED)
+
+        self.driver.refresh_from_db()
+        self.assertTrue(self.driver.is_available)
+        self.assertEqual(self.driver.cancelled_rides, 1)
+
+
+class RideApiTests(RideTestMixin, TestCase):
+    """Test the ride endpoints."""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.rider)
+
+    def test_request_ride_matches_driver(self):
+        """Test requesting a ride reserves a driver and records the ride."""
+        res = self.client.post(REQUEST_URL, {'pickup_latitude': '48.8566', 'pickup_longitude': '2.3522', 'service_id': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        ride = Ride.objects.get()
+        self.assertEqual((ride.rider_id, ride.driver_id, ride.status), (self.rider.id, self.driver.id, 'accepted'))
+
+    def test_second_active_ride_conflicts(self):
+        """Test a rider with an active ride cannot reserve another driver."""
+        self.create_ride()
+        User.objects.create_user(
+            email='driver2@example.com', password='testpass123', user_type='driver', is_online=True,
+            is_available=True, is_verified_driver=True, service_id=1, latitude='48.857000', longitude='2.353000',
+        )
+
+        res = self.client.post(REQUEST_URL, {'pickup_latitude': '48.8566', 'pickup_longitude': '2.3522', 'service_id': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Ride.objects.count(), 1)
+        self.assertEqual(User.objects.filter(is_available=True).count(), 2)
+
+    def test_driver_is_not_matched_to_themselves(self):
+        """Test an online driver requesting a ride gets another driver."""
+        self.client.force_authenticate(self.driver)
+
+        res = self.client.post(REQUEST_URL, {'pickup_latitude': '48.8566', 'pickup_longitude': '2.3522', 'service_id': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.driver.refresh_from_db()
+        self.assertTrue(self.driver.is_available)
+
+    def test_failed_request_keeps_driver_available(self):
+        """Test a ride that cannot be recorded does not hold on to its driver."""
+        with mock.patch('ride.views.create_ride', side_effect=RuntimeError), self.assertRaises(RuntimeError):
+            self.client.post(REQUEST_URL, {'pickup_latitude': '48.8566', 'pickup_longitude': '2.3522', 'service_id': 1})
+
+        self.driver.refresh_from_db()
+        self.assertTrue(self.driver.is_available)
+
+    def test_list_only_reads_recent_rides(self):
+        """Test the listing is limited to the caller and the history window."""
+        recent = self.create_ride()
+        self.create_ride(created_at=timezone.now() - timedelta(days=200))
+        other = User.objects.create_user(email='other@example.com', password='testpass123', user_type='rider')
+        create_ride(other, self.driver.id, '48.856600', '2.352200')
+
+        res = self.client.get(RIDES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([ride['id'] for ride in res.data['results']], [recent.id])
+        res = self.client.get(RIDES_URL, {'days': 365})
+        self.assertEqual(res.data['count'], 2)
+
+    def test_only_driver_completes(self):
+        """Test a rider can cancel but not complete a ride."""
+        ride = self.create_ride()
+
+        self.assertEqual(self.client.post(complete_url(ride.id)).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.post(cancel_url(ride.id)).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.post(cancel_url(ride.id)).status_code, status.HTTP_409_CONFLICT)
+
+    def test_user_list_reads_counters(self):
+        """Test the user list reports counters without touching rides."""
+        admin = User.objects.create_superuser(email='admin@example.com', password='testpass123', username='admin', user_type='admin')
+        close_ride(self.create_ride(), Ride.StatusChoices.CANCELLED)
+        self.client.force_authenticate(admin)
+
+        res = self.client.get(reverse('user:list_user'), {'user_type': 'rider'})
+
+        rider = next(row for row in res.data['results'] if row['id'] == self.rider.id)
+        self.assertEqual((rider['completed_rides'], rider['cancelled_rides']), (0, 1))
+
+
+class RidePartitionTests(RideTestMixin, TestCase):
+    """Test monthly partition maintenance."""
+
+    def test_create_partition_moves_default_rows(self):
+        """Test rows parked in the default partition move to their month."""
+        month = month_start(timezone.now())
+        ride = self.create_ride()
+
+        self.assertEqual(create_partition(month), 1)
+
+        self.assertEqual(existing_partitions(), {month: partition_name(month)})
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT id FROM "{partition_name(month)}"')
+            self.assertEqual(cursor.fetchall(), [(ride.id,)])
+        self.assertEqual(Ride.objects.get().id, ride.id)
+
+    def test_queries_prune_partitions(self):
+        """Test a time-bounded query only reads the matching partition."""
+        month = month_start(timezone.now())
+        for offset in (-1, 0):
+            create_partition(add_months(month, offset))
+        start = datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+
+        plan = Ride.objects.filter(rider=self.rider, created_at__gte=start).explain()
+
+        self.assertIn(partition_name(month), plan)
+        self.assertNotIn(partition_name(add_months(month, -1)), plan)
+
+    def test_command_creates_and_archives(self):
+        """Test the command adds future months and archives expired ones."""
+        month = month_start(timezone.now())
+        old_month = add_months(month, -30)
+        old_ride = self.create_ride(created_at=datetime(old_month.year, old_month.month, 2, tzinfo=dt_timezone.utc))
+        create_partition(old_month)
+
+        with tempfile.TemporaryDirectory() as archive_dir:
+            call_command(
+                'manage_ride_partitions', ahead=2, retention_months=24,
+                archive=True, archive_dir=archive_dir, stdout=StringIO(),
+            )
+            with gzip.open(Path(archive_dir) / f'{partition_name(old_month)}.csv.gz', 'rt') as archive:
+                lines = archive.read().splitlines()
+
+        self.assertEqual(sorted(existing_partitions()), [month, add_months(month, 1), add_months(month, 2)])
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith(f'{old_ride.id},'))
+        self.assertFalse(Ride.objects.exists())
+
+    def test_archive_written_before_drop(self):
+        """Test a partition is only detached and dropped once its archive is complete."""
+        old_month = add_months(month_start(timezone.now()), -30)
+        old_ride = self.create_ride(created_at=datetime(old_month.year, old_month.month, 2, tzinfo=dt_timezone.utc))
+        create_partition(old_month)
+        name = partition_name(old_month)
+        attached_while_copying = []
+
+        def full_disk(path, mode):
+            attached_while_copying.append(old_month in existing_partitions())
+            raise OSError('No space left on device')
+
+        with tempfile.TemporaryDirectory() as archive_dir:
+            with mock.patch('ride.partitions.gzip.open', side_effect=full_disk):
+                with self.assertRaises(OSError):
+                    archive_partition(name, archive_dir)
+
+            self.assertFalse((Path(archive_dir) / f'{name}.csv.gz').exists())
+            path = archive_partition(name, archive_dir)
+
+            self.assertTrue(path.exists())
+        self.assertEqual(attached_while_copying, [True])
+        self.assertNotIn(old_month, existing_partitions())
+        self.assertFalse(Ride.objects.filter(pk=old_ride.pk).exists())
+
+    def test_command_without_archive_keeps_old_partitions(self):
+        """Test the startup run only creates partitions."""
+        month = month_start(timezone.now())
+        old_month = add_months(month, -30)
+        create_partition(old_month)
+
+        call_command('manage_ride_partitions', ahead=1, retention_months=24, stdout=StringIO())
+
+        self.assertEqual(sorted(existing_partitions()), [old_month, month, add_months(month, 1)])
+
+    def test_archive_refuses_without_archive_dir(self):
+        """Test archiving drops nothing when there is nowhere to copy it."""
+        old_month = add_months(month_start(timezone.now()), -30)
+        create_partition(old_month)
+
+        with self.assertRaises(CommandError):
+            call_command('manage_ride_partitions', archive=True, archive_dir=None, stdout=StringIO())
+
+        self.assertIn(old_month, existing_partitions())
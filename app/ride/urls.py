@@ -0,0 +1,22 @@
+from django.urls import path
+
+from core.models import Ride
+from ride.views import (
+    FareEstimateView,
+    RideListView,
+    RideRateView,
+    RideRequestView,
+    RideStatusView,
+)
+
+app_name = 'ride'
+
+
+urlpatterns = [
+    path('', RideListView.as_view(), name='list'),
+    path('request/', RideRequestView.as_view(), name='request'),
+    path('estimate/', FareEstimateView.as_view(), name='estimate'),
+    path('<int:pk>/complete/', RideStatusView.as_view(target_status=Ride.StatusChoices.COMPLETED), name='complete'),
+    path('<int:pk>/cancel/', RideStatusView.as_view(target_status=Ride.StatusChoices.CANCELLED), name='cancel'),
+    path('<int:pk>/rate/', RideRateView.as_view(), name='rate'),
+]
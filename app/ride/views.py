@@ -0,0 +1,214 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import generics, status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from app.utils.custom_pagination import CustomPagination
+from app.utils.idempotency import IdempotencyMixin
+from app.utils.schema_hints import OpenApiTypes, extend_schema
+from core.models import Ride
+from driver.matching import match_driver
+from ride.fares import estimate_fares
+from ride.serializers import FareEstimateSerializer, RideRatingSerializer, RideRequestSerializer, RideSerializer
+from ride.services import close_ride, create_ride, rate_ride
+from sos.services import resolve_region
+
+
+User = get_user_model()
+
+
+class RideListView(generics.ListAPIView):
+    """List the caller's recent rides, newest first.
+
+    Only the last ``days`` days are read (``RIDE_LIST_DEFAULT_DAYS`` by
+    default), so older monthly partitions are never scanned.
+    """
+    serializer_class = RideSerializer
+    pagination_class = CustomPagination
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def get_queryset(self):
+        user = self.request.user
+        try:
+            days = max(int(self.request.query_params.get('days', settings.RIDE_LIST_DEFAULT_DAYS)), 1)
+        except ValueError:
+            days = settings.RIDE_LIST_DEFAULT_DAYS
+
+        queryset = Ride.objects.filter(created_at__gte=timezone.now() - timedelta(days=days))
+        if user.user_type == user.UserTypeChoices.DRIVER:
+            queryset = queryset.filter(driver=user)
+        else:
+            queryset = queryset.filter(rider=user)
+
+        ride_status = self.request.query_params.get('status')
+        if ride_status:
+            queryset = queryset.filter(status=ride_status)
+        return queryset.order_by('-created_at', '-id')
+
+
+class RideRequestView(IdempotencyMixin, APIView):
+    serializer_class = RideRequestSerializer
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        # The reservation only commits with the ride that holds it.
+        with transaction.atomic():
+            # Locking the rider serializes their requests, so two cannot both
+            # pass the active ride check.
+            User.objects.select_for_update().filter(pk=request.user.pk).exists()
+            if Ride.objects.filter(rider=request.user, status__in=Ride.ACTIVE_STATUSES).exists():
+                return Response({
+                    'status': 'error',
+                    'message': _('You already have an active ride.'),
+                }, status=status.HTTP_409_CONFLICT)
+            match = match_driver(
+                data['pickup_latitude'], data['pickup_longitude'], data['service_id'],
+                exclude_id=request.user.pk,
+            )
+            if match is None:
+                return Response({
+                    'status': 'error',
+                    'message': _('No driver available nearby.'),
+                }, status=status.HTTP_404_NOT_FOUND)
+            ride = create_ride(request.user, match.driver_id, **data)
+        return Response({
+            'status': 'success',
+            'message': _('Ride accepted.'),
+            'data': RideSerializer(ride).data,
+        }, status=status.HTTP_201_CREATED)
+
+
+class RideStatusView(IdempotencyMixin, APIView):
+    """Complete or cancel one of the caller's rides."""
+    target_status = None
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    @extend_schema(request=None, responses=RideSerializer)
+    def post(self, request, pk):
+        user = request.user
+        ride = Ride.objects.filter(Q(rider=user) | Q(driver=user), pk=pk).first()
+        if ride is None:
+            return Response({
+                'status': 'error',
+                'message': _('Ride not found.'),
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        if self.target_status == Ride.StatusChoices.COMPLETED and ride.driver_id != user.id:
+            return Response({
+                'status': 'error',
+                'message': _('Only the driver can complete a ride.'),
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        if not close_ride(ride, self.target_status):
+            return Response({
+                'status': 'error',
+                'message': _('Ride is no longer active.'),
+            }, status=status.HTTP_409_CONFLICT)
+
+        return Response({
+            'status': 'success',
+            'message': _('Ride updated.'),
+            'data': RideSerializer(ride).data,
+        }, status=status.HTTP_200_OK)
+
+
+class RideRateView(IdempotencyMixin, APIView):
+    """Let the rider rate the driver of a completed ride, once."""
+    serializer_class = RideRatingSerializer
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def post(self, request, pk):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ride = Ride.objects.filter(
+            pk=pk,
+            rider=request.user,
+            status=Ride.StatusChoices.COMPLETED,
+            driver__isnull=False,
+        ).first()
+        if ride is None:
+            return Response({
+                'status': 'error',
+                'message': _('Ride not found.'),
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            rating = rate_ride(ride, **serializer.validated_data)
+        except IntegrityError:
+            return Response({
+                'status': 'error',
+                'message': _('This ride has already been rated.'),
+            }, status=status.HTTP_409_CONFLICT)
+
+        return Response({
+            'status': 'success',
+            'message': _('Thanks for your rating.'),
+            'data': {'id': rating.id, 'score': rating.score},
+        }, status=status.HTTP_201_CREATED)
+
+
+class FareEstimateView(APIView):
+    """Quote one or more routes for one or every service of a region."""
+    serializer_class = FareEstimateSerializer
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    @extend_schema(responses={200: OpenApiTypes.OBJECT})
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        routes = data['routes']
+
+        region_id = data.get('region_id')
+        if region_id is None:
+            region_id = resolve_region(routes[0]['pickup_latitude'], routes[0]['pickup_longitude'])
+        pickups = [(route['pickup_latitude'], route['pickup_longitude']) for route in routes]
+        dropoffs = [(route['dropoff_latitude'], route['dropoff_longitude']) for route in routes]
+        estimate = estimate_fares(region_id, pickups, dropoffs, data.get('service_id')) if region_id else None
+        if estimate is None:
+            return Response({
+                'status': 'error',
+                'message': _('No tariff available for this region and service.'),
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        services = list(zip(estimate.service_ids, estimate.currencies))
+        return Response({
+            'status': 'success',
+            'message': _('Fare estimates.'),
+            'data': {
+                'region': region_id,
+                'estimates': [
+                    {
+                        'distance_km': round(distance_km, 3),
+                        'duration_minutes': round(minutes, 1),
+                        'fares': [
+                            {'service_id': service_id, 'fare': fare, 'currency': currency}
+                            for (service_id, currency), fare in zip(services, fares)
+                        ],
+                    }
+                    for distance_km, minutes, fares in zip(
+                        estimate.distance_km.tolist(), estimate.minutes.tolist(), estimate.fares.tolist(),
+                    )
+                ],
+            },
+        }, status=status.HTTP_200_OK)
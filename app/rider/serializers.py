@@ -8,6 +8,8 @@ from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from app.utils.uploads import ImageUploadField
+
 
 User = get_user_model()
 
@@ -18,6 +20,8 @@ class RiderSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=6, style={'input_type': 'password'})
     confirm_password = serializers.CharField(write_only=True, required=True, min_length=6, style={'input_type': 'password'})
     phone_number = serializers.CharField(required=True)
+    # Type, size and dimensions are checked from the file header, without decoding it.
+    profile_image = ImageUploadField(required=False, allow_null=True, max_size=1024 * 1024, min_dimensions=(100, 100))
 
     class Meta:
         model = User
@@ -58,20 +62,6 @@ class RiderSerializer(serializers.ModelSerializer):
             if gender not in User.GenderUnitChoices.values:
                 raise serializers.ValidationError(_('Invalid gender choice.'))
 
-        profile_image = data.get('profile_image')
-        if profile_image:
-            # Check if the uploaded file is an image
-            if not profile_image.content_type.startswith('image'):
-                raise serializers.ValidationError(_('File must be an image.'))
-
-            # Check if the image is too large
-            if profile_image.size > (1024 * 1024):
-                raise serializers.ValidationError(_('Image file size must be under 1 MB.'))
-
-            # Check if the image is too small
-            if profile_image.width < 100 or profile_image.height < 100:
-                raise serializers.ValidationError(_('Image dimensions must be at least 100x100 px.'))
-
         timezone_data = data.get('timezone')
         if timezone_data:
             try:
@@ -9,13 +9,16 @@ from rest_framework.permissions import (
     AllowAny,
 )
 
+from app.utils.idempotency import IdempotencyMixin
+from app.utils.throttling import PublicThrottleMixin
 from rider.serializers import RiderSerializer
 
 
 User = get_user_model()
 
 
-class UserRegisterView(generics.CreateAPIView):
+class UserRegisterView(PublicThrottleMixin, IdempotencyMixin, generics.CreateAPIView):
+    throttle_scope = 'register'
     permission_classes = (AllowAny,)
     serializer_class = RiderSerializer
 
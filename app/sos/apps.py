@@ -0,0 +1,16 @@
+from django.apps import AppConfig
+
+
+class SosConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'sos'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from core.models import Regions, Sos
+        from sos.services import invalidate_contacts
+
+        for model in (Regions, Sos):
+            post_save.connect(invalidate_contacts, sender=model, dispatch_uid=f'sos_invalidate_{model.__name__}_save')
+            post_delete.connect(invalidate_contacts, sender=model, dispatch_uid=f'sos_invalidate_{model.__name__}_delete')
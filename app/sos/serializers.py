@@ -0,0 +1,21 @@
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import serializers
+
+from sos.services import active_region_ids
+
+
+class SosTriggerSerializer(serializers.Serializer):
+    region_id = serializers.IntegerField(required=False, min_value=1)
+    latitude = serializers.DecimalField(max_digits=9, decimal_places=6, required=False, min_value=-90, max_value=90)
+    longitude = serializers.DecimalField(max_digits=9, decimal_places=6, required=False, min_value=-180, max_value=180)
+
+    def validate_region_id(self, value):
+        if value not in active_region_ids():
+            raise serializers.ValidationError(_('Unknown or inactive region.'))
+        return value
+
+    def validate(self, data):
+        if ('latitude' in data) != ('longitude' in data):
+            raise serializers.ValidationError(_('Latitude and longitude must be sent together.'))
+        return data
@@ -0,0 +1,130 @@
+"""
+Region lookup and contact fan-out for SOS alerts.
+
+Active regions and each region's contacts are kept in process memory. A
+version token in the cache is replaced whenever a region or contact is
+saved or deleted, so every worker sharing that cache reloads on its next
+alert. Workers that do not share it, such as uWSGI processes on the
+default LocMem cache, and writes that bypass the signals, are caught by
+``SOS_CONTACTS_LOCAL_TTL``: no copy is served once it is that many
+seconds old.
+"""
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from app.utils.geo import haversine_km, parse_point
+from core.models import NotificationOutbox, Regions, Sos, SosAlert
+
+
+VERSION_KEY = 'sos:contacts:version'
+SOS_PRIORITY = 100
+
+_regions = {}
+_contacts = {}
+
+
+def _current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate_contacts(**kwargs):
+    """Signal receiver: make every worker reload regions and contacts."""
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+    _regions.clear()
+    _contacts.clear()
+
+
+def _fresh(version, entry_version, loaded_at):
+    return entry_version == version and time.monotonic() - loaded_at < settings.SOS_CONTACTS_LOCAL_TTL
+
+
+def _load_regions():
+    version = _current_version()
+    if not _regions or not _fresh(version, _regions['version'], _regions['loaded_at']):
+        ids, centres = [], []
+        for region_id, coordinates in Regions.objects.filter(status=1).values_list('id', 'coordinates'):
+            ids.append(region_id)
+            point = parse_point(coordinates)
+            if point is not None:
+                centres.append((region_id, *point))
+        _regions.update(version=version, loaded_at=time.monotonic(), ids=frozenset(ids), centres=tuple(centres))
+    return _regions
+
+
+def active_regions():
+    """Return ``(id, latitude, longitude)`` for every active region with a centre."""
+    return _load_regions()['centres']
+
+
+def active_region_ids():
+    """Return the ids of every active region, with or without a centre."""
+    return _load_regions()['ids']
+
+
+def resolve_region(latitude, longitude):
+    """Return the id of the active region whose centre is nearest the point."""
+    centres = active_regions()
+    if not centres:
+        return None
+    return min(centres, key=lambda centre: haversine_km(latitude, longitude, centre[1], centre[2]))[0]
+
+
+def region_contacts(region_id):
+    """Return the active ``(title, contact_number)`` pairs of a region.
+
+    Ids that are not active regions get no contacts and are not cached.
+    """
+    if region_id not in active_region_ids():
+        return ()
+    version = _current_version()
+    entry = _contacts.get(region_id)
+    if entry is None or not _fresh(version, entry[0], entry[1]):
+        contacts = tuple(
+            Sos.objects
+            .filter(region_id=region_id, status=Sos.StatusChoices.ACTIVE)
+            .exclude(contact_number__isnull=True)
+            .exclude(contact_number='')
+            .values_list('title', 'contact_number')
+        )
+        entry = _contacts[region_id] = (version, time.monotonic(), contacts)
+    return entry[2]
+
+
+def trigger_alert(user, region_id, latitude, longitude, contacts):
+    """Record the alert and queue one SMS per contact in a single transaction.
+
+    Delivery happens in the notification workers. The statement timeout
+    bounds how long a slow database can hold the request.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL statement_timeout = %s', [settings.SOS_STATEMENT_TIMEOUT_MS])
+
+        alert = SosAlert.objects.create(
+            user=user,
+            region_id=region_id,
+            latitude=latitude,
+            longitude=longitude,
+            contacts_notified=len(contacts),
+        )
+        where = f' Location: https://maps.google.com/?q={latitude},{longitude}' if latitude is not None else ''
+        NotificationOutbox.objects.bulk_create(
+            NotificationOutbox(
+                provider=NotificationOutbox.ProviderChoices.SMS,
+                token=contact_number,
+                title='SOS',
+                body=f'{user.full_name.strip() or user.email} needs help.{where}',
+                data={'alert_id': alert.id},
+                priority=SOS_PRIORITY,
+            )
+            for _, contact_number in contacts
+        )
+    return alert
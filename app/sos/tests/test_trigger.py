@@ -0,0 +1,119 @@
+"""
+Tests for the SOS trigger endpoint.
+"""
+import time
+from unittest.mock import patch
+
+from django.conf import settings
+from django.urls import reverse
+from django.db import DatabaseError
+from django.test import TestCase
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import NotificationOutbox, Regions, Sos, SosAlert
+from sos import services
+from sos.services import region_contacts, resolve_region
+
+
+TRIGGER_URL = reverse('sos:trigger')
+
+
+class SosTriggerTests(TestCase):
+    """Test triggering SOS alerts."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='rider@example.com',
+            password='testpass123',
+            first_name='Jane',
+            last_name='Doe',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.paris = Regions.objects.create(name='Paris', coordinates='48.8566,2.3522')
+        self.lyon = Regions.objects.create(name='Lyon', coordinates='45.7640,4.8357')
+        Sos.objects.create(region=self.paris, title='Police', contact_number='+33 17')
+        Sos.objects.create(region=self.paris, title='Old line', contact_number='+33 00', status='inactive')
+        Sos.objects.create(region=self.lyon, title='Police Lyon', contact_number='+33 18')
+
+    def test_trigger_queues_active_contacts(self):
+        """Test an alert is recorded and each active contact gets an SMS."""
+        res = self.client.post(TRIGGER_URL, {'latitude': '48.85', 'longitude': '2.35'})
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data['data']['region'], self.paris.id)
+        self.assertEqual(res.data['data']['contacts'], [{'title': 'Police', 'contact_number': '+33 17'}])
+        self.assertIn('Server-Timing', res)
+        alert = SosAlert.objects.get()
+        outbox = NotificationOutbox.objects.get()
+        self.assertEqual(outbox.provider, 'sms')
+        self.assertEqual(outbox.token, '+33 17')
+        self.assertEqual(outbox.data, {'alert_id': alert.id})
+        self.assertGreater(outbox.priority, 0)
+
+    def test_resolves_nearest_region(self):
+        """Test the caller's position picks the nearest region centre."""
+        self.assertEqual(resolve_region(45.75, 4.85), self.lyon.id)
+        self.assertEqual(resolve_region(48.9, 2.3), self.paris.id)
+
+    def test_contacts_served_from_memory(self):
+        """Test repeated lookups do not query the database."""
+        region_contacts(self.paris.id)
+
+        with self.assertNumQueries(0):
+            contacts = region_contacts(self.paris.id)
+
+        self.assertEqual(contacts, (('Police', '+33 17'),))
+
+    def test_contacts_invalidated_on_save(self):
+        """Test a new contact is visible to the next alert."""
+        region_contacts(self.paris.id)
+
+        Sos.objects.create(region=self.paris, title='Ambulance', contact_number='+33 15')
+
+        self.assertEqual(len(region_contacts(self.paris.id)), 2)
+
+    def test_contacts_expire_without_invalidation(self):
+        """Test a change another worker's cache never heard of shows once the copy expires."""
+        region_contacts(self.paris.id)
+        # A queryset update sends no signal, like a save seen only by another worker's cache.
+        Sos.objects.filter(region=self.paris, title='Old line').update(status='active')
+        loaded_at = time.monotonic()
+
+        with patch('sos.services.time.monotonic', return_value=loaded_at + settings.SOS_CONTACTS_LOCAL_TTL - 1):
+            self.assertEqual(len(region_contacts(self.paris.id)), 1)
+        with patch('sos.services.time.monotonic', return_value=loaded_at + settings.SOS_CONTACTS_LOCAL_TTL + 1):
+            self.assertEqual(len(region_contacts(self.paris.id)), 2)
+
+    def test_unresolved_region(self):
+        """Test an error is returned when no region matches."""
+        Regions.objects.update(status=0)
+
+        res = self.client.post(TRIGGER_URL, {'latitude': '48.85', 'longitude': '2.35'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unknown_or_inactive_region_rejected(self):
+        """Test a region id that is not an active region is a client error, not an outage."""
+        inactive = Regions.objects.create(name='Closed', coordinates='43.3,5.4', status=0)
+
+        for region_id in (self.lyon.id + 1000, inactive.id):
+            res = self.client.post(TRIGGER_URL, {'region_id': region_id})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('region_id', res.data)
+            self.assertNotIn(region_id, services._contacts)
+        self.assertFalse(SosAlert.objects.exists())
+
+    @patch('sos.views.trigger_alert', side_effect=DatabaseError('canceling statement due to statement timeout'))
+    def test_contacts_returned_when_queueing_fails(self, patched_trigger):
+        """Test a slow database still returns contacts to dial."""
+        res = self.client.post(TRIGGER_URL, {'region_id': self.lyon.id})
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(res.data['data']['contacts'][0]['contact_number'], '+33 18')
@@ -0,0 +1,12 @@
+from django.urls import path
+
+from sos.views import (
+    SosTriggerView,
+)
+
+app_name = 'sos'
+
+
+urlpatterns = [
+    path('trigger/', SosTriggerView.as_view(), name='trigger'),
+]
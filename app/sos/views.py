@@ -0,0 +1,64 @@
+import time
+
+from django.db import DatabaseError
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from app.utils import metrics
+from sos.serializers import SosTriggerSerializer
+from sos.services import region_contacts, resolve_region, trigger_alert
+
+
+class SosTriggerView(APIView):
+    serializer_class = SosTriggerSerializer
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def post(self, request):
+        start = time.perf_counter()
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = request.user
+
+        latitude = serializer.validated_data.get('latitude', user.latitude)
+        longitude = serializer.validated_data.get('longitude', user.longitude)
+        region_id = serializer.validated_data.get('region_id')
+        if region_id is None and latitude is not None and longitude is not None:
+            region_id = resolve_region(latitude, longitude)
+        if region_id is None:
+            return Response({
+                'status': 'error',
+                'message': _('Unable to resolve a region for this location.'),
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        contacts = region_contacts(region_id)
+        try:
+            alert = trigger_alert(user, region_id, latitude, longitude, contacts)
+        except DatabaseError:
+            # Contacts come from memory, so the caller can still dial them.
+            alert = None
+            metrics.incr('sos.enqueue_failed')
+
+        elapsed = time.perf_counter() - start
+        metrics.observe('sos.trigger', elapsed)
+
+        response = Response({
+            'status': 'success' if alert else 'error',
+            'message': _('SOS sent.') if alert else _('SOS could not be queued, call your contacts directly.'),
+            'data': {
+                'alert': alert.id if alert else None,
+                'region': region_id,
+                'contacts': [
+                    {'title': title, 'contact_number': contact_number}
+                    for title, contact_number in contacts
+                ],
+            },
+        }, status=status.HTTP_202_ACCEPTED if alert else status.HTTP_503_SERVICE_UNAVAILABLE)
+        response['Server-Timing'] = f'sos;dur={elapsed * 1000:.1f}'
+        return response
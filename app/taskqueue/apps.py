@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class TaskQueueConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'taskqueue'
+
+    def ready(self):
+        from django.utils.module_loading import autodiscover_modules
+
+        # Registers every app's @task functions, in web and worker processes alike.
+        autodiscover_modules('tasks')
@@ -0,0 +1,41 @@
+"""
+Registry of functions that can run as background tasks.
+
+Decorate a function in an app's ``tasks.py`` with ``@task()``; modules
+of that name are imported at startup. Call ``func.delay(*args, **kwargs)``
+to queue it, or ``func.enqueue(args, kwargs, run_at=...)`` to schedule it.
+Arguments are stored as JSON.
+"""
+from functools import partial
+
+from taskqueue.services import enqueue
+
+
+_tasks = {}
+
+
+class PermanentError(Exception):
+    """Raise from a task to fail it without further retries."""
+
+
+def task(name=None, queue='default', priority=0, max_attempts=None):
+    """Register the decorated function as a task named ``name``.
+
+    The name defaults to the function's dotted path; queue, priority and
+    max_attempts are defaults that ``enqueue`` can override.
+    """
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__qualname__}'
+        if _tasks.get(task_name, func) is not func:
+            raise ValueError(f'Task {task_name!r} is already registered.')
+        _tasks[task_name] = func
+        func.task_name = task_name
+        func.enqueue = partial(enqueue, task_name, queue=queue, priority=priority, max_attempts=max_attempts)
+        func.delay = lambda *args, **kwargs: func.enqueue(args, kwargs)
+        return func
+    return decorator
+
+
+def get_task(name):
+    """Return the function registered as ``name``, or None."""
+    return _tasks.get(name)
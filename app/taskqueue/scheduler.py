@@ -0,0 +1,61 @@
+"""
+Queue recurring tasks.
+
+``TASK_SCHEDULE`` maps task names to intervals in seconds. Each run_tasks
+process calls ``schedule_due()`` every ``TASK_SCHEDULER_INTERVAL``
+seconds; a task is queued once its interval has passed since it was last
+queued, unless an earlier run is still pending or running. The check and
+the insert run under a transaction-level advisory lock, so any number of
+run_tasks processes queue each run once.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from core.models import Task
+from taskqueue.registry import get_task
+from taskqueue.services import enqueue
+
+
+# Arbitrary, but fixed: every scheduler must take the same lock.
+SCHEDULER_LOCK_ID = 0x7461736B
+
+UNFINISHED = [Task.StatusChoices.PENDING, Task.StatusChoices.RUNNING]
+
+
+def schedule_due(schedule=None):
+    """Queue the scheduled tasks that are due; return their names."""
+    schedule = settings.TASK_SCHEDULE if schedule is None else schedule
+    if not schedule:
+        return []
+    now = timezone.now()
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_try_advisory_xact_lock(%s)', [SCHEDULER_LOCK_ID])
+            if not cursor.fetchone()[0]:
+                # Another process is scheduling right now.
+                return []
+        # Only runs inside the longest interval, or unfinished, can hold a task back.
+        since = now - timedelta(seconds=max(schedule.values()))
+        last_runs = {
+            row['name']: row
+            for row in Task.objects
+            .filter(Q(created_at__gte=since) | Q(status__in=UNFINISHED), name__in=list(schedule))
+            .values('name')
+            .annotate(last=Max('created_at'), unfinished=Count('id', filter=Q(status__in=UNFINISHED)))
+        }
+        queued = []
+        for name, interval in schedule.items():
+            last = last_runs.get(name)
+            if last and (last['unfinished'] or last['last'] > now - timedelta(seconds=interval)):
+                continue
+            func = get_task(name)
+            if func is not None:
+                func.enqueue()
+            else:
+                enqueue(name)
+            queued.append(name)
+    return queued
@@ -0,0 +1,31 @@
+"""
+Queue background tasks.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from core.models import Task
+
+
+def enqueue(name, args=(), kwargs=None, queue='default', priority=0, max_attempts=None, run_at=None, countdown=None):
+    """Queue task ``name`` and return the Task row.
+
+    The row is written in the caller's transaction, so a task queued by a
+    request that rolls back never runs. ``run_at`` or ``countdown``
+    seconds delay the first attempt.
+    """
+    if run_at is None:
+        run_at = timezone.now()
+        if countdown:
+            run_at += timedelta(seconds=countdown)
+    return Task.objects.create(
+        queue=queue,
+        name=name,
+        args=list(args),
+        kwargs=kwargs or {},
+        priority=priority,
+        max_attempts=max_attempts or settings.TASK_MAX_ATTEMPTS,
+        run_at=run_at,
+    )
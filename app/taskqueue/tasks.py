@@ -0,0 +1,20 @@
+"""
+Housekeeping tasks for the queue itself.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from core.models import Task
+from taskqueue.registry import task
+
+
+@task(name='taskqueue.purge_finished')
+def purge_finished(days=None):
+    """Delete succeeded tasks older than ``TASK_RETENTION_DAYS``."""
+    days = settings.TASK_RETENTION_DAYS if days is None else days
+    Task.objects.filter(
+        status=Task.StatusChoices.SUCCEEDED,
+        finished_at__lt=timezone.now() - timedelta(days=days),
+    ).delete()
@@ -0,0 +1,230 @@
+"""
+Tests for the database task queue.
+"""
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.test import TestCase, TransactionTestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Regions, Task
+from taskqueue.registry import PermanentError, task
+from taskqueue.scheduler import schedule_due
+from taskqueue.worker import claim, execute, requeue_stale, run_batch
+
+
+TASK_METRICS_URL = reverse('taskqueue:metrics')
+
+calls = []
+calls_lock = threading.Lock()
+
+
+@task(name='tests.record')
+def record(value, suffix=''):
+    with calls_lock:
+        calls.append(f'{value}{suffix}')
+
+
+@task(name='tests.tick')
+def tick():
+    record('tick')
+
+
+@task(name='tests.flaky')
+def flaky():
+    raise ConnectionError('Upstream unavailable.')
+
+
+@task(name='tests.broken')
+def broken():
+    raise PermanentError('Bad input.')
+
+
+@task(name='tests.outlive_lock')
+def outlive_lock():
+    # Runs past a lock timeout of 0.1 s, then lets the requeue sweep look.
+    time.sleep(0.4)
+    record('requeued', requeue_stale(timeout=0.1))
+
+
+@task(name='tests.create_region')
+def create_region(name):
+    Regions.objects.create(name=name)
+
+
+class TaskQueueTests(TestCase):
+    """Test queueing, running and retrying tasks."""
+
+    def setUp(self):
+        calls.clear()
+        cache.clear()
+
+    def test_delay_only_queues(self):
+        """Test queueing writes a pending row and runs nothing."""
+        record.delay('a', suffix='!')
+
+        queued = Task.objects.get()
+        self.assertEqual((queued.name, queued.args, queued.kwargs), ('tests.record', ['a'], {'suffix': '!'}))
+        self.assertEqual(queued.status, Task.StatusChoices.PENDING)
+        self.assertEqual(calls, [])
+
+    def test_rolled_back_enqueue_never_runs(self):
+        """Test a task queued in a rolled back transaction is discarded."""
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            record.delay('a')
+            raise RuntimeError
+
+        self.assertEqual(run_batch(), 0)
+
+    def test_runs_due_tasks_by_priority(self):
+        """Test due tasks run highest priority first and scheduled ones wait."""
+        record.delay('low')
+        record.enqueue(['high'], priority=5)
+        record.enqueue(['later'], countdown=60)
+
+        self.assertEqual(run_batch(batch_size=10), 2)
+
+        self.assertEqual(calls, ['high', 'low'])
+        self.assertEqual(Task.objects.filter(status=Task.StatusChoices.SUCCEEDED).count(), 2)
+        self.assertEqual(Task.objects.get(status=Task.StatusChoices.PENDING).args, ['later'])
+
+    def test_retries_with_backoff_then_fails(self):
+        """Test a failing task is retried later until max_attempts."""
+        flaky.enqueue(max_attempts=2)
+
+        run_batch()
+        queued = Task.objects.get()
+        self.assertEqual((queued.status, queued.attempts), (Task.StatusChoices.PENDING, 1))
+        self.assertGreater(queued.run_at, timezone.now())
+        self.assertIn('Upstream unavailable.', queued.last_error)
+        self.assertEqual(run_batch(), 0)
+
+        Task.objects.update(run_at=timezone.now())
+        run_batch()
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (Task.StatusChoices.FAILED, 2))
+
+    def test_permanent_errors_and_unknown_tasks_fail_at_once(self):
+        """Test PermanentError and unregistered names are not retried."""
+        broken.delay()
+        Task.objects.create(name='tests.missing')
+
+        run_batch(batch_size=10)
+
+        self.assertEqual(Task.objects.filter(status=Task.StatusChoices.FAILED).count(), 2)
+
+    def test_requeues_tasks_of_dead_workers(self):
+        """Test a running task with an expired lock is queued again."""
+        record.delay('a')
+        claimed = claim()
+        Task.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(requeue_stale(timeout=60), 1)
+        self.assertEqual(Task.objects.get().status, Task.StatusChoices.PENDING)
+        # The original worker finishing late does not overwrite the new run.
+        run_batch()
+        execute(claimed[0])
+        self.assertEqual(calls, ['a', 'a'])
+        self.assertEqual(Task.objects.get().attempts, 2)
+
+    def test_recurring_tasks_queued_once_per_interval(self):
+        """Test a scheduled task is queued when due and not while a run is pending or recent."""
+        schedule = {'tests.tick': 3600, 'tests.flaky': 60}
+
+        self.assertEqual(schedule_due(schedule), ['tests.tick', 'tests.flaky'])
+        self.assertEqual(schedule_due(schedule), [])
+
+        run_batch(batch_size=10)
+        self.assertEqual(calls, ['tick'])
+        # Finished, but queued within the interval.
+        self.assertEqual(schedule_due(schedule), [])
+
+        Task.objects.update(created_at=timezone.now() - timedelta(minutes=2))
+        # The flaky run is pending again for its retry.
+        self.assertEqual(schedule_due(schedule), [])
+        Task.objects.filter(name='tests.flaky').update(status=Task.StatusChoices.FAILED)
+        self.assertEqual(schedule_due(schedule), ['tests.flaky'])
+
+        Task.objects.update(created_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(schedule_due(schedule), ['tests.tick'])
+
+    def test_metrics(self):
+        """Test queue depth and counters are exposed to admins."""
+        record.delay('a')
+        flaky.delay()
+        record.enqueue(['later'], countdown=60)
+        run_batch()
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_superuser(
+            email='admin@example.com', password='testpass123', username='admin', user_type='admin',
+        ))
+
+        res = client.get(TASK_METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['queues']['default']['pending'], 2)
+        self.assertEqual(res.data['queues']['default']['due'], 1)
+        self.assertEqual(res.data['counters']['tasks.succeeded'], 1)
+
+
+class TaskWorkerPoolTests(TransactionTestCase):
+    """Test the run_tasks command with concurrent workers."""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_thread_pool_runs_each_task_once(self):
+        """Test concurrent workers never run a task twice."""
+        for index in range(30):
+            record.delay(index)
+        out = StringIO()
+
+        call_command('run_tasks', '--once', '--no-schedule', '--concurrency', '4', stdout=out)
+
+        self.assertEqual(sorted(calls), sorted(str(index) for index in range(30)))
+        self.assertEqual(Task.objects.filter(status=Task.StatusChoices.SUCCEEDED).count(), 30)
+        self.assertIn('Running 4 thread workers', out.getvalue())
+
+    def test_once_runs_due_recurring_tasks(self):
+        """Test a drain queues and runs the scheduled tasks that are due."""
+        Task.objects.create(
+            name='tests.record', status=Task.StatusChoices.SUCCEEDED,
+            finished_at=timezone.now() - timedelta(days=30),
+        )
+
+        with self.settings(TASK_SCHEDULE={'taskqueue.purge_finished': 3600}):
+            call_command('run_tasks', '--once', '--concurrency', '1', stdout=StringIO())
+
+        self.assertEqual(list(Task.objects.values_list('name', 'status')), [('taskqueue.purge_finished', 'succeeded')])
+
+    def test_heartbeat_keeps_long_task_claimed(self):
+        """Test a task running past the lock timeout is not queued again."""
+        outlive_lock.delay()
+        [claimed] = claim()
+
+        with self.settings(TASK_HEARTBEAT_INTERVAL=0.05):
+            outcome = execute(claimed)
+
+        self.assertEqual(outcome, 'succeeded')
+        self.assertEqual(calls, ['requeued0'])
+        self.assertEqual(Task.objects.get().status, Task.StatusChoices.SUCCEEDED)
+
+    def test_process_pool(self):
+        """Test forked workers run tasks with their own connections."""
+        for index in range(6):
+            create_region.delay(f'region-{index}')
+
+        call_command('run_tasks', '--once', '--no-schedule', '--pool', 'process', '--concurrency', '2', stdout=StringIO())
+
+        self.assertEqual(Regions.objects.count(), 6)
+        self.assertFalse(Task.objects.exclude(status=Task.StatusChoices.SUCCEEDED).exists())
@@ -0,0 +1,12 @@
+from django.urls import path
+
+from taskqueue.views import (
+    TaskMetricsView,
+)
+
+app_name = 'taskqueue'
+
+
+urlpatterns = [
+    path('metrics/', TaskMetricsView.as_view(), name='metrics'),
+]
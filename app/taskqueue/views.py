@@ -0,0 +1,49 @@
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from rest_framework.views import APIView
+from rest_framework.response import Response
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from app.utils import metrics
+from app.utils.fleet_scope import IsSuperUser
+from app.utils.schema_hints import OpenApiTypes, extend_schema
+from core.models import Task
+
+
+class TaskMetricsView(APIView):
+    permission_classes = [IsSuperUser]
+    authentication_classes = [JWTAuthentication]
+
+    @extend_schema(responses={200: OpenApiTypes.OBJECT})
+    def get(self, request):
+        now = timezone.now()
+        # Only unfinished tasks are counted; both filters match a partial index.
+        queues = (
+            Task.objects
+            .filter(status__in=[Task.StatusChoices.PENDING, Task.StatusChoices.RUNNING])
+            .values('queue')
+            .annotate(
+                pending=Count('id', filter=Q(status=Task.StatusChoices.PENDING)),
+                due=Count('id', filter=Q(status=Task.StatusChoices.PENDING, run_at__lte=now)),
+                running=Count('id', filter=Q(status=Task.StatusChoices.RUNNING)),
+                oldest_due=Min('run_at', filter=Q(status=Task.StatusChoices.PENDING, run_at__lte=now)),
+            )
+            .order_by('queue')
+        )
+        counters = metrics.snapshot('tasks.succeeded', 'tasks.retried', 'tasks.failed', 'tasks.requeued')
+
+        return Response({
+            'queues': {
+                row['queue']: {
+                    'pending': row['pending'],
+                    'due': row['due'],
+                    'running': row['running'],
+                    'lag_seconds': (now - row['oldest_due']).total_seconds() if row['oldest_due'] else 0,
+                }
+                for row in queues
+            },
+            'counters': counters,
+            'runs': metrics.timing_snapshot('tasks.run'),
+        })
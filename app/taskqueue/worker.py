@@ -0,0 +1,167 @@
+"""
+Claim and run due tasks.
+
+Workers claim tasks with ``SELECT ... FOR UPDATE SKIP LOCKED``, mark them
+running and commit before running them, so no transaction stays open
+while a task runs and any number of workers can share a queue. While a
+task runs, a heartbeat thread refreshes its ``locked_at`` every
+``TASK_HEARTBEAT_INTERVAL`` seconds, so a long task keeps its claim. A
+worker that dies leaves its tasks running with a lock that stops moving;
+once it is older than ``TASK_LOCK_TIMEOUT`` they are queued again.
+
+Delivery is at least once: a worker that stalls for longer than the
+timeout, or dies after a task's side effects but before recording it,
+has the task run again, so tasks must be safe to repeat.
+"""
+import random
+import sys
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from app.utils import metrics
+from core.models import Task
+from taskqueue.registry import PermanentError, get_task
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter for the given number of attempts."""
+    delay = min(
+        settings.TASK_RETRY_BASE_DELAY * 2 ** (attempts - 1),
+        settings.TASK_RETRY_MAX_DELAY,
+    )
+    return timedelta(seconds=random.uniform(delay / 2, delay))
+
+
+def claim(batch_size=1, queues=('default',)):
+    """Mark up to ``batch_size`` due tasks running and return them."""
+    now = timezone.now()
+    with transaction.atomic():
+        tasks = list(
+            Task.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=Task.StatusChoices.PENDING, queue__in=queues, run_at__lte=now)
+            .order_by('-priority', 'run_at')
+            .only('id', 'name', 'args', 'kwargs', 'attempts', 'max_attempts')[:batch_size]
+        )
+        if tasks:
+            Task.objects.filter(pk__in=[task.pk for task in tasks]).update(
+                status=Task.StatusChoices.RUNNING, locked_at=now, attempts=F('attempts') + 1,
+            )
+    for task in tasks:
+        task.attempts += 1
+    return tasks
+
+
+def _claimed(task):
+    return Task.objects.filter(pk=task.pk, status=Task.StatusChoices.RUNNING, attempts=task.attempts)
+
+
+@contextmanager
+def heartbeat(task, interval=None):
+    """Refresh the claim of ``task`` every ``interval`` seconds until the block exits.
+
+    The refresh runs in its own thread, on that thread's connection, so it
+    keeps going while the task blocks.
+    """
+    interval = settings.TASK_HEARTBEAT_INTERVAL if interval is None else interval
+    done = threading.Event()
+
+    def beat():
+        try:
+            while not done.wait(interval):
+                try:
+                    _claimed(task).update(locked_at=timezone.now())
+                except DatabaseError:
+                    # Try again next beat; the lock timeout leaves room for a few misses.
+                    traceback.print_exc(file=sys.stderr)
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        done.set()
+        thread.join()
+
+
+def execute(task):
+    """Run one claimed task and record its outcome; return the outcome."""
+    start = time.perf_counter()
+    func = get_task(task.name)
+    error = None
+    try:
+        if func is None:
+            raise PermanentError(f'Unknown task {task.name!r}.')
+        with heartbeat(task):
+            func(*task.args, **task.kwargs)
+    except Exception as exc:
+        error = exc
+
+    now = timezone.now()
+    if error is None:
+        outcome, values = 'succeeded', {'status': Task.StatusChoices.SUCCEEDED, 'finished_at': now, 'last_error': None}
+    elif isinstance(error, PermanentError) or task.attempts >= task.max_attempts:
+        outcome, values = 'failed', {'status': Task.StatusChoices.FAILED, 'finished_at': now}
+    else:
+        outcome, values = 'retried', {'status': Task.StatusChoices.PENDING, 'run_at': now + retry_delay(task.attempts)}
+    if error is not None:
+        values['last_error'] = ''.join(traceback.format_exception(error))[-4000:]
+    # Only the worker holding the lock may record; a requeued task belongs to its new worker.
+    _claimed(task).update(locked_at=None, **values)
+
+    metrics.incr(f'tasks.{outcome}')
+    metrics.observe('tasks.run', time.perf_counter() - start)
+    return outcome
+
+
+def run_batch(batch_size=1, queues=('default',)):
+    """Claim and run one batch of due tasks; return how many ran."""
+    tasks = claim(batch_size, queues)
+    for task in tasks:
+        execute(task)
+    return len(tasks)
+
+
+def requeue_stale(timeout=None):
+    """Queue again running tasks whose lock expired; return how many."""
+    timeout = settings.TASK_LOCK_TIMEOUT if timeout is None else timeout
+    stale = Task.objects.filter(
+        status=Task.StatusChoices.RUNNING,
+        locked_at__lt=timezone.now() - timedelta(seconds=timeout),
+    )
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Task.StatusChoices.FAILED, locked_at=None, finished_at=timezone.now(), last_error='Lock expired.',
+    )
+    requeued = stale.update(status=Task.StatusChoices.PENDING, locked_at=None)
+    if failed or requeued:
+        metrics.incr('tasks.requeued', requeued)
+        metrics.incr('tasks.failed', failed)
+    return requeued
+
+
+def work(stop, batch_size=1, queues=('default',), interval=1.0, drain=False):
+    """Run tasks until ``stop`` is set, or until none are due with ``drain``.
+
+    One call per pool thread or process; each uses its own connection.
+    """
+    try:
+        while not stop.is_set():
+            close_old_connections()
+            if run_batch(batch_size, queues):
+                continue
+            requeue_stale()
+            if drain:
+                break
+            stop.wait(interval)
+    finally:
+        connections.close_all()
@@ -0,0 +1,102 @@
+"""
+Ranked admin search over users' email, username, phone and names.
+
+Migration 0013 adds ``core_user.search_vector``, a stored tsvector of
+that text with a GIN index, plus a trigram index on the text where the
+server has pg_trgm. With trigrams every term may match anywhere and
+results are ranked by similarity; otherwise every term must start a
+word, so ``doe`` finds ``john.doe@example.com``, and results are ranked
+with ts_rank. Results are ordered by ``(rank, id)`` and paged with a
+cursor on that pair, so a deep page costs the same as the first.
+"""
+import base64
+import json
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+
+# Keep in step with the trigram index of core migration 0013.
+SEARCH_TEXT_SQL = (
+    "lower(coalesce(email, '') || ' ' || coalesce(username, '') || ' ' || coalesce(phone_number, '')"
+    " || ' ' || coalesce(first_name, '') || ' ' || coalesce(last_name, ''))"
+)
+
+TERM_RE = re.compile(r'[^\W_]+')
+
+_trigram = {}
+
+
+def search_terms(text):
+    """Split a query into lowercase word terms, dropping punctuation."""
+    return TERM_RE.findall(text.lower())
+
+
+def trigram_enabled(using='default'):
+    """Return whether the trigram search index exists, checked once per process."""
+    if using not in _trigram:
+        with connections[using].cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_indexes WHERE indexname = 'user_search_trgm_idx'")
+            _trigram[using] = cursor.fetchone() is not None
+    return _trigram[using]
+
+
+def _match(queryset, terms):
+    """Return ``queryset`` filtered to rows matching every term, and the rank expression."""
+    if trigram_enabled(queryset.db):
+        for term in terms:
+            queryset = queryset.filter(
+                RawSQL(f'{SEARCH_TEXT_SQL} LIKE %s', (f'%{term}%',), output_field=BooleanField()),
+            )
+        rank = RawSQL(f'word_similarity(%s, {SEARCH_TEXT_SQL})::float8', (' '.join(terms),), output_field=FloatField())
+    else:
+        query = ' & '.join(f'{term}:*' for term in terms)
+        queryset = queryset.filter(
+            RawSQL("search_vector @@ to_tsquery('simple', %s)", (query,), output_field=BooleanField()),
+        )
+        rank = RawSQL("ts_rank(search_vector, to_tsquery('simple', %s))::float8", (query,), output_field=FloatField())
+    return queryset, rank
+
+
+def filter_users(queryset, text):
+    """Filter ``queryset`` to users matching every term of ``text``, unranked."""
+    terms = search_terms(text)
+    if not terms:
+        return queryset.none()
+    return _match(queryset, terms)[0]
+
+
+def search_users(queryset, text, after=None):
+    """Filter ``queryset`` to users matching every term of ``text``.
+
+    Rows are annotated with ``search_rank`` and ordered best first. Pass
+    the ``(rank, id)`` of the last row seen as ``after`` for the next page.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return queryset.none()
+
+    queryset, rank = _match(queryset, terms)
+    queryset = queryset.annotate(search_rank=rank)
+    if after is not None:
+        last_rank, last_id = after
+        queryset = queryset.filter(Q(search_rank__lt=last_rank) | Q(search_rank=last_rank, id__gt=last_id))
+    return queryset.order_by('-search_rank', 'id')
+
+
+def encode_cursor(rank, pk):
+    """Return an opaque cursor pointing after the row ``(rank, pk)``."""
+    return base64.urlsafe_b64encode(json.dumps([rank, pk]).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return the ``(rank, pk)`` of a cursor, or raise ValueError."""
+    try:
+        rank, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError, UnicodeError) as exc:
+        raise ValueError('Invalid cursor.') from exc
+    if not isinstance(rank, (int, float)) or not isinstance(pk, int):
+        raise ValueError('Invalid cursor.')
+    return float(rank), pk
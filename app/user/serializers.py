@@ -9,6 +9,10 @@ from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from app.utils.values_serializer import ValuesSerializer
+from core.models import DriverProfile
+from user.search import decode_cursor, search_terms
+
 
 User = get_user_model()
 
@@ -22,17 +26,57 @@ class UserListAllSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         ret = super().to_representation(instance)
         # Ajoute les informations supplémentaires à retourner dans la réponse
-        # Si l'utilisateur est un rider, on renvoie la liste des courses qu'il a effectuées
+        # Si l'utilisateur est un rider, on renvoie le nombre de courses qu'il a effectuées
         if instance.user_type == 'rider':
-            ret['completed_rides'] = instance.rides.filter(status='completed').count()
-            ret['cancelled_rides'] = instance.rides.filter(status='cancelled').count()
-        # Si l'utilisateur est un driver, on renvoie la liste des courses qu'il a effectuées et son taux de satisfaction
+            ret['completed_rides'] = instance.completed_rides
+            ret['cancelled_rides'] = instance.cancelled_rides
+        # Si l'utilisateur est un driver, on renvoie le nombre de courses qu'il a effectuées et son taux de satisfaction
         elif instance.user_type == 'driver':
-            ret['completed_rides'] = instance.rides.filter(status='completed').count()
-            ret['cancelled_rides'] = instance.rides.filter(status='cancelled').count()
-            ret['satisfaction_rate'] = instance.driver_profile.satisfaction_rate
+            ret['completed_rides'] = instance.completed_rides
+            ret['cancelled_rides'] = instance.cancelled_rides
+            profile = getattr(instance, 'driver_profile', None)
+            ret['satisfaction_rate'] = profile.satisfaction_rate if profile else None
         return ret
 
+
+class UserListAllValuesSerializer(ValuesSerializer):
+    """Fast read-only twin of UserListAllSerializer for list pages."""
+    model = User
+    fields = UserListAllSerializer.Meta.fields + [
+        'completed_rides',
+        'cancelled_rides',
+        ('rating_sum', 'driver_profile__rating_sum'),
+        ('rating_count', 'driver_profile__rating_count'),
+    ]
+    ride_user_types = ('rider', 'driver')
+
+    def to_representation(self, row):
+        ret = super().to_representation(row)
+        rating_sum, rating_count = ret.pop('rating_sum'), ret.pop('rating_count')
+        if ret['user_type'] not in self.ride_user_types:
+            del ret['completed_rides'], ret['cancelled_rides']
+        elif ret['user_type'] == 'driver':
+            ret['satisfaction_rate'] = DriverProfile.compute_satisfaction_rate(rating_sum, rating_count)
+        return ret
+
+
+class UserSearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(min_length=2, max_length=100)
+    cursor = serializers.CharField(required=False)
+    per_page = serializers.IntegerField(required=False, min_value=1, max_value=100)
+
+    def validate_q(self, value):
+        if not search_terms(value):
+            raise serializers.ValidationError(_('Enter at least one letter or digit.'))
+        return value
+
+    def validate_cursor(self, value):
+        try:
+            return decode_cursor(value)
+        except ValueError:
+            raise serializers.ValidationError(_('Invalid cursor.'))
+
+
 class UserSerializer(serializers.ModelSerializer):
     email = serializers.EmailField(required=True)
     username = serializers.CharField(required=True)
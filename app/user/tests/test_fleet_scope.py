@@ -0,0 +1,215 @@
+"""
+Tests for confining staff users to their fleet.
+"""
+from datetime import timedelta
+
+from django.db import connection
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.test import APIClient
+
+from app.utils.fleet_scope import UNSCOPED, FleetScopeMixin, IsSuperUser, current_scope, fleet_scope
+from core.models import Fleet
+from driver import heatmap
+from driver.tracks import append_fix
+
+
+LIST_URL = reverse('user:list_user')
+SEARCH_URL = reverse('user:search_user')
+
+User = get_user_model()
+
+# Open to any authenticated user, but read other users' data for staff.
+STAFF_READS = {'user:list_user', 'user:search_user', 'driver:track'}
+
+
+def api_views(resolver=None, namespace=None):
+    """Yield ``(route name, view class)`` for every DRF view in the URLconf."""
+    for pattern in (resolver or get_resolver()).url_patterns:
+        if isinstance(pattern, URLResolver):
+            yield from api_views(pattern, pattern.namespace or namespace)
+        elif isinstance(pattern, URLPattern) and hasattr(pattern.callback, 'cls'):
+            yield f'{namespace}:{pattern.name}', pattern.callback.cls
+
+
+class FleetScopeTests(TestCase):
+    """Test staff requests only read their own fleet's users."""
+
+    def setUp(self):
+        cache.clear()
+        self.fleets = [Fleet.objects.create(name=name) for name in ('North', 'South')]
+        self.riders = [
+            User.objects.create_user(
+                email=f'rider{index}@example.com', password='testpass123', username=f'rider{index}',
+                first_name='Jane', user_type='rider', fleet=self.fleets[index % 2],
+            )
+            for index in range(4)
+        ]
+        self.staff = User.objects.create_user(
+            email='staff@example.com', password='testpass123', username='staff',
+            user_type='staff', is_staff=True, fleet=self.fleets[0],
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def ids(self, res):
+        return sorted(row['id'] for row in res.data['results'])
+
+    def test_staff_list_is_confined_to_fleet(self):
+        """Test a staff user lists, counts and filters only their fleet."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(LIST_URL, {'user_type': 'rider'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.ids(res), [self.riders[0].id, self.riders[2].id])
+        self.assertEqual(res.data['count'], 2)
+        user_queries = [query['sql'] for query in queries if 'FROM "core_user"' in query['sql']]
+        self.assertTrue(user_queries)
+        for sql in user_queries:
+            self.assertIn(f'"core_user"."fleet_id" = {self.fleets[0].id}', sql)
+        # Asking for another fleet does not widen the scope.
+        res = self.client.get(LIST_URL, {'user_type': 'rider', 'fleet_id': self.fleets[1].id})
+        self.assertEqual(res.data['count'], 0)
+
+    def test_staff_without_fleet_sees_nobody(self):
+        """Test a staff user with no fleet gets an empty list."""
+        User.objects.filter(pk=self.staff.pk).update(fleet=None)
+        self.staff.refresh_from_db()
+
+        res = self.client.get(LIST_URL, {'user_type': 'rider'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['count'], 0)
+
+    def test_superuser_sees_every_fleet(self):
+        """Test superusers are not scoped."""
+        admin = User.objects.create_superuser(email='admin@example.com', password='testpass123', username='admin', user_type='admin')
+        self.client.force_authenticate(admin)
+
+        res = self.client.get(LIST_URL, {'user_type': 'rider'})
+
+        self.assertEqual(self.ids(res), sorted(rider.id for rider in self.riders))
+
+    def test_search_and_status_update_are_scoped(self):
+        """Test search results and writes skip other fleets' users."""
+        res = self.client.get(SEARCH_URL, {'q': 'jane'})
+        self.assertEqual(self.ids(res), [self.riders[0].id, self.riders[2].id])
+
+        url = reverse('user:update_user_status', args=[self.riders[1].id])
+        res = self.client.put(url, {'status': 'banned'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.riders[1].refresh_from_db()
+        self.assertNotEqual(self.riders[1].status, 'banned')
+
+    def test_scope_ends_with_the_request(self):
+        """Test the manager is unscoped outside scoped requests."""
+        self.client.get(LIST_URL, {'user_type': 'rider'})
+
+        self.assertIs(current_scope(), UNSCOPED)
+        self.assertEqual(User.objects.filter(user_type='rider').count(), 4)
+        with fleet_scope(self.fleets[1].id):
+            self.assertEqual(User.objects.filter(user_type='rider').count(), 2)
+            self.assertEqual(User.objects.unscoped().filter(user_type='rider').count(), 4)
+            # Saving and reloading go through the base manager.
+            self.riders[0].refresh_from_db()
+
+    def test_scoped_list_uses_fleet_index(self):
+        """Test a fleet's page is read from user_fleet_type_idx."""
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        with fleet_scope(self.fleets[0].id):
+            plan = User.objects.filter(user_type='rider').order_by('-id')[:20].explain()
+
+        self.assertIn('user_fleet_type_idx', plan)
+
+
+class FleetScopedEndpointTests(TestCase):
+    """Test every staff-facing endpoint is confined to the caller's fleet."""
+
+    def setUp(self):
+        cache.clear()
+        heatmap._snapshot.clear()
+        self.fleets = [Fleet.objects.create(name=name) for name in ('North', 'South')]
+        self.drivers = [
+            User.objects.create_user(
+                email=f'driver{index}@example.com', password='testpass123', user_type='driver',
+                is_online=True, is_available=True, latitude='48.856600', longitude='2.352200',
+                fleet=self.fleets[index % 2],
+            )
+            for index in range(3)
+        ]
+        self.staff = User.objects.create_user(
+            email='staff@example.com', password='testpass123', user_type='staff', is_staff=True, fleet=self.fleets[0],
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_staff_views_are_scoped(self):
+        """Test views open to staff run in the fleet scope or are for superusers only."""
+        for name, view in api_views():
+            permissions = view.permission_classes
+            if IsSuperUser in permissions:
+                continue
+            if IsAdminUser in permissions or name in STAFF_READS:
+                with self.subTest(name):
+                    self.assertTrue(issubclass(view, FleetScopeMixin))
+
+    def test_track_of_other_fleet_is_forbidden(self):
+        """Test staff read tracks of their fleet's drivers only."""
+        now = timezone.now()
+        for driver in self.drivers:
+            append_fix(driver.id, now.timestamp(), 48.8566, 2.3522)
+        params = {'start': (now - timedelta(minutes=1)).isoformat(), 'end': (now + timedelta(minutes=1)).isoformat()}
+
+        own = self.client.get(reverse('driver:track', args=[self.drivers[0].id]), params)
+        other = self.client.get(reverse('driver:track', args=[self.drivers[1].id]), params)
+
+        self.assertEqual(own.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(own.data['data']['points']), 1)
+        self.assertEqual(other.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_presence_and_heatmap_count_own_fleet(self):
+        """Test driver aggregates only count the caller's fleet."""
+        User.objects.filter(pk__in=[driver.pk for driver in self.drivers]).update(
+            last_location_update_at=timezone.now() - timedelta(days=1),
+        )
+        res = self.client.get(reverse('driver:presence_metrics'))
+        self.assertEqual(res.data, {'online': 2, 'stale': 2})
+
+        res = self.client.get(reverse('driver:heatmap'), {'min_lat': 48, 'max_lat': 49, 'min_lng': 2, 'max_lng': 3})
+        self.assertEqual(res.data['data']['cells'], [[48.85, 2.35, 2, 2]])
+
+        User.objects.filter(pk=self.staff.pk).update(fleet=None)
+        self.staff.refresh_from_db()
+        res = self.client.get(reverse('driver:heatmap'), {'min_lat': 48, 'max_lat': 49, 'min_lng': 2, 'max_lng': 3})
+        self.assertEqual(res.data['data']['cells'], [])
+
+    def test_match_reserves_own_fleet_only(self):
+        """Test a fleet dispatcher cannot reserve another fleet's driver."""
+        User.objects.update(is_verified_driver=True, service_id=1, last_location_update_at=timezone.now())
+        User.objects.filter(pk__in=[self.drivers[0].pk, self.drivers[2].pk]).update(is_available=False)
+
+        res = self.client.post(reverse('driver:match'), {'latitude': '48.8566', 'longitude': '2.3522', 'service_id': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.drivers[1].refresh_from_db()
+        self.assertTrue(self.drivers[1].is_available)
+
+    def test_system_metrics_are_for_superusers(self):
+        """Test worker metrics spanning every fleet are hidden from fleet staff."""
+        for name in ('notification:metrics', 'taskqueue:metrics'):
+            self.assertEqual(self.client.get(reverse(name)).status_code, status.HTTP_403_FORBIDDEN)
+
+        admin = User.objects.create_superuser(email='admin@example.com', password='testpass123', user_type='admin')
+        self.client.force_authenticate(admin)
+        for name in ('notification:metrics', 'taskqueue:metrics'):
+            self.assertEqual(self.client.get(reverse(name)).status_code, status.HTTP_200_OK)
+        self.assertIn('swept', self.client.get(reverse('driver:presence_metrics')).data)
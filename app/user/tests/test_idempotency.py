@@ -0,0 +1,216 @@
+"""
+Tests for replaying writes retried with an Idempotency-Key.
+"""
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from django.test import TestCase, TransactionTestCase
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from rest_framework import status
+from rest_framework.parsers import MultiPartParser
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from app.utils.idempotency import fingerprint, purge_expired
+from core.models import IdempotencyKey
+from taskqueue.registry import get_task
+
+
+User = get_user_model()
+original_save = User.save
+
+
+def status_url(pk):
+    return reverse('user:update_user_status', args=[pk])
+
+
+def create_admin(email='admin@example.com'):
+    return User.objects.create_superuser(email=email, password='testpass123', username=email, user_type='admin')
+
+
+class IdempotencyTests(TestCase):
+    """Test stored responses are replayed to retries."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(create_admin())
+        self.rider = User.objects.create_user(email='rider@example.com', password='testpass123', user_type='rider')
+        self.url = status_url(self.rider.pk)
+
+    def put(self, new_status, key='key-1', client=None):
+        return (client or self.client).put(self.url, {'status': new_status}, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_response_without_running_the_view(self):
+        """Test a retry gets the first response back and writes nothing."""
+        res = self.put('banned')
+        User.objects.filter(pk=self.rider.pk).update(status='active')
+
+        with mock.patch('user.views.UserSerializer.to_representation') as serialize, self.assertNumQueries(2):
+            retry = self.put('banned')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual((retry.status_code, retry.data), (res.status_code, res.data))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        serialize.assert_not_called()
+        self.rider.refresh_from_db()
+        self.assertEqual(self.rider.status, 'active')
+
+    def test_requests_without_key_always_run(self):
+        """Test the header is opt-in."""
+        self.client.put(self.url, {'status': 'banned'}, format='json')
+        User.objects.filter(pk=self.rider.pk).update(status='active')
+        self.client.put(self.url, {'status': 'banned'}, format='json')
+
+        self.rider.refresh_from_db()
+        self.assertEqual(self.rider.status, 'banned')
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_key_reused_for_another_body_is_rejected(self):
+        """Test a key sent with a different body gets 422."""
+        self.put('banned')
+
+        res = self.put('inactive')
+
+        self.assertEqual(res.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_keys_are_scoped_per_user(self):
+        """Test another user's identical key does not replay this response."""
+        self.put('banned')
+        User.objects.filter(pk=self.rider.pk).update(status='active')
+        other = APIClient()
+        other.force_authenticate(create_admin('other@example.com'))
+
+        res = self.put('banned', client=other)
+
+        self.assertNotIn('Idempotent-Replayed', res)
+        self.assertEqual(IdempotencyKey.objects.count(), 2)
+
+    def test_expired_key_runs_again(self):
+        """Test a retry after the TTL is a new request, and purge removes old keys."""
+        self.put('banned')
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        User.objects.filter(pk=self.rider.pk).update(status='active')
+
+        res = self.put('inactive')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Idempotent-Replayed', res)
+        self.assertEqual(purge_expired(), 0)
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(purge_expired(), 1)
+
+    def test_server_error_releases_key(self):
+        """Test a failed request is not replayed, so its retry runs again."""
+        self.client.raise_request_exception = False
+        with mock.patch('user.views.get_object_or_404', side_effect=RuntimeError):
+            self.assertEqual(self.put('banned').status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        res = self.put('banned')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Idempotent-Replayed', res)
+
+    def test_fingerprint_hashes_file_content(self):
+        """Test files of the same name and size but different bytes differ, and stay readable."""
+        def parsed(content):
+            upload = SimpleUploadedFile('me.png', content, content_type='image/png')
+            request = Request(APIRequestFactory().post(self.url, {'image': upload}), parsers=[MultiPartParser()])
+            return request, fingerprint(request)
+
+        request, first = parsed(b'a' * 100)
+
+        self.assertEqual(parsed(b'a' * 100)[1], first)
+        self.assertNotEqual(parsed(b'b' * 100)[1], first)
+        self.assertEqual(request.data['image'].read(), b'a' * 100)
+
+    def test_expired_keys_are_purged_on_schedule(self):
+        """Test the purge task is one of run_tasks' recurring tasks."""
+        self.assertIn('core.purge_idempotency_keys', settings.TASK_SCHEDULE)
+        self.assertIsNotNone(get_task('core.purge_idempotency_keys'))
+
+    def test_invalid_key(self):
+        """Test an empty or oversized key is refused."""
+        for key in ('', 'k' * 256):
+            self.assertEqual(self.put('banned', key=key).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class IdempotencyConcurrencyTests(TransactionTestCase):
+    """Test duplicates that arrive while the first request is running."""
+
+    def setUp(self):
+        self.admin = create_admin()
+        self.rider = User.objects.create_user(email='rider@example.com', password='testpass123', user_type='rider')
+        self.url = status_url(self.rider.pk)
+        self.saves = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def put(self, results=None):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        try:
+            res = client.put(self.url, {'status': 'banned'}, format='json', HTTP_IDEMPOTENCY_KEY='key-1')
+        finally:
+            if results is not None:
+                connection.close()
+        if results is not None:
+            results.append(res)
+        return res
+
+    def slow_save(self, user, *args, **kwargs):
+        self.saves += 1
+        self.started.set()
+        self.release.wait(5)
+        return original_save(user, *args, **kwargs)
+
+    def test_duplicate_while_running_conflicts(self):
+        """Test a retry of a running request gets 409, then the stored response."""
+        self.release.clear()
+        results = []
+        with mock.patch.object(User, 'save', autospec=True, side_effect=self.slow_save):
+            first = threading.Thread(target=self.put, args=(results,))
+            first.start()
+            self.assertTrue(self.started.wait(5))
+
+            duplicate = self.put()
+
+            self.release.set()
+            first.join()
+
+        self.assertEqual(duplicate.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(results[0].status_code, status.HTTP_200_OK)
+        retry = self.put()
+        self.assertEqual((retry.status_code, retry.data), (status.HTTP_200_OK, results[0].data))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(self.saves, 1)
+
+    def test_simultaneous_duplicates_run_once(self):
+        """Test only one of many identical requests sent at once does the work."""
+        results = []
+        barrier = threading.Barrier(8)
+
+        def send():
+            barrier.wait(5)
+            self.put(results)
+
+        with mock.patch.object(User, 'save', autospec=True, side_effect=self.slow_save):
+            threads = [threading.Thread(target=send) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(self.saves, 1)
+        codes = sorted(res.status_code for res in results)
+        self.assertEqual(len(codes), 8)
+        self.assertIn(status.HTTP_200_OK, codes)
+        self.assertTrue(set(codes) <= {status.HTTP_200_OK, status.HTTP_409_CONFLICT})
@@ -0,0 +1,85 @@
+"""
+Tests for the user list serializers.
+"""
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+
+from rest_framework import serializers
+
+from app.utils.values_serializer import ValuesSerializer
+from core.models import Fleet
+from user.serializers import UserListAllSerializer, UserListAllValuesSerializer
+
+
+User = get_user_model()
+
+
+class UserListValuesSerializerTests(TestCase):
+    """Test the values() fast path for the user list."""
+
+    def setUp(self):
+        fleets = [None] + [Fleet.objects.create(name=f'Fleet {i}') for i in range(1, 3)]
+        for i in range(3):
+            User.objects.create_user(
+                email=f'staff{i}@example.com',
+                password='testpass123',
+                username=f'staff{i}',
+                user_type='staff',
+                status='active',
+                fleet=fleets[i],
+            )
+        self.queryset = User.objects.order_by('-id')
+
+    def test_matches_model_serializer(self):
+        """Test the fast path produces the same dicts as the ModelSerializer."""
+        expected = UserListAllSerializer(self.queryset, many=True).data
+        rows = UserListAllValuesSerializer.values(self.queryset)
+
+        self.assertEqual(UserListAllValuesSerializer(rows).data, expected)
+
+    def test_matches_model_serializer_for_riders(self):
+        """Test ride counters are only added for riders and drivers."""
+        User.objects.create_user(email='rider@example.com', password='testpass123', user_type='rider', completed_rides=3)
+        expected = UserListAllSerializer(self.queryset, many=True).data
+        data = UserListAllValuesSerializer(UserListAllValuesSerializer.values(self.queryset)).data
+
+        self.assertEqual(data, expected)
+        self.assertEqual((data[0]['completed_rides'], data[0]['cancelled_rides']), (3, 0))
+        self.assertNotIn('completed_rides', data[1])
+
+    def test_converts_like_drf(self):
+        """Test columns needing conversion match DRF's representation."""
+
+        class UserDatesSerializer(ValuesSerializer):
+            model = User
+            fields = ('id', ('joined', 'created_at'))
+
+        user = self.queryset.first()
+        row = UserDatesSerializer.values(self.queryset).first()
+        data = UserDatesSerializer(row, many=False).data
+
+        self.assertEqual(data['id'], user.id)
+        self.assertEqual(data['joined'], serializers.DateTimeField().to_representation(user.created_at))
+
+    def test_file_fields_match_model_serializer(self):
+        """Test file columns come out as storage URLs, like DRF's FileField."""
+
+        class ImageModelSerializer(serializers.ModelSerializer):
+            class Meta:
+                model = User
+                fields = ['id', 'profile_image']
+
+        class ImageValuesSerializer(ValuesSerializer):
+            model = User
+            fields = ImageModelSerializer.Meta.fields
+
+        user = self.queryset.first()
+        User.objects.filter(pk=user.pk).update(profile_image='uploads/ab/cd/abcd.png')
+        User.objects.exclude(pk=user.pk).update(profile_image='')
+        expected = ImageModelSerializer(self.queryset, many=True).data
+
+        data = ImageValuesSerializer(ImageValuesSerializer.values(self.queryset)).data
+
+        self.assertEqual(data, expected)
+        self.assertTrue(data[0]['profile_image'].endswith('uploads/ab/cd/abcd.png'))
+        self.assertIsNone(data[1]['profile_image'])
@@ -0,0 +1,141 @@
+"""
+Tests for the user list endpoint.
+"""
+from django.urls import reverse
+from django.test import TestCase
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app.utils.conditional import queryset_validators
+from app.utils.counting import CachedCount, EstimatedCount, ExactCount
+
+
+LIST_URL = reverse('user:list_user')
+
+
+class UserListConditionalGetTests(TestCase):
+    """Test conditional GET support on the user list."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin_user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.admin_user)
+
+    def test_list_sets_validators(self):
+        """Test the list response carries ETag and Cache-Control headers."""
+        res = self.client.get(LIST_URL, {'status': 'banned'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('ETag', res)
+        self.assertIn('no-cache', res['Cache-Control'])
+
+    def test_unchanged_list_returns_not_modified(self):
+        """Test an unchanged poll is answered with 304 and no body."""
+        res = self.client.get(LIST_URL, {'status': 'banned'})
+        etag = res['ETag']
+
+        res = self.client.get(LIST_URL, {'status': 'banned'}, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(res.content, b'')
+
+    def test_etag_depends_on_query(self):
+        """Test different filters or pages never share an ETag."""
+        first = self.client.get(LIST_URL, {'status': 'banned'})
+        second = self.client.get(LIST_URL, {'status': 'reject'})
+
+        self.assertNotEqual(first['ETag'], second['ETag'])
+
+    def test_validators_change_with_rows(self):
+        """Test the fingerprint changes when the filtered set changes."""
+        queryset = get_user_model().objects.all()
+        etag, _ = queryset_validators(queryset)
+
+        get_user_model().objects.create_user(
+            email='rider@example.com',
+            password='testpass123',
+            user_type='rider',
+        )
+        new_etag, last_modified = queryset_validators(queryset)
+
+        self.assertNotEqual(etag, new_etag)
+        self.assertIsNotNone(last_modified)
+
+    def test_deleting_older_row_invalidates_etag(self):
+        """Test a delete that leaves the newest row in place is not answered with 304."""
+        cache.clear()
+        self.addCleanup(cache.clear)
+        older, _ = [
+            get_user_model().objects.create_user(email=f'rider{index}@example.com', password='testpass123', user_type='rider')
+            for index in range(2)
+        ]
+        res = self.client.get(LIST_URL)
+        etag = res['ETag']
+
+        older.delete()
+        res = self.client.get(LIST_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+
+class CountStrategyTests(TestCase):
+    """Test the count strategies used by list pagination."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.queryset = get_user_model().objects.filter(user_type='rider')
+        self.create_rider('rider1@example.com')
+
+    def create_rider(self, email):
+        return get_user_model().objects.create_user(email=email, password='testpass123', user_type='rider')
+
+    def test_exact_count(self):
+        """Test the exact strategy counts every row."""
+        self.assertEqual(ExactCount().count(self.queryset), 1)
+
+    def test_cached_count_reused_per_filter(self):
+        """Test a cached count is reused until it expires."""
+        strategy = CachedCount(timeout=60)
+        self.assertEqual(strategy.count(self.queryset), 1)
+
+        self.create_rider('rider2@example.com')
+
+        self.assertEqual(strategy.count(self.queryset), 1)
+        self.assertEqual(strategy.count(self.queryset.filter(is_online=False)), 2)
+
+        cache.clear()
+        self.assertEqual(strategy.count(self.queryset), 2)
+
+    def test_estimated_count_small_sets_are_exact(self):
+        """Test estimates below the threshold fall back to an exact count."""
+        self.assertEqual(EstimatedCount(threshold=10000).count(self.queryset), 1)
+
+    def test_estimated_count_uses_planner(self):
+        """Test large estimates are returned without counting."""
+        with self.assertNumQueries(1):
+            estimate = EstimatedCount(threshold=0).count(self.queryset)
+
+        self.assertIsInstance(estimate, int)
+
+    def test_list_pagination_metadata(self):
+        """Test the list view reports the strategy's count in its pagination."""
+        admin_user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='testpass123',
+        )
+        client = APIClient()
+        client.force_authenticate(admin_user)
+
+        res = client.get(LIST_URL, {'status': 'banned'})
+
+        self.assertEqual(res.data['pagination']['total_items'], 0)
+        self.assertEqual(res.data['pagination']['total_pages'], 1)
@@ -0,0 +1,95 @@
+"""
+Tests for the admin user search.
+"""
+from django.db import connection
+from django.urls import reverse
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from user import search
+
+
+SEARCH_URL = reverse('user:search_user')
+
+User = get_user_model()
+
+
+def create_user(email, **params):
+    defaults = {'password': 'testpass123', 'user_type': 'rider', 'status': 'active'}
+    defaults.update(params)
+    return User.objects.create_user(email=email, **defaults)
+
+
+class UserSearchTests(TestCase):
+    """Test ranked, cursor-paged user search."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            email='admin@example.com', password='testpass123', username='admin', user_type='admin',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.john = create_user('john.doe@example.com', username='jdoe', first_name='John', last_name='Doe')
+        self.jane = create_user('jane@mail.test', username='janed', first_name='Jane', last_name='Doe-Smith')
+        self.phone = create_user('other@mail.test', phone_number='+33612345678')
+
+    def search(self, text):
+        return list(search.search_users(User.objects.all(), text).values_list('email', flat=True))
+
+    def test_matches_partial_fields(self):
+        """Test prefixes of email parts, names and phone digits all match."""
+        self.assertEqual(self.search('doe'), ['john.doe@example.com', 'jane@mail.test'])
+        self.assertEqual(self.search('smi'), ['jane@mail.test'])
+        self.assertEqual(self.search('john.doe@exa'), ['john.doe@example.com'])
+        self.assertEqual(self.search('3361234'), ['other@mail.test'])
+        self.assertEqual(self.search('JANE doe'), ['jane@mail.test'])
+        self.assertEqual(self.search('nobody'), [])
+        self.assertEqual(self.search('!!'), [])
+
+    def test_ranks_best_match_first(self):
+        """Test a user matching a term in several fields ranks higher."""
+        create_user('doe@doe.test', username='doe', last_name='Doe')
+
+        self.assertEqual(self.search('doe')[0], 'doe@doe.test')
+
+    def test_uses_search_index(self):
+        """Test the search can use the GIN index instead of scanning users."""
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = search.search_users(User.objects.all(), 'doe').explain()
+
+        self.assertIn('user_search_', plan)
+
+    def test_cursor_pagination(self):
+        """Test pages follow the cursor without repeating or skipping users."""
+        for index in range(5):
+            create_user(f'doe{index}@example.com', last_name='Doe')
+        seen = []
+
+        url = SEARCH_URL + '?q=doe&per_page=3'
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.data['results']), 3)
+            seen += [row['email'] for row in res.data['results']]
+            url = res.data['next']
+
+        self.assertEqual(seen, self.search('doe'))
+        self.assertEqual(len(seen), 7)
+
+    def test_rejects_bad_queries(self):
+        """Test a missing query or a forged cursor is a client error."""
+        self.assertEqual(self.client.get(SEARCH_URL).status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.get(SEARCH_URL, {'q': 'doe', 'cursor': 'garbage'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_requires_staff(self):
+        """Test riders cannot search users."""
+        self.client.force_authenticate(self.john)
+
+        res = self.client.get(SEARCH_URL, {'q': 'doe'})
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
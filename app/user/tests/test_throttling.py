@@ -0,0 +1,117 @@
+"""
+Tests for throttling the public endpoints that hash passwords.
+"""
+from unittest import mock
+
+from django.conf import settings
+from django.urls import reverse
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app.utils.throttling import SlidingWindowThrottle, check_shared_cache
+
+
+TOKEN_URL = reverse('token_obtain_pair')
+REGISTER_URLS = [
+    reverse('user:register_manager'),
+    reverse('rider:register_rider'),
+    reverse('driver:register_driver'),
+]
+
+RATES = {
+    'register.ip': '3/min',
+    'register.email': '2/min',
+    'register.route': '5/min',
+    'token.ip': '100/min',
+    'token.email': '2/min',
+    'token.route': '100/min',
+}
+
+
+@override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': RATES})
+class ThrottlingTests(TestCase):
+    """Test per IP, per email and per route limits."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        get_user_model().objects.create_user(email='user@example.com', password='testpass123')
+
+    def post(self, url, email, ip='10.0.0.1', **extra):
+        return self.client.post(url, {'email': email, 'password': 'wrong'}, REMOTE_ADDR=ip, **extra)
+
+    def test_token_limited_per_email_before_hashing(self):
+        """Test password guesses for one account stop before any DB work."""
+        for ip in ('10.0.0.1', '10.0.0.2'):
+            self.assertEqual(self.post(TOKEN_URL, 'user@example.com', ip).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        with self.assertNumQueries(0), mock.patch('django.contrib.auth.hashers.PBKDF2PasswordHasher.encode') as encode:
+            res = self.post(TOKEN_URL, 'USER@example.com ', '10.0.0.3')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', res)
+        encode.assert_not_called()
+        self.assertEqual(self.post(TOKEN_URL, 'other@example.com').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_register_limited_per_ip(self):
+        """Test one address is limited across emails; others are not."""
+        for index in range(3):
+            self.assertNotEqual(self.post(REGISTER_URLS[1], f'new{index}@example.com').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        self.assertEqual(self.post(REGISTER_URLS[1], 'new9@example.com').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertNotEqual(self.post(REGISTER_URLS[1], 'new9@example.com', '10.0.0.2').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_forwarded_for_is_not_trusted(self):
+        """Test a spoofed X-Forwarded-For does not reset the client's limit."""
+        for index in range(3):
+            self.post(REGISTER_URLS[0], f'new{index}@example.com', HTTP_X_FORWARDED_FOR=f'1.2.3.{index}')
+
+        res = self.post(REGISTER_URLS[0], 'new9@example.com', HTTP_X_FORWARDED_FOR='1.2.3.9')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_route_limit_and_refusals_do_not_count(self):
+        """Test the route caps all clients, and refused requests use none of it."""
+        url = REGISTER_URLS[2]
+        for index in range(3):
+            self.post(url, f'a{index}@example.com', '10.0.0.1')
+        for index in range(5):
+            self.assertEqual(self.post(url, f'b{index}@example.com', '10.0.0.1').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        self.assertNotEqual(self.post(url, 'c0@example.com', '10.0.0.2').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertNotEqual(self.post(url, 'c1@example.com', '10.0.0.3').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.post(url, 'c2@example.com', '10.0.0.4').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # Each route has its own budget.
+        self.assertNotEqual(self.post(REGISTER_URLS[1], 'c2@example.com', '10.0.0.4').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_window_slides(self):
+        """Test the previous window's count fades out as time passes."""
+        with mock.patch.object(SlidingWindowThrottle, 'timer', return_value=6000.0):
+            for index in range(2):
+                self.post(TOKEN_URL, 'user@example.com', f'10.0.0.{index}')
+            self.assertEqual(self.post(TOKEN_URL, 'user@example.com').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        with mock.patch.object(SlidingWindowThrottle, 'timer', return_value=6030.0):
+            self.assertEqual(self.post(TOKEN_URL, 'user@example.com')['Retry-After'], '30')
+
+        # The previous window's two requests fade out over the next minute.
+        with mock.patch.object(SlidingWindowThrottle, 'timer', return_value=6060.0):
+            self.assertEqual(self.post(TOKEN_URL, 'user@example.com').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        with mock.patch.object(SlidingWindowThrottle, 'timer', return_value=6061.0):
+            self.assertEqual(self.post(TOKEN_URL, 'user@example.com').status_code, status.HTTP_401_UNAUTHORIZED)
+        with mock.patch.object(SlidingWindowThrottle, 'timer', return_value=6075.0):
+            res = self.post(TOKEN_URL, 'user@example.com')
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res['Retry-After'], '15')
+
+    def test_deploy_check_requires_shared_cache(self):
+        """Test the deploy check warns while throttles count per process."""
+        self.assertEqual([error.id for error in check_shared_cache()], ['throttling.W001'])
+
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache:6379/0'}}
+        with self.settings(CACHES=redis):
+            self.assertEqual(check_shared_cache(), [])
@@ -2,6 +2,7 @@ from django.urls import path
 
 from user.views import (
     UserListAllView,
+    UserSearchView,
     ManagerRegisterView,
     UpdateUserStatus,
     UserPasswordChangeView,
@@ -12,6 +13,7 @@ app_name = 'user'
 
 urlpatterns = [
     path('list/', UserListAllView.as_view(), name='list_user'),
+    path('search/', UserSearchView.as_view(), name='search_user'),
     path('register/manager/', ManagerRegisterView.as_view(), name='register_manager'),
     path('status/<int:pk>/', UpdateUserStatus.as_view(), name='update_user_status'),
     path('change-password/', UserPasswordChangeView.as_view(), name='change_password'),
@@ -9,6 +9,7 @@ from rest_framework.views import APIView
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.generics import get_object_or_404
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import IsAdminUser, IsAuthenticated, AllowAny
 
@@ -19,20 +20,43 @@ from rest_framework_simplejwt.views import (
     TokenVerifyView,
 )
 
+from app.utils.conditional import not_modified_response, queryset_validators, set_validators
+from app.utils.counting import CachedCount
 from app.utils.custom_pagination import CustomPagination
-from user.serializers import UserSerializer, ChangePasswordSerializer, UserListAllSerializer
+from app.utils.fleet_scope import FleetScopeMixin
+from app.utils.idempotency import IdempotencyMixin
+from app.utils.schema_hints import OpenApiTypes, extend_schema
+from app.utils.throttling import PublicThrottleMixin
+from user.search import encode_cursor, search_users
+from user.serializers import (
+    UserSerializer,
+    ChangePasswordSerializer,
+    UserListAllSerializer,
+    UserListAllValuesSerializer,
+    UserSearchQuerySerializer,
+)
 
 
 User = get_user_model()
 
 
-class UserListAllView(APIView):
+class UserListAllView(FleetScopeMixin, APIView):
+    """List users; staff users only see their own fleet."""
     queryset = User.objects.all()
     permission_classes = [IsAuthenticated]
-    serializer_class = [UserListAllSerializer]
-    pagination_class = CustomPagination()
+    serializer_class = UserListAllValuesSerializer
+    pagination_class = CustomPagination
+    # Dashboards poll the same filters; a short-lived count spares a COUNT(*) per page.
+    # It only feeds the pagination metadata, never the ETag.
+    count_strategy = CachedCount(timeout=30)
     authentication_classes = [JWTAuthentication]
 
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            self._paginator = self.pagination_class(count_strategy=self.count_strategy)
+        return self._paginator
+
     def get_queryset(self):
         user = self.request.user
 
@@ -46,15 +70,11 @@ class UserListAllView(APIView):
 
         queryset = User.objects.all()
 
+        # User.objects is already confined to the caller's fleet (FleetScopeMixin).
         if user.is_staff:
             if user_type not in ['rider', 'driver']:
                 raise PermissionDenied(_('You are not authorized to access this resource.'))
 
-            fleet = user.is_staff
-            if not fleet:
-                return queryset.none()
-
-
         if user_type:
             queryset = queryset.filter(user_type=user_type)
         if fleet_id:
@@ -64,6 +84,7 @@ class UserListAllView(APIView):
         if status is not None:
             queryset = queryset.filter(status=status)
 
+        per_page = settings.REST_FRAMEWORK['PAGE_SIZE']
         per_page_param = self.request.query_params.get('per_page', None)
         if per_page_param is not None:
             try:
@@ -75,23 +96,68 @@ class UserListAllView(APIView):
             except ValueError:
                 per_page = settings.REST_FRAMEWORK['PAGE_SIZE']
 
-        self.pagination_class.page_size = per_page
+        self.paginator.page_size = per_page
 
         return queryset.order_by('-id')
 
+    @extend_schema(responses=UserListAllSerializer(many=True))
     def get(self, request):
         queryset = self.get_queryset()
-        page = self.pagination_class.paginate_queryset(queryset, request)
+
+        rows = self.serializer_class.values(queryset)
+
+        # Unchanged polls are answered before any row is counted, paginated or serialized.
+        etag, last_modified = queryset_validators(queryset, request)
+        not_modified = not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        page = self.paginator.paginate_queryset(rows, request)
 
         if page is not None:
             serializer = self.serializer_class(page, many=True)
-            return self.pagination_class.get_paginated_response(serializer.data)
+            response = self.paginator.get_paginated_response(serializer.data)
+        else:
+            serializer = self.serializer_class(rows, many=True)
+            response = Response(serializer.data)
+
+        return set_validators(response, etag, last_modified)
+
+
+class UserSearchView(FleetScopeMixin, APIView):
+    """Rank users by partial email, username, phone or name, paged by cursor."""
+    permission_classes = [IsAuthenticated]
+    serializer_class = UserListAllValuesSerializer
+    authentication_classes = [JWTAuthentication]
+
+    @extend_schema(parameters=[UserSearchQuerySerializer], responses={200: OpenApiTypes.OBJECT})
+    def get(self, request):
+        user = request.user
+        if not user.is_superuser and not user.is_staff:
+            raise PermissionDenied(_('You are not authorized to access this resource.'))
+
+        query = UserSearchQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        per_page = query.validated_data.get('per_page', settings.REST_FRAMEWORK['PAGE_SIZE'])
+
+        queryset = search_users(User.objects.all(), query.validated_data['q'], query.validated_data.get('cursor'))
+        # The rank rides along after the serialized columns; zip() leaves it out of the output.
+        rows = list(queryset.values_list(*self.serializer_class.columns, 'search_rank', 'id')[:per_page + 1])
 
-        serializer = self.serializer_class(queryset, many=True)
-        return Response(serializer.data)
+        next_url = None
+        if len(rows) > per_page:
+            rows = rows[:per_page]
+            url = request.build_absolute_uri()
+            next_url = replace_query_param(url, 'cursor', encode_cursor(*rows[-1][-2:]))
+        return Response({
+            'next': next_url,
+            'results': self.serializer_class(rows, many=True).data,
+        }, status=status.HTTP_200_OK)
 
 
-class ManagerRegisterView(generics.CreateAPIView):
+class ManagerRegisterView(PublicThrottleMixin, IdempotencyMixin, generics.CreateAPIView):
+    """Register a pending staff user; they see no users until an admin gives them a fleet."""
+    throttle_scope = 'register'
     permission_classes = (AllowAny,)
     serializer_class = UserSerializer
 
@@ -131,7 +197,12 @@ class ManagerRegisterView(generics.CreateAPIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
 
-class UpdateUserStatus(APIView):
+class TokenObtainView(PublicThrottleMixin, TokenObtainPairView):
+    """Issue JWT pairs, throttled before the password is checked."""
+    throttle_scope = 'token'
+
+
+class UpdateUserStatus(FleetScopeMixin, IdempotencyMixin, APIView):
     serializer_class = UserSerializer
     permission_classes = [IsAdminUser]
     authentication_classes = [JWTAuthentication]
@@ -1,6 +1,28 @@
 server {
     listen ${LISTEN_PORT};
 
+    # Compress API and static bodies here so uWSGI workers never spend CPU on it.
+    # Upstream ETag/Last-Modified headers are passed through untouched (nginx
+    # weakens the ETag of gzipped bodies, which Django's If-None-Match check accepts).
+    gzip                on;
+    gzip_vary           on;
+    gzip_proxied        any;
+    gzip_comp_level     5;
+    gzip_min_length     1024;
+    gzip_types          application/json application/vnd.oai.openapi application/vnd.oai.openapi+json text/css application/javascript image/svg+xml;
+
+    # Prebuilt OpenAPI schema files are named after the code version.
+    location /static/static/schema/ {
+        alias /vol/static/static/schema/;
+        add_header Cache-Control "public, max-age=31536000, immutable";
+    }
+
+    # Uploads are named after their content hash and never change.
+    location ~ "^/static/media/uploads/[a-z]+/[0-9a-f]{2}/[0-9a-f]{2}/" {
+        root /vol;
+        add_header Cache-Control "public, max-age=31536000, immutable";
+    }
+
     location /static {
         alias /vol/static;
     }
@@ -10,4 +32,4 @@ server {
         include                 /etc/nginx/uwsgi_params;
         client_max_body_size    10M;
     }
-}
\ No newline at end of file
+}
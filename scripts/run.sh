@@ -3,7 +3,25 @@
 set -e
 
 python manage.py wait_for_db
-python manage.py collectstatic --noinput
-python manage.py migrate
+# Warns when throttles would count per process instead of in a shared cache.
+python manage.py check --deploy --tag caches
 
-uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi
\ No newline at end of file
+# One-off release steps; set to 0 on replicas that only need to serve.
+if [ "${RUN_COLLECTSTATIC:-1}" = "1" ]; then
+    python manage.py collectstatic --noinput
+    python manage.py build_schema
+fi
+if [ "${RUN_MIGRATE:-1}" = "1" ]; then
+    python manage.py migrate
+    # Only creates upcoming partitions; archiving is a scheduled task.
+    python manage.py manage_ride_partitions
+fi
+
+# By default the app is loaded once in the uWSGI master and forked into the
+# workers (see app/wsgi.py); UWSGI_LAZY_APPS=1 loads it in each worker instead.
+LAZY_APPS=""
+if [ "${UWSGI_LAZY_APPS:-0}" = "1" ]; then
+    LAZY_APPS="--lazy-apps"
+fi
+
+uwsgi --socket :9000 --workers "${UWSGI_WORKERS:-4}" --master --enable-threads --need-app $LAZY_APPS --module app.wsgi
\ No newline at end of file